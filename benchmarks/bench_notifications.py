@@ -0,0 +1,39 @@
+"""Micro-benchmark of the attribute set and collection append throughput.
+
+The measures are performed on a dynamic metamodel, with and without a
+listener on the modified object::
+
+    $ PYTHONPATH=. python benchmarks/bench_notifications.py
+"""
+from timeit import repeat
+from pyecore.ecore import EClass, EAttribute, EString, EInt
+from pyecore.notification import EObserver
+
+
+def build():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('name', EString))
+    A.eStructuralFeatures.append(EAttribute('values', EInt, upper=-1,
+                                            unique=False))
+    return A
+
+
+def measure(statement, number=100000, **namespace):
+    best = min(repeat(statement, globals=namespace, number=number, repeat=5))
+    return number / best
+
+
+def main():
+    A = build()
+    for label, observer in (('no listener', None), ('listener', EObserver())):
+        a = A()
+        if observer:
+            observer.observe(a)
+        sets = measure('a.name = "x"', a=a)
+        appends = measure('append(1)', append=a.values.append)
+        print(f'{label:>12}: set {sets:12,.0f} ops/s  '
+              f'append {appends:12,.0f} ops/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Micro-benchmark of the positional operations on a large containment
+collection (ordered and unique, i.e. an ``EOrderedSet``)::
+
+    $ PYTHONPATH=. python benchmarks/bench_ordered_set.py
+"""
+from timeit import default_timer
+from pyecore.ecore import EClass, EReference
+from pyecore.commands import Move
+
+SIZE = 100000
+OPERATIONS = 1000
+
+
+def build():
+    Node = EClass('Node')
+    Node.eStructuralFeatures.append(EReference('children', Node, upper=-1,
+                                               containment=True))
+    root = Node()
+    root.children.extend([Node() for _ in range(SIZE)])
+    return Node, root
+
+
+def move(owner, value, to_index):
+    command = Move(owner, 'children', value=value, to_index=to_index)
+    if command.can_execute:
+        command.execute()
+
+
+def measure(label, operation):
+    start = default_timer()
+    for i in range(OPERATIONS):
+        operation(i)
+    elapsed = default_timer() - start
+    print(f'{label:>24}: {OPERATIONS / elapsed:12,.0f} ops/s')
+
+
+def main():
+    Node, root = build()
+    children = root.children
+    print(f'{SIZE:,} children')
+    measure('insert(0, x)', lambda i: children.insert(0, Node()))
+    measure('insert(middle, x)',
+            lambda i: children.insert(len(children) // 2, Node()))
+    measure('pop(0)', lambda i: children.pop(0))
+    measure('remove(x) middle',
+            lambda i: children.remove(children[len(children) // 2]))
+    measure('children[0] = x', lambda i: children.__setitem__(0, Node()))
+    measure('Move(value, last)', lambda i: move(root, children[i], -1))
+    measure('index(x) after insert', lambda i: (children.insert(0, Node()),
+                                                children.index(children[-1])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,630 @@
+"""This module provides a pure-Python generator of static PyEcore metamodels.
+
+The generator turns an ``EPackage`` (and its sub-packages) into Python
+packages with the same layout as the code produced by the Acceleo generator
+of the ``generator`` folder: each ``EPackage`` gives a Python package with an
+``__init__.py`` and a module named after the ``EPackage``. The generated
+classes use ``MetaEClass``, they are registered in their module by
+``Core.register_classifier`` when the module is imported.
+
+The generator can be used from Python:
+
+.. code-block:: python
+
+    from pyecore.resources import ResourceSet
+    from pyecore.codegen import generate
+
+    rset = ResourceSet()
+    root = rset.get_resource('library.ecore').contents[0]
+    generate(root, 'output/folder')
+
+or from the command line:
+
+.. code-block:: bash
+
+    $ python -m pyecore.codegen library.ecore -o output/folder
+"""
+import argparse
+import keyword
+from pathlib import Path
+from ordered_set import OrderedSet
+from . import ecore as Ecore
+
+
+GENMODEL_URI = 'http://www.eclipse.org/emf/2002/GenModel'
+
+
+def generate(epackage, output_folder='.'):
+    """Writes the static code of ``epackage`` and of its sub-packages.
+
+    :param epackage: the root ``EPackage`` of the metamodel
+    :param output_folder: the folder where the Python package is created
+    :return: the list of the written files
+    """
+    written = []
+    for path, code in generate_code(epackage).items():
+        path = Path(output_folder, path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code, encoding='utf-8')
+        written.append(path)
+    return written
+
+
+def generate_code(epackage):
+    """Gives the static code of ``epackage`` and of its sub-packages.
+
+    :param epackage: the root ``EPackage`` of the metamodel
+    :return: a dict associating each file path, relative to the output
+             folder, to its content
+    """
+    return _Generator(epackage).generate()
+
+
+def _python_name(name):
+    if keyword.iskeyword(name) or name in ('self', 'kwargs'):
+        return name + '_'
+    return name
+
+
+def _documentation(element):
+    annotation = element.getEAnnotation(GENMODEL_URI)
+    if annotation is None:
+        return None
+    return annotation.details.get('documentation')
+
+
+def _is_ecore(classifier):
+    """Tells if ``classifier`` is defined by ``pyecore.ecore``."""
+    return classifier.ePackage is Ecore.eClass
+
+
+def _resolved(elements):
+    return [x.force_resolve() for x in elements if x is not None]
+
+
+def _supertypes(eclass):
+    """Gives the super types of ``eclass``, the classifiers of its generic
+    super types included, as for the bases of a dynamic EClass.
+    """
+    supertypes = _resolved(eclass.eSuperTypes)
+    for classifier in _resolved(x.eClassifier
+                                for x in eclass.eGenericSuperTypes):
+        if classifier not in supertypes:
+            supertypes.append(classifier)
+    return supertypes
+
+
+def _all_supertypes(eclass):
+    result = []
+    todo = _supertypes(eclass)
+    while todo:
+        supertype = todo.pop()
+        if supertype not in result:
+            result.append(supertype)
+            todo.extend(_supertypes(supertype))
+    return result
+
+
+def _features(eclass):
+    """Gives the features of ``eclass`` in the order of the generated
+    class body.
+    """
+    return sorted(eclass.eStructuralFeatures, key=lambda x: x.is_reference)
+
+
+class _Generator(object):
+    def __init__(self, root):
+        self.root = root
+        self.packages = [root]
+        self.paths = {root: (root.name,)}
+        for package in self.packages:
+            for subpackage in package.eSubpackages:
+                self.packages.append(subpackage)
+                self.paths[subpackage] = (self.paths[package]
+                                          + (subpackage.name,))
+        self.eclasses = [c for p in self.packages for c in p.eClassifiers
+                         if isinstance(c, Ecore.EClass)]
+        # the root classes in the inheritance of a class with several super
+        # types must forward the keyword arguments to the next class
+        self.forwarding = set()
+        for eclass in self.eclasses:
+            if len(_supertypes(eclass)) > 1:
+                self.forwarding.update(_all_supertypes(eclass))
+        # several bases with slots cannot be combined, only the classes with
+        # at most one super type, itself compact, and which are not
+        # inherited by classes with several super types are compact
+        self.compact = set()
+        for eclass in self.sorted_all():
+            supertypes = _supertypes(eclass)
+            if eclass not in self.forwarding and all(
+                    x in self.compact for x in supertypes) \
+                    and len(supertypes) <= 1:
+                self.compact.add(eclass)
+
+    def sorted_all(self):
+        """Gives the classes of all the packages, the super types first."""
+        result = []
+        done = set()
+
+        def visit(eclass):
+            if eclass in done:
+                return
+            done.add(eclass)
+            for supertype in _supertypes(eclass):
+                if supertype.ePackage in self.paths:
+                    visit(supertype)
+            result.append(eclass)
+
+        for eclass in self.eclasses:
+            visit(eclass)
+        return result
+
+    def generate(self):
+        files = {}
+        for package in self.packages:
+            folder = Path(*self.paths[package])
+            files[folder / '__init__.py'] = self.init_code(package)
+            files[folder / f'{package.name}.py'] = self.module_code(package)
+        return files
+
+    def module_parts(self, package):
+        return self.paths[package] + (package.name,)
+
+    def local(self, classifier, package):
+        return classifier.ePackage is package or _is_ecore(classifier)
+
+    def import_line(self, classifier, package):
+        """Gives the import of a classifier of another package."""
+        target = classifier.ePackage
+        if target not in self.paths:
+            return f'from {target.name} import {classifier.name}'
+        current = self.paths[package]
+        target = self.module_parts(target)
+        common = 0
+        for a, b in zip(current, target):
+            if a != b:
+                break
+            common += 1
+        dots = '.' * (len(current) - common + 1)
+        module = '.'.join(target[common:])
+        return f'from {dots}{module} import {classifier.name}'
+
+    def sorted_eclasses(self, package):
+        eclasses = [c for c in package.eClassifiers
+                    if isinstance(c, Ecore.EClass)]
+        result = []
+        done = set()
+
+        def visit(eclass):
+            if eclass in done:
+                return
+            done.add(eclass)
+            for supertype in _supertypes(eclass):
+                if supertype.ePackage is package:
+                    visit(supertype)
+            result.append(eclass)
+
+        for eclass in eclasses:
+            visit(eclass)
+        return result
+
+    def module_code(self, package):
+        imports = []
+        for eclass in package.eClassifiers:
+            if not isinstance(eclass, Ecore.EClass):
+                continue
+            supertypes = _supertypes(eclass)
+            types = supertypes + _resolved(f.eType for f
+                                           in eclass.eStructuralFeatures)
+            for classifier in types:
+                if not self.local(classifier, package):
+                    line = self.import_line(classifier, package)
+                    if line not in imports and (
+                            classifier.ePackage not in self.paths
+                            or not isinstance(classifier, Ecore.EClass)
+                            or classifier in supertypes):
+                        imports.append(line)
+        lines = [
+            f'"""Definition of the ``{package.name}`` metamodel.',
+            '',
+            'This module has been generated by ``pyecore.codegen``.',
+            '"""',
+            'from functools import partial',
+            'import pyecore.ecore as Ecore',
+            'from pyecore.ecore import *',
+            *sorted(imports),
+            '',
+            '',
+            f'name = {package.name!r}',
+            f'nsURI = {package.nsURI!r}',
+            f'nsPrefix = {package.nsPrefix!r}',
+            '',
+            'eClass = EPackage(name=name, nsURI=nsURI, nsPrefix=nsPrefix)',
+            '',
+            'eClassifiers = {}',
+            'getEClassifier = partial(Ecore.getEClassifier, '
+            'searchspace=eClassifiers)',
+            '',
+        ]
+        datatypes = [c for c in package.eClassifiers
+                     if isinstance(c, Ecore.EDataType)]
+        for datatype in datatypes:
+            lines.extend(self.datatype_code(datatype))
+        if datatypes:
+            names = ', '.join(c.name for c in datatypes)
+            lines.extend([
+                '',
+                f'for classif in ({names},):',
+                '    eClassifiers[classif.name] = classif',
+                '    classif.ePackage = eClass',
+            ])
+        for eclass in self.sorted_eclasses(package):
+            lines.extend(['', ''])
+            lines.extend(self.eclass_code(eclass, package))
+        wiring = self.references_code(package)
+        if wiring:
+            lines.extend(['', ''])
+            lines.extend(wiring)
+        generics = self.generics_code(package)
+        if generics:
+            lines.extend(['', '', '# generic types', *generics])
+        return '\n'.join(lines) + '\n'
+
+    def datatype_code(self, datatype):
+        name = datatype.name
+        if isinstance(datatype, Ecore.EEnum):
+            literals = [literal.name for literal in datatype.eLiterals]
+            lines = [f'{name} = EEnum({name!r}, literals={literals!r})']
+            for i, literal in enumerate(datatype.eLiterals):
+                if literal.value != i:
+                    lines.append(f'{name}.{literal.name}.value = '
+                                 f'{literal.value!r}')
+            return lines
+        class_name = datatype.instanceClassName
+        if class_name:
+            return [f'{name} = EDataType({name!r}, '
+                    f'instanceClassName={class_name!r})']
+        return [f'{name} = EDataType({name!r})']
+
+    @staticmethod
+    def bases(eclass):
+        """Gives the super types of ``eclass`` in the order of the bases of
+        its generated class.
+        """
+        supertypes = _supertypes(eclass)
+        if any(later in _all_supertypes(former)
+               or former in _all_supertypes(later)
+               for i, former in enumerate(supertypes)
+               for later in supertypes[i + 1:]):
+            # the most specialized super types first, as for the dynamic
+            # EClass, otherwise no consistent MRO exists
+            supertypes.sort(key=lambda x: len(_all_supertypes(x)),
+                            reverse=True)
+        return supertypes
+
+    def eclass_code(self, eclass, package):
+        name = eclass.name
+        supertypes = [s.name for s in self.bases(eclass)]
+        lines = []
+        if eclass.abstract or eclass.interface:
+            lines.append('@abstract')
+        if supertypes:
+            lines.append(f'class {name}({", ".join(supertypes)}):')
+        elif eclass in self.compact:
+            lines.append(f'class {name}(CompactEObject, '
+                         'metaclass=MetaEClass):')
+        else:
+            lines.append(f'class {name}(EObject, metaclass=MetaEClass):')
+        documentation = _documentation(eclass)
+        if documentation:
+            lines.append(f'    """{documentation}"""')
+        features = _features(eclass)
+        if eclass in self.compact:
+            slots = tuple(self.slot_name(f) for f in features)
+            lines.append(f'    __slots__ = {slots!r}')
+        names = {_python_name(f.name) for f in features}
+        for parameter in eclass.eTypeParameters:
+            parameter_name = _python_name(parameter.name)
+            if parameter_name in names:
+                raise ValueError(f'The type parameter {parameter.name} of '
+                                 f'{name} has the name of a feature')
+            args = (f'{parameter.name!r}' if parameter_name != parameter.name
+                    else '')
+            lines.append(f'    {parameter_name} = ETypeParameter({args})')
+        for feature in features:
+            lines.append(f'    {self.feature_code(feature, package)}')
+        lines.append('')
+        lines.extend(self.init_method_code(eclass, features))
+        for operation in eclass.eOperations:
+            lines.append('')
+            lines.extend(self.operation_code(operation))
+        return lines
+
+    @staticmethod
+    def slot_name(feature):
+        return f'_slot_{_python_name(feature.name)}'
+
+    def table(self, eclass, tables):
+        """Gives the features and the features in the IDs order of the
+        generated class of ``eclass``, as computed by its ``EClass``.
+        """
+        if eclass.ePackage not in self.paths:
+            reflection = eclass._reflection()
+            return reflection.features, reflection.id_features
+        parents = [tables[x] if x in tables else self.table(x, tables)
+                   for x in self.bases(eclass)
+                   if x is not Ecore.EObject.eClass]
+        own = _features(eclass)
+        features = OrderedSet(own)
+        id_features = OrderedSet()
+        for parent_features, parent_ids in parents:
+            features.update(parent_features)
+            id_features.update(parent_ids)
+        id_features.update(own)
+        tables[eclass] = (tuple(features), tuple(id_features))
+        return tables[eclass]
+
+    def feature_tables(self):
+        """Gives the precomputed feature tables of the classes, the super
+        types first.
+        """
+        lines = []
+        tables = {}
+        for eclass in self.sorted_all():
+            all_features, id_features = self.table(eclass, tables)
+            features = [_python_name(f.name) for f in all_features]
+            if len(set(features)) != len(features):
+                continue  # features hidden by other ones cannot be named
+            ids = [_python_name(f.name) for f in id_features]
+            lines.append(f'Core.register_feature_table('
+                         f'{self.qualified(eclass)},')
+            lines.append(f'    {tuple(features)!r},')
+            lines.append(f'    {tuple(ids)!r})')
+        return lines
+
+    def feature_code(self, feature, package):
+        name = _python_name(feature.name)
+        args = []
+        if name != feature.name:
+            args.append(f'name={feature.name!r}')
+        if feature.is_attribute and feature.eType is not None:
+            etype = feature.eType.force_resolve()
+            if (self.local(etype, package)
+                    or not isinstance(etype, Ecore.EClass)):
+                args.append(f'eType={etype.name}')
+        if feature.lowerBound:
+            args.append(f'lower={feature.lowerBound}')
+        if feature.upperBound != 1:
+            args.append(f'upper={feature.upperBound}')
+        if not feature.ordered:
+            args.append('ordered=False')
+        if not feature.unique:
+            args.append('unique=False')
+        flags = ['changeable', 'volatile', 'transient', 'unsettable',
+                 'derived']
+        if feature.is_attribute:
+            flags.append('iD')
+            if feature.defaultValueLiteral is not None:
+                args.append('defaultValueLiteral='
+                            f'{feature.defaultValueLiteral!r}')
+        else:
+            flags.append('containment')
+        for flag in flags:
+            value = getattr(feature, flag)
+            if value != (flag == 'changeable'):
+                args.append(f'{flag}={value!r}')
+        kind = 'EAttribute' if feature.is_attribute else 'EReference'
+        return f'{name} = {kind}({", ".join(args)})'
+
+    def init_method_code(self, eclass, features):
+        params = ''.join(f', {_python_name(f.name)}=None' for f in features)
+        lines = [f'    def __init__(self{params}, **kwargs):']
+        if _supertypes(eclass) or eclass in self.forwarding:
+            lines.append('        super().__init__(**kwargs)')
+        else:
+            lines.extend([
+                '        if kwargs:',
+                "            raise AttributeError('unexpected arguments: "
+                "{}'.format(kwargs))",
+                '',
+                '        super().__init__()',
+            ])
+        for feature in features:
+            name = _python_name(feature.name)
+            if feature.many:
+                lines.extend([f'        if {name}:',
+                              f'            self.{name}.extend({name})'])
+            else:
+                lines.extend([f'        if {name} is not None:',
+                              f'            self.{name} = {name}'])
+        return lines
+
+    def operation_code(self, operation):
+        params = []
+        for parameter in operation.eParameters:
+            name = _python_name(parameter.name)
+            params.append(name if parameter.required else f'{name}=None')
+        params = ''.join(f', {x}' for x in params)
+        lines = [f'    def {_python_name(operation.name)}(self{params}):']
+        documentation = _documentation(operation)
+        if documentation:
+            lines.append(f'        """{documentation}"""')
+        lines.append("        raise NotImplementedError('Operation "
+                     f"{operation.name}(...) is not yet implemented')")
+        return lines
+
+    def references(self, package=None):
+        """Gives the reference wiring lines, the references of ``package``
+        whose type is in the same package if ``package`` is given, the other
+        ones otherwise.
+        """
+        done = set()
+        for eclass in self.eclasses:
+            for reference in eclass.eReferences:
+                if reference.eType is None:
+                    continue
+                etype = reference.eType.force_resolve()
+                owner = eclass.ePackage
+                local = (etype.ePackage is owner or _is_ecore(etype)
+                         or etype.ePackage not in self.paths)
+                if local != (package is not None) \
+                        or (package is not None and owner is not package):
+                    continue
+                yield reference, 'eType', etype
+                opposite = reference.eOpposite
+                if opposite is not None and opposite not in done:
+                    done.add(reference)
+                    yield reference, 'eOpposite', opposite
+
+    def references_code(self, package):
+        lines = []
+        for reference, attribute, value in self.references(package):
+            owner = reference.eContainingClass.name
+            name = _python_name(reference.name)
+            if attribute == 'eType':
+                lines.append(f'{owner}.{name}.eType = {value.name}')
+            else:
+                opposite = (f'{value.eContainingClass.name}.'
+                            f'{_python_name(value.name)}')
+                lines.append(f'{owner}.{name}.eOpposite = {opposite}')
+        return lines
+
+    def generic_code(self, generic, package):
+        """Gives the expression creating a copy of the ``EGenericType``
+        ``generic`` in the module of ``package``.
+        """
+        args = []
+        parameter = generic.eTypeParameter
+        if parameter is not None:
+            owner = parameter.eContainer()
+            if not isinstance(owner, Ecore.EClass) \
+                    or owner.ePackage is not package:
+                raise ValueError(f'The type parameter {parameter.name} '
+                                 'cannot be referenced from the '
+                                 f'{package.name} module')
+            args.append(f'eTypeParameter={owner.name}.'
+                        f'{_python_name(parameter.name)}')
+        classifier = generic.eClassifier
+        if classifier is not None:
+            classifier = classifier.force_resolve()
+            if classifier.ePackage in self.paths \
+                    and classifier.ePackage is not package:
+                raise ValueError(f'The generic type {classifier.name} of '
+                                 'another package cannot be referenced from '
+                                 f'the {package.name} module')
+            name = classifier.name
+            if isinstance(classifier, Ecore.EClass):
+                name += '.eClass'
+            args.append(f'eClassifier={name}')
+        arguments = [self.generic_code(x, package)
+                     for x in generic.eTypeArguments]
+        if arguments:
+            args.append(f'eTypeArguments=[{", ".join(arguments)}]')
+        return f'EGenericType({", ".join(args)})'
+
+    def generics_code(self, package):
+        """Gives the lines setting the generic types of the classes of
+        ``package``: the bounds of their type parameters, the generic types
+        of their features and their generic super types with arguments.
+        """
+        lines = []
+        for eclass in self.sorted_eclasses(package):
+            name = eclass.name
+            for parameter in eclass.eTypeParameters:
+                for bound in parameter.eBounds:
+                    lines.append(f'{name}.{_python_name(parameter.name)}'
+                                 '.eBounds.append('
+                                 f'{self.generic_code(bound, package)})')
+            for feature in _features(eclass):
+                generic = feature.eGenericType
+                if generic is None or (generic.eTypeParameter is None
+                                       and not generic.eTypeArguments):
+                    continue  # the eType is enough
+                lines.append(f'{name}.{_python_name(feature.name)}'
+                             '.eGenericType = '
+                             f'{self.generic_code(generic, package)}')
+            for generic in eclass.eGenericSuperTypes:
+                if generic.eTypeArguments:
+                    lines.append(f'{name}.eClass.eGenericSuperTypes.append('
+                                 f'{self.generic_code(generic, package)})')
+        return lines
+
+    def qualified(self, classifier):
+        """Gives the name of ``classifier`` from the root ``__init__``."""
+        if _is_ecore(classifier) or classifier.ePackage not in self.paths:
+            return classifier.name
+        module = self.module_parts(classifier.ePackage)[1:]
+        return '.'.join(module + (classifier.name,))
+
+    def init_code(self, package):
+        classifiers = [c.name for c in package.eClassifiers]
+        subpackages = [s.name for s in package.eSubpackages]
+        lines = [
+            f'from .{package.name} import getEClassifier, eClassifiers',
+            f'from .{package.name} import name, nsURI, nsPrefix, eClass',
+        ]
+        if classifiers:
+            lines.append(f'from .{package.name} import '
+                         f'{", ".join(classifiers)}')
+        lines.append(f'from . import {package.name}')
+        lines.extend(f'from . import {name}' for name in subpackages)
+        super_package = package.eSuperPackage
+        if super_package is not None:
+            lines.append(f'from .. import {super_package.name}')
+        lines.extend([
+            '',
+            f'__all__ = {classifiers!r}',
+            '',
+            f'eSubpackages = [{", ".join(subpackages)}]',
+            'eSuperPackage = '
+            f'{super_package.name if super_package is not None else None}',
+            '',
+        ])
+        if package is self.root:
+            wiring = []
+            for reference, attribute, value in self.references():
+                owner = self.qualified(reference.eContainingClass)
+                name = f'{owner}.{_python_name(reference.name)}'
+                if attribute == 'eType':
+                    wiring.append(f'{name}.eType = {self.qualified(value)}')
+                else:
+                    opposite = (f'{self.qualified(value.eContainingClass)}.'
+                                f'{_python_name(value.name)}')
+                    wiring.append(f'{name}.eOpposite = {opposite}')
+            if wiring:
+                lines.extend(['# EReferences between packages', *wiring, ''])
+        lines.extend([
+            'for subpack in eSubpackages:',
+            '    eClass.eSubpackages.append(subpack.eClass)',
+        ])
+        if package is self.root:
+            tables = self.feature_tables()
+            if tables:
+                lines.insert(0, 'from pyecore.ecore import Core')
+                lines.extend(['', '# precomputed feature tables', *tables])
+        return '\n'.join(lines) + '\n'
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pyecore.codegen',
+        description='Generates the static PyEcore code of an .ecore file.')
+    parser.add_argument('ecore', help='the .ecore file to generate')
+    parser.add_argument('-o', '--output', default='.',
+                        help='the output folder (default: current folder)')
+    options = parser.parse_args(args)
+
+    from .resources import ResourceSet
+    rset = ResourceSet()
+    # metamodels created with Eclipse refer to Ecore using its plugin URI
+    ecore = rset.create_resource(
+        'platform:/plugin/org.eclipse.emf.ecore/model/Ecore.ecore')
+    ecore.append(Ecore.eClass)
+    resource = rset.get_resource(options.ecore)
+    for epackage in resource.contents:
+        for path in generate(epackage, options.output):
+            print(path)
+
+
+if __name__ == '__main__':
+    main()
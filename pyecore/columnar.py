@@ -0,0 +1,455 @@
+"""This module provides a columnar storage for the instances of an ``EClass``.
+
+By default, each instance keeps the values of its features in its own
+``__dict__``. For classes with a very large number of small instances, a
+``ColumnStore`` keeps instead the values of the single-valued attributes in
+one column per attribute. The columns of the numeric and boolean attributes
+are compact ``array.array`` (which can be viewed as NumPy arrays without
+copy, if NumPy is installed), the other attributes use a ``list``.
+
+The instances are lightweight "flyweights", they only know their row in the
+store and still behave like any other ``EObject`` through the feature
+descriptors (type checks, notifications, ``eIsSet``, serialization...). The
+rows can also be added in bulk, the instances are then only created when
+they are first accessed:
+
+.. code-block:: python
+
+    from pyecore.columnar import ColumnStore
+
+    store = ColumnStore(Measure)
+    m = Measure(value=3.5)  # stored in the columns
+    rows = store.extend(value=values, timestamp=timestamps)
+    measure = store[rows[0]]  # the instance is created on demand
+    values = store.numpy('value')  # requires NumPy
+
+The rows of the instances created as usual belong to their instance: the
+store only keeps a weak reference to them and the row is reused once the
+instance is collected. The rows added in bulk belong to the store.
+
+The columnar storage is opt-in and should be enabled before the instances are
+created, ``detach()`` moves the values back to the instances.
+"""
+import weakref
+from array import array
+from .ecore import EEnum, Notification, Kind, extents, _immutable_defaults
+from .innerutils import InternalSet
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+_TYPECODES = {bool: 'b', int: 'q', float: 'd'}
+_FILLERS = {'b': 0, 'q': 0, 'd': 0.0}
+
+# states of a cell
+_UNSET = 0
+_SET = 1
+_SET_NONE = 2  # the array columns cannot hold None
+_DEFAULT = 3  # a mutable default value is kept, the feature is not set
+
+_MUTABLE = object()
+_FREE = object()  # a released row, waiting to be reused
+
+
+class _RowRef(weakref.ref):
+    """Weak reference to the instance owning a row."""
+    __slots__ = ('row',)
+
+    def __new__(cls, instance, callback, row):
+        ref = super().__new__(cls, instance, callback)
+        ref.row = row
+        return ref
+
+    def __init__(self, instance, callback, row):
+        super().__init__(instance, callback)
+
+
+class _Column(object):
+    """The values of a single-valued attribute, also used as the attribute
+    descriptor of the columnar class.
+    """
+    __slots__ = ('store', 'feature', 'name', 'typecode', 'values', 'states',
+                 'default')
+
+    def __init__(self, store, feature):
+        self.store = store
+        self.feature = feature
+        self.name = feature._name
+        etype = feature._eType
+        python_type = None if isinstance(etype, EEnum) else etype.eType
+        self.typecode = _TYPECODES.get(python_type)
+        if self.typecode:
+            self.values = array(self.typecode)
+        else:
+            self.values = []
+        self.states = bytearray()
+        default = feature.get_default_value()
+        if default is not None \
+                and default.__class__ not in _immutable_defaults:
+            default = _MUTABLE
+        self.default = default
+
+    def _grow(self, count):
+        filler = _FILLERS.get(self.typecode)
+        if self.typecode:
+            self.values.extend(array(self.typecode, (filler,)) * count)
+        else:
+            self.values.extend((None,) * count)
+        self.states.extend(bytes(count))
+
+    def _to_list(self):
+        # a value the array cannot hold (e.g. a very large integer)
+        self.values = self.values.tolist()
+        self.typecode = None
+
+    def _clear(self, row):
+        self.values[row] = _FILLERS.get(self.typecode)
+        self.states[row] = _UNSET
+
+    def _store(self, row, value, state=_SET):
+        if value is None and self.typecode:
+            self.states[row] = _SET_NONE
+            return
+        try:
+            self.values[row] = value
+        except (TypeError, OverflowError):
+            self._to_list()
+            self.values[row] = value
+        self.states[row] = state
+
+    def _read(self, row):
+        state = self.states[row]
+        if state == _SET or state == _DEFAULT:
+            value = self.values[row]
+            return bool(value) if self.typecode == 'b' else value
+        if state == _SET_NONE:
+            return None
+        return self._default(row)
+
+    def _default(self, row):
+        default = self.default
+        if default is not _MUTABLE:
+            return default
+        # mutable default values are kept, as for the other objects
+        value = self.feature.get_default_value()
+        if row is not None:
+            self._store(row, value, _DEFAULT)
+        return value
+
+    def is_set(self, instance):
+        row = instance._row
+        return row is not None and self.states[row] in (_SET, _SET_NONE)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.feature
+        row = instance._row
+        if row is None:
+            if self.default is _MUTABLE:
+                row = self.store._allocate(instance)
+            return self._default(row)
+        return self._read(row)
+
+    def __set__(self, instance, value):
+        feature = self.feature
+        feature._check(value)
+        row = instance._row
+        if row is None:
+            row = self.store._allocate(instance)
+        if not instance._observed():
+            self._store(row, value)
+            return
+        previous = self._read(row)
+        self._store(row, value)
+        instance.notify(Notification(old=previous, new=value, feature=feature,
+                                     kind=Kind.UNSET if value is None
+                                     else Kind.SET))
+
+    def __delete__(self, instance):
+        row = instance._row
+        if row is None:
+            return
+        if not instance._observed():
+            self._clear(row)
+            return
+        previous = self._read(row)
+        self._clear(row)
+        instance.notify(Notification(old=previous, feature=self.feature,
+                                     kind=Kind.UNSET))
+
+
+class _IsSet(object):
+    """The set features of an instance of a columnar class, the features
+    which are not in the columns are kept in the instance.
+    """
+    __slots__ = ('instance', 'columns')
+
+    def __init__(self, instance, columns):
+        self.instance = instance
+        self.columns = columns
+
+    def __contains__(self, feature):
+        column = self.columns.get(feature)
+        if column is not None:
+            return column.is_set(self.instance)
+        return feature in self.instance.__dict__.get('_isset', ())
+
+    def __iter__(self):
+        instance = self.instance
+        yield from list(instance.__dict__.get('_isset', ()))
+        row = instance._row
+        if row is None:
+            return
+        for feature, column in self.columns.items():
+            if column.states[row] in (_SET, _SET_NONE):
+                yield feature
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __setitem__(self, feature, value):
+        column = self.columns.get(feature)
+        if column is None:
+            instance_dict = self.instance.__dict__
+            try:
+                isset = instance_dict['_isset']
+            except KeyError:
+                isset = instance_dict['_isset'] = InternalSet()
+            isset[feature] = value
+        elif not column.is_set(self.instance):
+            column.__set__(self.instance, column.__get__(self.instance))
+
+    def add(self, feature, value=None):
+        self[feature] = value
+
+
+class _IsSetDescriptor(object):
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            raise AttributeError('_isset')
+        return _IsSet(instance, self.columns)
+
+    def __set__(self, instance, value):
+        raise AttributeError("can't set attribute")
+
+
+def _eIsSet(self, feature):
+    if isinstance(feature, str):
+        feature = self.eClass.findEStructuralFeature(feature)
+    elif isinstance(feature, int):
+        feature = self.eClass._reflection().by_id(feature)
+    return feature in self._isset
+
+
+_MISSING = object()
+
+
+class ColumnStore(object):
+    """Stores the single-valued attributes of the instances of ``eclass``
+    (and of its subclasses) in columns.
+
+    :param eclass: the ``EClass`` whose instances are stored in columns
+    """
+    def __init__(self, eclass):
+        python_class = eclass.python_class
+        if isinstance(python_class.__dict__.get('_column_store'),
+                      ColumnStore):
+            raise ValueError(f'{eclass.name} already uses a columnar storage')
+        if not python_class.__dictoffset__:
+            raise ValueError(f'{eclass.name} instances have no __dict__, '
+                             'their values are already kept in slots')
+        eclass.uncompile()
+        self.eclass = eclass
+        self.python_class = python_class
+        # the owner of each row: a _RowRef to the instance owning it, the
+        # instance of a row added in bulk (None until it is first accessed)
+        # or _FREE for a released row
+        self._instances = []
+        self._free = []
+        self.columns = {}
+        for feature in eclass._reflection().attributes:
+            if feature.many or feature.derived or feature._eType is None \
+                    or feature._slot is not None:
+                continue  # slotted features keep their slot
+            self.columns[feature] = _Column(self, feature)
+        self._by_name = {c.name: c for c in self.columns.values()}
+
+        installed = dict(self._by_name)
+        installed.update({
+            '_column_store': self,
+            '_row': None,
+            '_isset': _IsSetDescriptor(self.columns),
+            'eIsSet': _eIsSet,
+        })
+        self._originals = {name: python_class.__dict__.get(name, _MISSING)
+                           for name in installed}
+        existing = [x for x in extents.instances(python_class)
+                    if x.__dict__.keys() & self._by_name.keys()]
+        for name, value in installed.items():
+            setattr(python_class, name, value)
+        for instance in existing:
+            self._import(instance)
+
+    def _import(self, instance):
+        instance_dict = instance.__dict__
+        isset = instance_dict.get('_isset', {})
+        for name, column in self._by_name.items():
+            if name not in instance_dict:
+                continue
+            value = instance_dict.pop(name)
+            row = instance._row
+            if row is None:
+                row = self._allocate(instance)
+            feature = column.feature
+            column._store(row, value,
+                          _SET if feature in isset else _DEFAULT)
+            isset.pop(feature, None)
+
+    def _allocate(self, instance):
+        if self._free:
+            row = self._free.pop()
+            self._instances[row] = _RowRef(instance, self._release, row)
+        else:
+            row = len(self._instances)
+            self._instances.append(_RowRef(instance, self._release, row))
+            for column in self.columns.values():
+                column._grow(1)
+        instance._row = row
+        return row
+
+    def _release(self, ref):
+        # called when the instance owning a row is collected
+        row = ref.row
+        instances = self._instances
+        if row >= len(instances) or instances[row] is not ref:
+            return  # the store has been detached
+        for column in self.columns.values():
+            column._clear(row)
+        instances[row] = _FREE
+        self._free.append(row)
+
+    def __len__(self):
+        return len(self._instances) - len(self._free)
+
+    def __getitem__(self, row):
+        """Gives the instance of a row, it is created on its first access."""
+        instance = self._instances[row]
+        if instance.__class__ is _RowRef:
+            instance = instance()
+            if instance is None:
+                raise IndexError(f'row {row} has been released')
+        elif instance is None:
+            python_class = self.python_class
+            instance = python_class.__new__(python_class)
+            instance._row = row
+            self._instances[row] = instance
+        elif instance is _FREE:
+            raise IndexError(f'row {row} has been released')
+        return instance
+
+    def __iter__(self):
+        for row, owner in enumerate(self._instances):
+            if owner is _FREE:
+                continue
+            if owner.__class__ is _RowRef:
+                owner = owner()
+                if owner is None:
+                    continue
+                yield owner
+            else:
+                yield self[row]
+
+    def _column(self, name):
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise AttributeError(f'{self.eclass.name} has no columnar '
+                                 f'feature named {name}')
+
+    def extend(self, **columns):
+        """Adds rows in bulk without creating their instances.
+
+        Each keyword argument gives the values of an attribute, one value per
+        new row, the other attributes are left unset.
+
+        :return: the ``range`` of the new rows
+        """
+        values = {self._column(name): list(v) for name, v in columns.items()}
+        counts = {len(v) for v in values.values()}
+        if len(counts) > 1:
+            raise ValueError('All the columns must have the same length')
+        count = counts.pop() if counts else 0
+        start = len(self._instances)
+        for column, column_values in values.items():
+            check = column.feature._check
+            for value in column_values:
+                check(value)
+        for column in self.columns.values():
+            column._grow(count)
+        for column, column_values in values.items():
+            for row, value in enumerate(column_values, start):
+                column._store(row, value)
+        self._instances.extend((None,) * count)
+        return range(start, start + count)
+
+    def column(self, name):
+        """Gives the raw column of an attribute: an ``array.array`` for the
+        numeric and boolean attributes, a ``list`` otherwise. The unset cells
+        hold ``0`` (or ``None``) instead of the default value.
+        """
+        return self._column(name).values
+
+    def numpy(self, name):
+        """Gives a NumPy view, without copy, of the column of a numeric or
+        boolean attribute. The view must be released before rows are added.
+        """
+        if numpy is None:
+            raise ImportError('NumPy is required for the NumPy views')
+        column = self._column(name)
+        if not column.typecode:
+            raise TypeError(f'The {name} column is not a numeric column')
+        return numpy.frombuffer(column.values, dtype=column.typecode)
+
+    def detach(self):
+        """Moves the values back in the instances and restores the default
+        storage of the class. All the rows get their instance.
+        """
+        columns = self._by_name
+        for instance in list(self):
+            row = instance._row
+            instance_dict = instance.__dict__
+            isset = None
+            for name, column in columns.items():
+                state = column.states[row]
+                if state == _UNSET:
+                    continue
+                instance_dict[name] = column._read(row)
+                if state != _DEFAULT:
+                    if isset is None:
+                        isset = instance_dict.setdefault('_isset',
+                                                         InternalSet())
+                    isset[column.feature] = None
+            del instance_dict['_row']
+        python_class = self.python_class
+        for name, original in self._originals.items():
+            current = python_class.__dict__.get(name, _MISSING)
+            if current is _MISSING and name in columns:
+                continue  # the feature has been removed from the EClass
+            if original is _MISSING:
+                delattr(python_class, name)
+            else:
+                setattr(python_class, name, original)
+        self._instances = []
+        self._free = []
+
+
+def columnar_store(eclass):
+    """Gives the ``ColumnStore`` used by ``eclass``, if any."""
+    store = getattr(eclass.python_class, '_column_store', None)
+    return store if isinstance(store, ColumnStore) else None
@@ -118,6 +118,8 @@ class Add(AbstractCommand):
     def can_execute(self):
         executable = super().can_execute
         executable = executable and self.value is not None
+        if self.index is not None and not self.feature.ordered:
+            executable = False  # unordered collections have no positions
         self._collection = self.owner.eGet(self.feature)
         return executable
 
@@ -127,10 +129,16 @@ class Add(AbstractCommand):
         return can and self.value in self._collection
 
     def undo(self):
-        self._collection.pop(self.index)
+        if self.feature.ordered:
+            self._collection.pop(self.index)
+        else:
+            self._collection.remove(self.value)
 
     def redo(self):
-        self._collection.insert(self.index, self.value)
+        if self.feature.ordered:
+            self._collection.insert(self.index, self.value)
+        else:
+            self._collection.append(self.value)
 
     def do_execute(self):
         if self.index is not None:
@@ -155,17 +163,25 @@ class Remove(AbstractCommand):
         self._collection = self.owner.eGet(self.feature)
         if self.index is None:
             executable = executable and self.value is not None
+        elif not self.feature.ordered:
+            executable = False  # unordered collections have no positions
         else:
             self.value = self._collection[self.index]
         return executable
 
     def undo(self):
-        self._collection.insert(self.index, self.value)
+        if self.feature.ordered:
+            self._collection.insert(self.index, self.value)
+        else:
+            self._collection.append(self.value)
 
     def redo(self):
-        self._collection.pop(self.index)
+        self.do_execute()
 
     def do_execute(self):
+        if not self.feature.ordered:
+            self._collection.remove(self.value)
+            return
         if self.index is None:
             self.index = self._collection.index(self.value)
         self._collection.pop(self.index)
@@ -184,6 +200,8 @@ class Move(AbstractCommand):
     @property
     def can_execute(self):
         can = super().can_execute
+        if not can or not self.feature.ordered:
+            return False
         self._collection = self.owner.eGet(self.feature)
         if self.value is None:
             self.value = self._collection[self.from_index]
@@ -221,13 +239,13 @@ class Delete(AbstractCommand):
         elements.update(self.owner.eAllContents())
         for element in elements:
             rels_tuple = [(ref, element.eGet(ref))
-                          for ref in element.eClass.eAllReferences()]
+                          for ref in element.eClass._reflection().references]
             self.references[element] = rels_tuple
         self.inverse_references = {}
         for element in elements:
             rels_tuple = []
             for obj, reference in element._inverse_rels:
-                if reference.many:
+                if reference.many and reference.ordered:
                     index = obj.eGet(reference).index(element)
                 else:
                     index = 0
@@ -244,8 +262,10 @@ class Delete(AbstractCommand):
                     element.eSet(reference, content)
         for element, v in self.inverse_references.items():
             for i, obj, reference in v:
-                if reference.many:
+                if reference.many and reference.ordered:
                     obj.eGet(reference).insert(i, element)
+                elif reference.many:
+                    obj.eGet(reference).append(element)
                 else:
                     obj.eSet(reference, element)
 
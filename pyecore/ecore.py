@@ -23,10 +23,12 @@ from datetime import datetime
 from itertools import chain
 from typing import Iterable
 from ordered_set import OrderedSet
-from weakref import WeakSet
+from weakref import WeakSet, WeakKeyDictionary
+from contextlib import contextmanager
 from RestrictedPython import compile_restricted, safe_builtins
-from .notification import ENotifer, Kind
+from .notification import ENotifer, Kind, Notification, _content_state
 from .innerutils import InternalSet, ignored, javaTransMap, parse_date
+from .innerutils import LazyAttribute, LazySlot
 
 
 name = 'ecore'
@@ -73,11 +75,12 @@ class Core(object):
     def _promote(rcls, abstract=False):
         rcls.eClass = EClass(rcls.__name__, metainstance=rcls)
         rcls.eClass.abstract = abstract
-        rcls._staticEClass = True
+        if not issubclass(rcls, CompactEObject):
+            rcls._staticEClass = True
         # init super types
         eSuperTypes_add = rcls.eClass.eSuperTypes.append
         for _cls in rcls.__bases__:
-            if _cls is EObject:
+            if _cls in (EObject, _DynamicEObject, CompactEObject):
                 continue
             with ignored(Exception):
                 eSuperTypes_add(_cls.eClass)
@@ -110,6 +113,31 @@ class Core(object):
                         parameter.required = True
                     operation.eParameters.append(parameter)
                 rcls.eClass.eOperations.append(operation)
+        # the features whose values are stored in a slot declared by the
+        # class, the slot of the ``name`` feature is named ``_slot_name``
+        slots = rcls.__dict__.get('__slots__', ())
+        for k, feature in list(rcls.__dict__.items()):
+            if isinstance(feature, EStructuralFeature) \
+                    and f'_slot_{k}' in slots:
+                feature._slot = rcls.__dict__[f'_slot_{k}']
+                setattr(rcls, k, _SlotAccessor(feature, feature._slot))
+
+    @staticmethod
+    def register_feature_table(rcls, features, feature_ids):
+        """Installs the precomputed feature tables of the static class
+        ``rcls``, they are used until the class or one of its super types
+        changes.
+
+        :param features: the attribute names of all the features of the
+                         class, in the ``eAllStructuralFeatures()`` order
+        :param feature_ids: the attribute names of all the features of the
+                            class, in the feature IDs order
+        """
+        eclass = rcls.eClass
+        table = (tuple(getattr(rcls, name) for name in features),
+                 tuple(getattr(rcls, name) for name in feature_ids))
+        eclass.__dict__['_reflection_cache'] = \
+            _EClassReflection(eclass, EClass._reflection_epoch, table)
 
     @classmethod
     def register_classifier(cls, rcls, abstract=False, promote=False):
@@ -169,10 +197,17 @@ class Metasubinstance(type):
 
 # Meta methods for static EClass
 class MetaEClass(Metasubinstance):
+    def __new__(mcs, name, bases, nmspc):
+        # as the dynamic ones, the static classes get an instance __dict__
+        # unless they inherit from CompactEObject
+        bases = tuple(_DynamicEObject if x is EObject else x for x in bases)
+        return super().__new__(mcs, name, bases, nmspc)
+
     def __init__(cls, name, bases, nmspc):
         super().__init__(name, bases, nmspc)
         Core.register_classifier(cls, promote=True)
-        cls._staticEClass = True
+        if not issubclass(cls, CompactEObject):
+            cls._staticEClass = True
 
     def __call__(cls, *args, **kwargs):
         if cls.eClass.abstract:
@@ -185,23 +220,93 @@ class MetaEClass(Metasubinstance):
         return cls.eClass.eResource
 
 
+class ExtentRegistry(object):
+    """Keeps track of the live instances of each concrete Python class.
+
+    The registry is used by ``allInstances()``: the instances of a class and
+    of its subclasses are found without scanning all the existing objects.
+    The registry can be disabled (``extents.enabled = False`` or using the
+    ``extents.disabled()`` context manager) for bulk workloads, the objects
+    created while the registry is disabled are never tracked. The registry
+    does not keep the classes alive, the extents left empty are dropped.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._extents = WeakKeyDictionary()
+
+    def add(self, instance, cls=None):
+        cls = cls or instance.__class__
+        try:
+            self._extents[cls].add(instance)
+        except KeyError:
+            self._extents[cls] = WeakSet((instance,))
+
+    def instances(self, cls):
+        """Yields the tracked instances of ``cls`` and of its subclasses."""
+        extents = self._extents
+        seen = set()
+        todo = [cls]
+        while todo:
+            current = todo.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            extent = extents.get(current)
+            if extent:
+                yield from list(extent)
+            elif extent is not None:
+                del extents[current]
+            todo.extend(type.__subclasses__(current))
+
+    def clear(self):
+        self._extents.clear()
+
+    @contextmanager
+    def disabled(self):
+        enabled = self.enabled
+        self.enabled = False
+        try:
+            yield self
+        finally:
+            self.enabled = enabled
+
+
+extents = ExtentRegistry()
+
+
+def _all_instances(cls, resources=None):
+    if not extents.enabled:
+        if not resources:
+            raise RuntimeError('The extent registry is disabled, the '
+                               'instances can only be searched in resources')
+        eclass = cls.eClass if isinstance(cls, type) else cls
+        for resource in resources:
+            yield from traverse(resource, of_type=eclass)
+    elif resources:
+        yield from (x for x in extents.instances(cls)
+                    if x.eResource in resources)
+    else:
+        yield from extents.instances(cls)
+
+
 class EObject(ENotifer, metaclass=Metasubinstance):
+    __slots__ = ()
     _staticEClass = True
-    _instances = WeakSet()
+    # most of the objects are never observed, set nor referenced, this
+    # bookkeeping is only created when it is first needed
+    _internal_id = None
+    _container = None
+    _containment_feature = None
+    _eresource = None
+    _isset = LazyAttribute(InternalSet)
+    _inverse_rels = LazyAttribute(set)
 
     def __new__(cls, *args, **kwargs):
         instance = super().__new__(cls)
-        instance._internal_id = None
-        instance._isset = InternalSet()
-        instance._container = None
-        instance._containment_feature = None
-        instance._eresource = None
-        instance.listeners = []
-        instance._eternal_listener = []
-        instance._inverse_rels = set()
         instance._staticEClass = False
         instance.dyn_inst = instance
-        cls._instances.add(instance)
+        if extents.enabled:
+            extents.add(instance, cls)
         return instance
 
     def __init__(self, **kwargs):
@@ -212,11 +317,7 @@ class EObject(ENotifer, metaclass=Metasubinstance):
 
     @classmethod
     def allInstances(cls, resources=None):
-        if resources:
-            yield from (x for x in cls._instances
-                        if isinstance(x, cls) and x.eResource in resources)
-        else:
-            yield from (x for x in cls._instances if isinstance(x, cls))
+        return _all_instances(cls, resources)
 
     def eContainer(self):
         return self._container
@@ -227,38 +328,92 @@ class EObject(ENotifer, metaclass=Metasubinstance):
     def eIsSet(self, feature):
         if isinstance(feature, str):
             feature = self.eClass.findEStructuralFeature(feature)
-        return feature in self._isset
+        elif isinstance(feature, int):
+            feature = self.eClass._reflection().by_id(feature)
+        try:
+            isset = self.__dict__.get('_isset', ())
+        except AttributeError:  # compact objects, see CompactEObject
+            isset = getattr(self, '_isset_slot', ())
+        return feature in isset
 
     @property
     def eResource(self):
-        try:
-            return self._container.dyn_inst.eResource
-        except AttributeError:
-            return self._eresource
+        return self._eresource
+
+    def _update_eresource(self, resource):
+        """Sets the owning resource of this object and of its content.
+
+        The owning resource is cached on each object, it must be updated each
+        time the object enters or leaves a resource.
+        """
+        if self._eresource is resource:
+            return
+        if _content_state.count:
+            # the adapters of a resource are inherited by its content
+            _content_state.epoch += 1
+        todo = [self]
+        pop = todo.pop
+        append = todo.append
+        while todo:
+            obj = pop()
+            obj._eresource = resource
+            for child in obj.eContents:
+                # unresolved proxies keep their own resource
+                if getattr(child, 'resolved', True) \
+                        and child._eresource is not resource:
+                    append(child)
+
+    def _renamed_feature(self, name):
+        """Gives the feature named ``name`` if it is not reachable as an
+        attribute of the same name (e.g. a feature named after a Python
+        keyword in a generated class), ``None`` otherwise.
+        """
+        if hasattr(self.__class__, name):
+            return None
+        return self.eClass.findEStructuralFeature(name)
 
     def eGet(self, feature):
         if isinstance(feature, str):
-            return self.__getattribute__(feature)
+            name = feature
         elif isinstance(feature, EStructuralFeature):
-            return self.__getattribute__(feature.name)
-        raise TypeError('Feature must have str or EStructuralFeature type')
+            name = feature.name
+        elif isinstance(feature, int):
+            name = self.eClass._reflection().by_id(feature)._name
+        else:
+            raise TypeError('Feature must have str, int or '
+                            'EStructuralFeature type')
+        try:
+            return self.__getattribute__(name)
+        except AttributeError:
+            feature = self._renamed_feature(name)
+            if feature is None:
+                raise
+            return feature.__get__(self)
 
     def eSet(self, feature, value):
         if isinstance(feature, str):
-            self.__setattr__(feature, value)
+            name = feature
         elif isinstance(feature, EStructuralFeature):
-            self.__setattr__(feature.name, value)
+            name = feature.name
+        elif isinstance(feature, int):
+            name = self.eClass._reflection().by_id(feature)._name
         else:
-            raise TypeError('Feature must have str or '
+            raise TypeError('Feature must have str, int or '
                             'EStructuralFeature type')
+        feature = self._renamed_feature(name)
+        if feature is not None:
+            feature.__set__(self, value)
+        else:
+            self.__setattr__(name, value)
 
     def delete(self, recursive=True):
         if recursive:
-            for obj in self.eAllContents():
-                obj.delete()
+            for obj in self.eAllContents(order=Order.POST_ORDER):
+                obj.delete(recursive=False)
         seek = set(self._inverse_rels)
         # we also clean all the object references
-        seek.update((self, ref) for ref in self.eClass.eAllReferences())
+        seek.update((self, ref)
+                    for ref in self.eClass._reflection().references)
         for owner, feature in seek:
             fvalue = owner.eGet(feature)
             if feature.many:
@@ -284,68 +439,169 @@ class EObject(ENotifer, metaclass=Metasubinstance):
 
     @property
     def eContents(self):
+        return self._eContents_from(self.eClass._reflection().containments)
+
+    def _eContents_from(self, features):
         children = []
-        for feature in self.eClass.eAllReferences():
-            if not feature.containment or feature.derived:
-                continue
+        try:
+            instance_dict = self.__dict__
+        except AttributeError:  # compact objects, see CompactEObject
+            instance_dict = {}
+        for feature in features:
+            try:
+                value = instance_dict[feature._name]
+            except KeyError:
+                if feature._slot is None:
+                    continue  # never set, the feature is not materialized
+                try:
+                    value = feature._stored(self)
+                except KeyError:
+                    continue
             if feature.many:
-                values = self.__getattribute__(feature.name)
-            else:
-                values = [self.__getattribute__(feature.name)]
-            children.extend((x for x in values if x))
+                children.extend([x for x in value if x is not None])
+            elif value is not None:
+                children.append(value)
         return children
 
-    def eAllContents(self):
-        contents = self.eContents
-        yield from contents
-        for x in contents:
-            yield from x.eAllContents()
+    def eAllContents(self, order=None, include_self=False, max_depth=None,
+                     prune=None, of_type=None):
+        """Iterates over all the objects contained by this object.
+
+        The traversal is not recursive and supports the same options as
+        :py:func:`pyecore.traversal.traverse` (depth-first pre-order by
+        default).
+        """
+        return traverse(self, order or Order.PRE_ORDER, include_self,
+                        max_depth, prune, of_type)
 
     def eURIFragment(self):
-        if not self.eContainer():
-            if not self.eResource or len(self.eResource.contents) == 1:
-                return '/'
-            else:
-                return f'/{self.eResource.contents.index(self)}'
+        # The fragment is built iteratively from the segments of each
+        # container, an overridden eURIFragment() on a container is honored
+        segments = []
+        obj = self
+        while True:
+            parent = obj.eContainer()
+            if parent is None:
+                prefix = obj._eURIFragment_root()
+                break
+            segments.append(obj._eURIFragment_segment(parent))
+            parent_fragment = getattr(type(parent), 'eURIFragment', None)
+            if parent_fragment is not _eURIFragment:
+                prefix = parent.eURIFragment()
+                break
+            obj = parent
+        segments.reverse()
+        return prefix + ''.join(segments)
+
+    def _eURIFragment_root(self):
+        resource = self.eResource
+        if not resource or len(resource.contents) == 1:
+            return '/'
+        return f'/{resource.contents.index(self)}'
+
+    def _eURIFragment_segment(self, parent):
         feat = self.eContainmentFeature()
-        parent = self.eContainer()
         name = feat.name
         if feat.many:
-            index = parent.__getattribute__(name).index(self)
-            return f'{parent.eURIFragment()}/@{name}.{index}'
-        else:
-            return f'{parent.eURIFragment()}/@{name}'
+            index = parent.__getattribute__(name)._position(self)
+            return f'/@{name}.{index}'
+        return f'/@{name}'
 
     def eRoot(self):
-        if not self.eContainer():
-            return self
-        if not isinstance(self.eContainer(), EObject):
-            return self.eContainer()
-        return self.eContainer().eRoot()
+        obj = self
+        container = obj._container
+        while container is not None:
+            if not isinstance(container, EObject):
+                return container
+            obj = container
+            container = obj._container
+        return obj
 
     def __dir__(self):
         eclass = self.eClass
-        relevant = [x.name for x in eclass.eAllStructuralFeatures()]
+        relevant = [x.name for x in eclass._reflection().features]
         relevant.extend([x.name for x in eclass.eAllOperations()
                          if not x.name.startswith('_')])
         return relevant
 
 
+_eURIFragment = EObject.eURIFragment
+
+
+class _DynamicEObject(EObject):
+    """Base of the Python classes of the dynamic EClasses, it gives them an
+    instance ``__dict__`` (``EObject`` has none so the compact classes can
+    do without).
+    """
+
+
+class _DynInst(object):
+    """``dyn_inst`` of the compact classes, the instance itself for the
+    instances and the ``EClass`` for the class.
+    """
+    def __get__(self, instance, owner=None):
+        return owner.eClass if instance is None else instance
+
+
+class _StaticEClass(object):
+    """``_staticEClass`` of the compact classes, ``True`` for the class and
+    ``False`` for the instances.
+    """
+    def __get__(self, instance, owner=None):
+        return instance is None
+
+
+class CompactEObject(EObject):
+    """Base of the static classes whose instances have no ``__dict__``.
+
+    The bookkeeping of the instances is kept in slots and the classes
+    inheriting from it declare the slots of their features (the value of the
+    ``name`` feature is kept in the ``_slot_name`` slot). Their instances
+    take about half the memory of the regular ones, but no other attribute
+    can be set on them. The classes generated by ``pyecore.codegen`` inherit
+    from it when possible.
+    """
+    __slots__ = ('__weakref__', '_listeners', '_eternal_listener',
+                 '_subscriptions', '_content_adapters', '_adapters_cache',
+                 '_dead_listeners', '_internal_id', '_container',
+                 '_containment_feature', '_eresource', '_isset_slot',
+                 '_inverse_rels_slot')
+    dyn_inst = _DynInst()
+    _staticEClass = _StaticEClass()
+
+    def __new__(cls, *args, **kwargs):
+        instance = object.__new__(cls)
+        instance._listeners = ()
+        instance._eternal_listener = ()
+        instance._subscriptions = None
+        instance._content_adapters = ()
+        instance._adapters_cache = None
+        instance._dead_listeners = False
+        instance._internal_id = None
+        instance._container = None
+        instance._containment_feature = None
+        instance._eresource = None
+        if extents.enabled:
+            extents.add(instance, cls)
+        return instance
+
+
+CompactEObject._isset = LazySlot(CompactEObject._isset_slot, InternalSet)
+CompactEObject._inverse_rels = LazySlot(CompactEObject._inverse_rels_slot,
+                                        set)
+
+
 class EModelElement(EObject):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def eURIFragment(self):
-        if not self.eContainer():
-            if not self.eResource or len(self.eResource.contents) == 1:
-                return '#/'
-            else:
-                return f'#/{self.eResource.contents.index(self)}'
-        parent = self.eContainer()
+    def _eURIFragment_root(self):
+        return '#' + super()._eURIFragment_root()
+
+    def _eURIFragment_segment(self, parent):
         if hasattr(self, 'name'):
-            return f'{parent.eURIFragment()}/{self.name}'
-        else:
-            return super().eURIFragment()
+            return f'/{self.name}'
+        return super()._eURIFragment_segment(parent)
 
     def getEAnnotation(self, source):
         """Return the annotation with a matching source attribute."""
@@ -402,7 +658,7 @@ class ETypedElement(ENamedElement):
         if eGenericType:
             self.eGenericType = eGenericType
         self._many_cache = self._compute_many()
-        self._eternal_listener.append(self)
+        self._eternal_listener = [self]
 
     def _compute_many(self):
         upper = self.upperBound
@@ -465,9 +721,15 @@ class EParameter(ETypedElement):
 class ETypeParameter(ENamedElement):
     def __init__(self, name=None, eBounds=None, **kwargs):
         super().__init__(name, **kwargs)
+        self._eternal_listener = [self]
         if eBounds:
             self.eBounds.extend(eBounds)
 
+    def notifyChanged(self, notif):
+        if notif.feature is ETypeParameter.eBounds:
+            # the type checks of the features using this parameter change
+            EClass._reflection_epoch += 1
+
     def raw_types(self):
         raw_types = tuple(x.eRawType for x in self.eBounds)
         if not raw_types:
@@ -485,20 +747,27 @@ class ETypeParameter(ENamedElement):
 
 
 class EGenericType(EObject):
-    def __init__(self, eTypeParameter=None, eClassifier=None, **kwargs):
+    def __init__(self, eTypeParameter=None, eClassifier=None,
+                 eTypeArguments=None, **kwargs):
         super().__init__(**kwargs)
         self.eTypeParameter = eTypeParameter
         self.eClassifier = eClassifier
-        self._eternal_listener.append(self)
+        if eTypeArguments:
+            self.eTypeArguments.extend(eTypeArguments)
+        self._eternal_listener = [self]
 
     @property
     def eRawType(self):
         return self.eClassifier or self.eTypeParameter
 
     def notifyChanged(self, notif):
-        if (self.eContainmentFeature() is EClass.eGenericSuperTypes and
-            notif.feature is EGenericType.eClassifier):
-            self.eContainer()._update_supertypes()
+        if (notif.feature is EGenericType.eClassifier
+                or notif.feature is EGenericType.eTypeParameter):
+            EClass._reflection_epoch += 1
+            if self.eContainmentFeature() is EClass.eGenericSuperTypes:
+                self.eContainer()._structure_changed()
+                if notif.feature is EGenericType.eClassifier:
+                    self.eContainer()._update_supertypes()
 
 
 # class SpecialEClassifier(Metasubinstance):
@@ -581,7 +850,7 @@ class EDataType(EClassifier):
 class EEnum(EDataType):
     def __init__(self, name=None, default_value=None, literals=None, **kwargs):
         super().__init__(name, eType=self, **kwargs)
-        self._eternal_listener.append(self)
+        self._eternal_listener = [self]
         if literals:
             for i, lit_name in enumerate(literals):
                 lit_name = '_' + lit_name if lit_name[:1].isnumeric() \
@@ -652,7 +921,88 @@ class EEnumLiteral(ENamedElement):
         return self.name
 
 
+_immutable_defaults = frozenset({int, float, complex, bool, str, bytes, tuple,
+                                 frozenset, Decimal, datetime, EEnumLiteral})
+
+
+class TypeChecks(object):
+    """Global switch of the type checks performed when a feature is set.
+
+    The checks can be disabled (``type_checks.enabled = False`` or using the
+    ``type_checks.disabled()`` context manager) for bulk loads from sources
+    that are known to be valid, the values are then stored without being
+    checked.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+
+    @contextmanager
+    def disabled(self):
+        enabled = self.enabled
+        self.enabled = False
+        try:
+            yield self
+        finally:
+            self.enabled = enabled
+
+
+type_checks = TypeChecks()
+
+
+def _build_checker(feature):
+    """Builds the type checker of ``feature``.
+
+    The checker remembers the classes of the values that passed the full
+    check (``EcoreUtils.isinstance``) when the type is an ``EClass`` (or a
+    type parameter bounded by ``EClass``), these classes are then accepted
+    at once. The memo is dropped when the metamodels change (see
+    ``EClass._reflection_epoch``).
+    """
+    state = [None, None, False]  # epoch, type, memoizable
+    accepted = set()
+
+    def refresh():
+        etype = feature._eType
+        if not etype:
+            try:
+                etype = feature.eGenericType.eRawType
+            except Exception:
+                raise AttributeError(f'Feature {feature} has no type'
+                                     'nor generic')
+        if isinstance(etype, ETypeParameter):
+            bounds = etype.raw_types()
+            bounds = bounds if isinstance(bounds, tuple) else (bounds,)
+        else:
+            bounds = (etype,)
+        memoizable = all(x is object or x.__class__ is EClass
+                         for x in bounds)
+        state[:] = EClass._reflection_epoch, etype, memoizable
+        accepted.clear()
+
+    def check(value):
+        if value is None or (value.__class__ in accepted
+                             and state[0] == EClass._reflection_epoch):
+            return
+        if not type_checks.enabled:
+            return
+        if state[0] != EClass._reflection_epoch:
+            refresh()
+        _, etype, memoizable = state
+        if not EcoreUtils.isinstance(value, etype):
+            raise BadValueError(value, etype, feature)
+        if memoizable and not isinstance(value, EProxy):
+            accepted.add(value.__class__)
+
+    refresh()
+    return check
+
+
 class EStructuralFeature(ETypedElement):
+    # the member descriptor of the slot storing the values of this feature
+    # when its static class declares one (see ``Core._promote``), the values
+    # are stored in the instances ``__dict__`` otherwise
+    _slot = None
+
     def __init__(self, name=None, eType=None, changeable=True, volatile=False,
                  transient=False, unsettable=False, derived=False,
                  derived_class=None, **kwargs):
@@ -668,53 +1018,152 @@ class EStructuralFeature(ETypedElement):
 
     def notifyChanged(self, notif):
         super().notifyChanged(notif)
-        if notif.feature is ENamedElement.name:
+        feature = notif.feature
+        if feature is ENamedElement.name:
             self._name = notif.new
-        if notif.feature is ETypedElement.eType:
+        if feature is ETypedElement.eType:
             self._eType = notif.new
+        if feature is ETypedElement.eType \
+                or feature is ETypedElement.eGenericType:
+            self.__dict__.pop('_check', None)
+        if self._container is not None and (
+                feature is ENamedElement.name
+                or feature is ETypedElement.eType
+                or feature is EStructuralFeature.derived
+                or feature is EReference.containment):
+            EClass._reflection_epoch += 1
+            if isinstance(self._container, EClass):
+                self._container._structure_changed()
+        if EClass._compiled_classes and isinstance(self._container, EClass):
+            self._container._invalidate_compiled()
+
+    def _check(self, value):
+        """Checks the type of ``value``, raises ``BadValueError`` if the
+        value cannot be set. The checker is built on the first call.
+        """
+        check = self.__dict__['_check'] = _build_checker(self)
+        check(value)
+
+    def _stored(self, instance):
+        """Gives the value stored for ``instance``, raises ``KeyError`` if
+        no value is stored.
+        """
+        slot = self._slot
+        if slot is None:
+            return instance.__dict__[self._name]
+        try:
+            return slot.__get__(instance)
+        except AttributeError:
+            raise KeyError(self._name) from None
+
+    def _store(self, instance, value):
+        slot = self._slot
+        if slot is None:
+            instance.__dict__[self._name] = value
+        else:
+            slot.__set__(instance, value)
 
     def __get__(self, instance, owner=None):
         if instance is None:
             return self
-        name = self._name
-        instance_dict = instance.__dict__
-        if name in instance_dict:
-            value = instance_dict[name]
+        try:
+            return instance.__dict__[self._name]
+        except (KeyError, AttributeError):
+            pass
+        if self._slot is not None:
             try:
-                return value._get()
+                return self._slot.__get__(instance)
             except AttributeError:
-                return value
+                pass
+        return self._missing(instance)
+
+    def _missing(self, instance):
+        """Gives the value of ``instance`` when nothing is stored yet."""
         if self.many:
-            new_value = self.derived_class.create(instance, self)
+            value = self.derived_class.create(instance, self)
         else:
-            new_value = EValue(instance, self)
-        instance_dict[name] = new_value
-        return new_value._get()
+            value = self.get_default_value()
+            # immutable default values are not stored
+            if value is None or value.__class__ in _immutable_defaults:
+                return value
+        self._store(instance, value)
+        return value
 
     def __set__(self, instance, value):
-        name = self._name
-        instance_dict = instance.__dict__
-        if name not in instance_dict:
-            if self.many:
-                new_value = self.derived_class.create(instance, self)
+        if not self.many:
+            self._set_value(instance, value)
+            return
+        try:
+            collection = self._stored(instance)
+        except KeyError:
+            collection = self.derived_class.create(instance, self)
+            self._store(instance, collection)
+        if value is collection:
+            return
+        # if value is not previous_value and isinstance(value, ECollection):
+        #     raise AttributeError('Cannot reafect an ECollection with '
+        #                          'another one, even if compatible')
+        if not isinstance(value, str) and isinstance(value, Iterable):
+            collection._assign(value)
+            return
+        raise BadValueError(got=value, expected=collection.__class__)
+
+    def _set_value(self, instance, value, update_opposite=True):
+        """Sets the value of this single-valued feature for ``instance``.
+
+        The value is directly stored in the instance ``__dict__`` (or in its
+        slot), this method performs the type check, the notification and the
+        container/opposite updates.
+        """
+        self._check(value)
+        try:
+            previous_value = self._stored(instance)
+        except KeyError:
+            previous_value = self.get_default_value()
+        self._store(instance, value)
+        if instance._observed():
+            instance.notify(Notification(old=previous_value,
+                                         new=value,
+                                         feature=self,
+                                         kind=Kind.UNSET if value is None
+                                         else Kind.SET))
+        instance._isset[self] = None
+
+        if not self.is_reference:
+            return
+        if self.containment:
+            _update_containment(instance, self, value, previous_value)
+        if not update_opposite:
+            return
+
+        # if there is no opposite, we set inverse relation and return
+        eOpposite = self.eOpposite
+        if not eOpposite:
+            couple = (instance, self)
+            if hasattr(value, '_inverse_rels'):
+                if hasattr(previous_value, '_inverse_rels'):
+                    previous_value._inverse_rels.remove(couple)
+                value._inverse_rels.add(couple)
+            elif value is None and hasattr(previous_value, '_inverse_rels'):
+                previous_value._inverse_rels.remove(couple)
+            return
+
+        # if we are in an 'unset' context
+        opposite_name = eOpposite._name
+        if value is None:
+            if previous_value is None:
+                return
+            if eOpposite.many:
+                object.__getattribute__(previous_value, opposite_name) \
+                      .remove(instance, update_opposite=False)
             else:
-                new_value = EValue(instance, self)
-            instance_dict[name] = new_value
-            previous_value = new_value
+                object.__setattr__(previous_value, opposite_name, None)
+        elif eOpposite.many:
+            value.__getattribute__(opposite_name) \
+                 .append(instance, update_opposite=False)
         else:
-            previous_value = instance_dict[name]
-        if isinstance(previous_value, ECollection):
-            if value is previous_value:
-                return
-            # if value is not previous_value and isinstance(value, ECollection):
-            #     raise AttributeError('Cannot reafect an ECollection with '
-            #                          'another one, even if compatible')
-            if not isinstance(value, str) and isinstance(value, Iterable):
-                previous_value.clear()
-                previous_value.extend(value)
-                return
-            raise BadValueError(got=value, expected=previous_value.__class__)
-        instance_dict[name]._set(value)
+            # We disable the eOpposite update
+            eOpposite._set_value(value, instance, update_opposite=False)
 
     def __delete__(self, instance):
         name = self._name
@@ -800,7 +1249,250 @@ class EReference(EStructuralFeature):
         return False
 
 
+class _EClassReflection(object):
+    """Snapshot of the structural information an EClass inherits.
+
+    The snapshot is computed once from the direct super types snapshots and
+    is considered valid as long as ``epoch`` equals
+    ``EClass._reflection_epoch``. The features and their IDs can be given by
+    the precomputed ``table`` of a generated class (see
+    ``Core.register_feature_table``), such a snapshot also records the
+    structural changes count of the class and its super types and outlives
+    the changes of the other classes.
+    """
+    def __init__(self, eclass, epoch, table=None):
+        self.epoch = epoch
+        supertypes = OrderedSet(x.force_resolve() for x in eclass.eSuperTypes)
+        parents = [x._reflection() for x in eclass.eSuperTypes]
+        for parent in parents:
+            supertypes.update(parent.supertypes)
+        self.supertypes = tuple(supertypes)
+        self.precomputed = table is not None
+        if table is not None:
+            classes = OrderedSet((eclass,) + self.supertypes)
+            for cls in tuple(classes):
+                classes.update(x.eClassifier for x in cls.eGenericSuperTypes
+                               if x.eClassifier is not None)
+            self.stamps = tuple((x, x.__dict__.get('_changes', 0))
+                                for x in classes)
+            self._index(*table)
+            return
+        parents.extend(x.eClassifier._reflection()
+                       for x in eclass.eGenericSuperTypes)
+        features = OrderedSet(eclass.eStructuralFeatures)
+        for parent in parents:
+            features.update(parent.features)
+        # the feature IDs follow the inherited features first, a subclass
+        # keeps the IDs of the features of its first super type
+        id_features = OrderedSet()
+        for parent in parents:
+            id_features.update(parent.id_features)
+        id_features.update(eclass.eStructuralFeatures)
+        self._index(features, id_features)
+
+    def _index(self, features, id_features):
+        self.features = tuple(features)
+        self.references = tuple(x for x in features if x.is_reference)
+        self.attributes = tuple(x for x in features if x.is_attribute)
+        self.containments = tuple(x for x in self.references
+                                  if x.containment and not x.derived)
+        by_name = {}
+        for feature in features:
+            by_name.setdefault(feature.name, feature)
+        self.features_by_name = by_name
+        self.id_features = tuple(id_features)
+        self.feature_ids = {feature: i
+                            for i, feature in enumerate(self.id_features)}
+
+    def unchanged(self):
+        """Tells if the class and super types of a precomputed snapshot are
+        still the ones it was computed from."""
+        return all(x.__dict__.get('_changes', 0) == changes
+                   for x, changes in self.stamps)
+
+    def by_id(self, feature_id):
+        """Gives the feature of the ``feature_id`` integer ID."""
+        if feature_id.__class__ is bool:
+            raise ValueError(f'{feature_id} is not a feature ID')
+        if feature_id < 0:
+            raise IndexError(f'Invalid feature ID {feature_id}')
+        return self.id_features[feature_id]
+
+
+_NO_DEFAULT = object()
+
+
+class _CompiledAttribute(object):
+    """Accessor installed by ``EClass.compile()`` for a single-valued feature.
+
+    The default value of the feature is computed once, at compilation time,
+    if it is immutable.
+    """
+    __slots__ = ('feature', 'name', 'default')
+
+    def __init__(self, feature):
+        self.feature = feature
+        self.name = feature._name
+        default = feature.get_default_value()
+        if default is not None \
+                and default.__class__ not in _immutable_defaults:
+            default = _NO_DEFAULT
+        self.default = default
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.feature
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            pass
+        default = self.default
+        if default is _NO_DEFAULT:
+            return self.feature.__get__(instance, owner)
+        return default
+
+    def __set__(self, instance, value):
+        self.feature._set_value(instance, value)
+
+    def __delete__(self, instance):
+        self.feature.__delete__(instance)
+
+
+class _CompiledCollection(object):
+    """Accessor installed by ``EClass.compile()`` for a many-valued feature.
+
+    The collection class is resolved once, at compilation time.
+    """
+    __slots__ = ('feature', 'name', 'factory')
+
+    def __init__(self, feature):
+        self.feature = feature
+        self.name = feature._name
+        if feature.derived_class is ECollection:
+            self.factory = ECollection.collection_class(feature)
+        else:
+            self.factory = feature.derived_class.create
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.feature
+        instance_dict = instance.__dict__
+        try:
+            return instance_dict[self.name]
+        except KeyError:
+            pass
+        value = self.factory(instance, self.feature)
+        instance_dict[self.name] = value
+        return value
+
+    def __set__(self, instance, value):
+        self.feature.__set__(instance, value)
+
+    def __delete__(self, instance):
+        self.feature.__delete__(instance)
+
+
+class _SlotAccessor(object):
+    """Accessor installed by ``Core._promote`` for a feature whose values
+    are stored in a slot of its static class.
+    """
+    __slots__ = ('feature', 'slot', 'read')
+
+    def __init__(self, feature, slot):
+        self.feature = feature
+        self.slot = slot
+        self.read = slot.__get__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.feature
+        try:
+            return self.read(instance)
+        except AttributeError:
+            return self.feature._missing(instance)
+
+    def __set__(self, instance, value):
+        self.feature.__set__(instance, value)
+
+    def __delete__(self, instance):
+        self.feature.__delete__(instance)
+
+
+class _CompiledEClass(object):
+    """Keeps what ``EClass.compile()`` replaced in the Python class, in order
+    to restore it when the compilation is invalidated.
+    """
+    def __init__(self, eclass):
+        python_class = eclass.python_class
+        features = eclass._reflection().features_by_name
+        self.originals = {name: python_class.__dict__.get(name, _NO_DEFAULT)
+                          for name in features}
+        self.originals['__init__'] = python_class.__dict__['__init__']
+        for name, feature in features.items():
+            if feature._slot is not None:
+                continue  # already read from its slot
+            accessor = (_CompiledCollection(feature) if feature.many
+                        else _CompiledAttribute(feature))
+            setattr(python_class, name, accessor)
+        python_class.__init__ = self._compile_init(features)
+
+    @staticmethod
+    def _compile_init(features):
+        # attributes are directly stored in the instance dict, unless the
+        # new instance is already observed, references and collections use
+        # their regular setters
+        namespace = {'_missing': _NO_DEFAULT}
+        reserved = {'self', 'args', 'kwargs', 'setattr', 'observed',
+                    'instance_dict', *namespace}
+        params = []
+        body = []
+        for i, (name, feature) in enumerate(features.items()):
+            if (not name.isidentifier() or keyword.iskeyword(name)
+                    or name in reserved or name.startswith('_f')):
+                continue  # still handled by the generic loop on kwargs
+            setter = f'_f{i}_set'
+            namespace[setter] = (feature.__set__ if feature.many
+                                 else feature._set_value)
+            params.append(f'{name}=_missing')
+            body.append(f'    if {name} is not _missing:\n')
+            if feature.many or feature.is_reference or feature._eType is None \
+                    or feature._slot is not None:
+                body.append(f'        {setter}(self, {name})\n')
+                continue
+            namespace[f'_f{i}'] = feature
+            body.append(
+                f'        if observed:\n'
+                f'            {setter}(self, {name})\n'
+                f'        else:\n'
+                f'            _f{i}._check({name})\n'
+                f'            instance_dict[{name!r}] = {name}\n'
+                f'            self._isset[_f{i}] = None\n'
+            )
+        params = ', '.join(['self', '*args'] + params + ['**kwargs'])
+        code = (f'def __init__({params}):\n'
+                '    observed = self._observed()\n'
+                '    instance_dict = self.__dict__\n'
+                + ''.join(body)
+                + '    for name, value in kwargs.items():\n'
+                  '        setattr(self, name, value)\n')
+        exec(compile(code, '<compiled __init__>', 'exec'), namespace)
+        return namespace['__init__']
+
+    def restore(self, python_class):
+        for name, original in self.originals.items():
+            if original is _NO_DEFAULT:
+                delattr(python_class, name)
+            else:
+                setattr(python_class, name, original)
+
+
 class EClass(EClassifier):
+    # Bumped each time a change can alter the inherited features of any EClass
+    # (structural features, super types or feature names), which invalidates
+    # all the reflection snapshots at once.
+    _reflection_epoch = 0
+    _compiled_classes = WeakSet()
+
     def __new__(cls, name=None, superclass=None, metainstance=None, **kwargs):
         if not isinstance(name, str):
             raise BadValueError(got=name, expected=str)
@@ -809,10 +1501,15 @@ class EClass(EClassifier):
             instance.eSuperTypes.extend(superclass)
         elif isinstance(superclass, EClass):
             instance.eSuperTypes.append(superclass)
+        if superclass:
+            # a new subclass of existing ones, notifyChanged() is not
+            # called yet
+            EClass._reflection_epoch += 1
         if metainstance:
             instance.python_class = metainstance
             instance.__name__ = metainstance.__name__
-            metainstance.dyn_inst = instance
+            if not issubclass(metainstance, CompactEObject):
+                metainstance.dyn_inst = instance
         else:
             def new_init(self, *args, **kwargs):
                 for name, value in kwargs.items():
@@ -850,7 +1547,7 @@ class EClass(EClassifier):
                  metainstance=None, **kwargs):
         super().__init__(name, **kwargs)
         self.abstract = abstract
-        self._eternal_listener.append(self)
+        self._eternal_listener = [self]
 
     def __call__(self, *args, **kwargs):
         if self.abstract:
@@ -859,14 +1556,17 @@ class EClass(EClassifier):
 
     def allInstances(self=None, resources=None):
         if self is None:
-            self = EClass
-        if resources:
-            yield from (x for x in self._instances
-                        if isinstance(x, self) and x.eResource in resources)
-        else:
-            yield from (x for x in self._instances if isinstance(x, self))
+            return _all_instances(EClass, resources)
+        return _all_instances(self.python_class, resources)
 
     def notifyChanged(self, notif):
+        if (notif.feature is EClass.eStructuralFeatures
+                or notif.feature is EClass.eSuperTypes
+                or notif.feature is EClass.eGenericSuperTypes):
+            EClass._reflection_epoch += 1
+            self._structure_changed()
+            if EClass._compiled_classes:
+                self._invalidate_compiled()
         # We do not update in case of static metamodel (could be changed)
         if getattr(self.python_class, '_staticEClass', False):
             return
@@ -891,6 +1591,43 @@ class EClass(EClassifier):
             self.python_class.__name__ = notif.new
             self.__name__ = notif.new
 
+    def compile(self):
+        """Specializes the Python class of this dynamic EClass for its
+        current features.
+
+        The compiled class gets an ``__init__`` with one keyword parameter
+        per feature, and accessors that skip the generic feature lookup and
+        compute the immutable default values once. The compilation is
+        invalidated as soon as the EClass, one of its super types or one of
+        their features changes, ``compile()`` must then be called again.
+        Static EClasses and EClasses using a columnar storage are left
+        untouched.
+        """
+        python_class = self.python_class
+        if getattr(python_class, '_staticEClass', False) \
+                or getattr(python_class, '_column_store', None) is not None:
+            return
+        self.uncompile()
+        self.__dict__['_compiled'] = _CompiledEClass(self)
+        EClass._compiled_classes.add(self)
+
+    def uncompile(self):
+        """Restores the generic Python class of a compiled EClass."""
+        compiled = self.__dict__.pop('_compiled', None)
+        if compiled is not None:
+            EClass._compiled_classes.discard(self)
+            compiled.restore(self.python_class)
+
+    @property
+    def compiled(self):
+        return self.__dict__.get('_compiled') is not None
+
+    def _invalidate_compiled(self):
+        python_class = self.python_class
+        for eclass in list(EClass._compiled_classes):
+            if issubclass(eclass.python_class, python_class):
+                eclass.uncompile()
+
     def __create_fun(self, eoperation):
         name = eoperation.normalized_name()
         namespace = {}
@@ -917,13 +1654,14 @@ class EClass(EClassifier):
 
     def __compute_supertypes(self):
         if not self.eSuperTypes and not self.eGenericSuperTypes:
-            return (EObject,)
+            return (_DynamicEObject,)
         else:
             eSuperTypes = list(self.eSuperTypes)
             eSuperTypes.extend(x.eClassifier for x in self.eGenericSuperTypes if x.eClassifier is not None)
             if len(eSuperTypes) > 1 and EObject.eClass in eSuperTypes:
                 eSuperTypes.remove(EObject.eClass)
-            return tuple(x.python_class for x in eSuperTypes)
+            return tuple(_DynamicEObject if x.python_class is EObject
+                         else x.python_class for x in eSuperTypes)
 
     def __repr__(self):
         return f'<{self.__class__.__name__} name="{self.name}">'
@@ -938,18 +1676,40 @@ class EClass(EClassifier):
         return [x for x in self.eStructuralFeatures
                 if x.is_reference]
 
+    def _reflection(self):
+        epoch = EClass._reflection_epoch
+        cache = self.__dict__.get('_reflection_cache')
+        if cache is None or cache.epoch != epoch:
+            if cache is not None and cache.precomputed and cache.unchanged():
+                cache.epoch = epoch
+                return cache
+            cache = _EClassReflection(self, epoch)
+            self.__dict__['_reflection_cache'] = cache
+        return cache
+
+    def _structure_changed(self):
+        self.__dict__['_changes'] = self.__dict__.get('_changes', 0) + 1
+
     def findEStructuralFeature(self, name):
-        return next((f for f in self._eAllStructuralFeatures_gen()
-                     if f.name == name),
-                    None)
+        return self._reflection().features_by_name.get(name)
+
+    def getFeatureCount(self):
+        return len(self._reflection().id_features)
+
+    def getFeatureID(self, feature):
+        """Gives the integer ID of ``feature`` in this EClass, -1 if the
+        feature is not a feature of this EClass.
+        """
+        return self._reflection().feature_ids.get(feature, -1)
 
-    def _eAllSuperTypes_gen(self):
-        yield from (x.force_resolve() for x in self.eSuperTypes)
-        for x in self.eSuperTypes:
-            yield from x._eAllSuperTypes_gen()
+    def getEStructuralFeature(self, feature_id):
+        """Gives the feature with the ``feature_id`` integer ID (or name)."""
+        if isinstance(feature_id, str):
+            return self.findEStructuralFeature(feature_id)
+        return self._reflection().by_id(feature_id)
 
     def eAllSuperTypes(self):
-        return OrderedSet(self._eAllSuperTypes_gen())
+        return OrderedSet(self._reflection().supertypes)
 
     def _eAllGenericSuperTypes_gen(self):
         super_types = self.eGenericSuperTypes
@@ -964,23 +1724,14 @@ class EClass(EClassifier):
         return OrderedSet((x.eClassifier for x
                                          in self._eAllGenericSuperTypes_gen()))
 
-    def _eAllStructuralFeatures_gen(self):
-        yield from self.eStructuralFeatures
-        for parent in self.eSuperTypes:
-            yield from parent._eAllStructuralFeatures_gen()
-        for parent in self.eGenericSuperTypes:
-            yield from parent.eClassifier._eAllStructuralFeatures_gen()
-
     def eAllStructuralFeatures(self):
-        return OrderedSet(self._eAllStructuralFeatures_gen())
+        return OrderedSet(self._reflection().features)
 
     def eAllReferences(self):
-        return set((x for x in self._eAllStructuralFeatures_gen()
-                    if x.is_reference))
+        return set(self._reflection().references)
 
     def eAllAttributes(self):
-        return set((x for x in self._eAllStructuralFeatures_gen()
-                    if x.is_attribute))
+        return set(self._reflection().attributes)
 
     def _eAllOperations_gen(self):
         yield from self.eOperations
@@ -1052,13 +1803,13 @@ class EProxy(EObject):
 
     def delete(self, recursive=True):
         if recursive and self.resolved:
-            [obj.delete() for obj in self.eAllContents()]
-            # for obj in self.eAllContents():
-            #     obj.delete()
+            for obj in self.eAllContents(order=Order.POST_ORDER):
+                obj.delete(recursive=False)
 
         seek = set(self._inverse_rels)
         if self.resolved:
-            seek.update((self, ref) for ref in self.eClass.eAllReferences())
+            seek.update((self, ref)
+                        for ref in self.eClass._reflection().references)
         for owner, feature in seek:
             fvalue = owner.eGet(feature)
             if feature.many:
@@ -1143,10 +1894,12 @@ def abstract(cls):
 
 
 from .valuecontainer import ECollection, EValue, \
-                            EList, EOrderedSet, ESet, EBag, \
+                            EList, EOrderedSet, ESet, EBag, EArrayList, \
                             EDerivedCollection, \
                             EcoreUtils, \
-                            BadValueError  # noqa
+                            BadValueError, \
+                            _update_containment  # noqa
+from .traversal import traverse, Order  # noqa
 
 
 # meta-meta level
@@ -1375,4 +2128,4 @@ __all__ = ['EObject', 'EModelElement', 'ENamedElement', 'EAnnotation',
            'EDate', 'EBigDecimal', 'EBooleanObject', 'ELongObject', 'EByte',
            'EByteObject', 'EByteArray', 'EChar', 'ECharacterObject',
            'EShort', 'EShortObject', 'EJavaClass', 'EMetaclass',
-           'EDerivedCollection']
+           'EDerivedCollection', 'EArrayList', 'CompactEObject']
@@ -10,6 +10,53 @@ class InternalSet(dict):
     add = dict.setdefault
 
 
+class LazyAttribute(object):
+    """Instance attribute created by ``factory`` on its first access.
+
+    The created value is stored in the instance ``__dict__``, the next
+    accesses do not go through the descriptor anymore.
+    """
+    def __init__(self, factory):
+        self.factory = factory
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            # the attribute only exists for instances
+            raise AttributeError(self.name)
+        value = instance.__dict__[self.name] = self.factory()
+        return value
+
+
+class LazySlot(object):
+    """Instance attribute created by ``factory`` on its first access, for
+    the classes without instance ``__dict__``.
+
+    The created value is stored in the ``slot`` member descriptor.
+    """
+    __slots__ = ('slot', 'factory')
+
+    def __init__(self, slot, factory):
+        self.slot = slot
+        self.factory = factory
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            raise AttributeError(self.slot.__name__)
+        try:
+            return self.slot.__get__(instance)
+        except AttributeError:
+            value = self.factory()
+            self.slot.__set__(instance, value)
+            return value
+
+    def __set__(self, instance, value):
+        self.slot.__set__(instance, value)
+
+
 @contextmanager
 def ignored(*exceptions):
     """Gives a convenient way of ignoring exceptions.
@@ -3,27 +3,116 @@ This module gives the "listener" classes for the PyEcore notification layer.
 The main class to create a new listener is "EObserver" which is triggered
 each time a modification is perfomed on an observed element.
 """
+from abc import ABCMeta, abstractmethod
 from enum import unique, Enum
 from itertools import chain
+from collections.abc import Iterable
+import asyncio
+import queue
+import threading
+import weakref
 
 
 class ENotifer(object):
+    # the subclasses without __slots__ get an instance __dict__, the
+    # ``CompactEObject`` ones keep the attributes below in slots
+    __slots__ = ()
+    _listeners = ()
+    _eternal_listener = ()
+    _subscriptions = None
+    _content_adapters = ()
+    _adapters_cache = None
+    _dead_listeners = False
+
     def __init__(self, **kwargs):
         super().__init__()
 
+    @property
+    def listeners(self):
+        listeners = self._listeners
+        if listeners.__class__ is tuple:
+            listeners = self._listeners = []
+        return listeners
+
+    @listeners.setter
+    def listeners(self, listeners):
+        self._listeners = listeners
+
+    def _observed(self):
+        """Tells if a notification sent by this notifier can be received.
+
+        The notification layer is mostly used by tools, checking this first
+        avoids the creation of notifications nobody will receive.
+        """
+        if self._listeners or self._eternal_listener or self._subscriptions:
+            return True
+        if _content_state.count and self._subtree_adapters():
+            return True
+        resource = self.eResource
+        return resource is not None and bool(
+            resource.listeners or resource._eternal_listener
+            or resource._subscriptions
+            or resource._notification_batch() is not None)
+
     def notify(self, notification):
         notification.notifier = notification.notifier or self
+        if self._dead_listeners:
+            _prune_listeners(self)
         resource = self.eResource
-        resource_listeners = []
-        resource_eternals = []
-        if resource:
-            resource_listeners = resource.listeners
-            resource_eternals = resource._eternal_listener
-        listeners = chain(resource_eternals, resource_listeners,
-                          self._eternal_listener, self.listeners)
+        if resource is None:
+            listeners = chain(self._eternal_listener, self._listeners,
+                              _subscribers(self, notification),
+                              self._subtree_adapters())
+        else:
+            if resource._dead_listeners:
+                _prune_listeners(resource)
+            batch = resource._notification_batch()
+            if batch is not None:
+                # eternal listeners keep PyEcore internal state consistent,
+                # they cannot wait for the end of the batch
+                for listener in chain(resource._eternal_listener,
+                                      self._eternal_listener):
+                    listener.notifyChanged(notification)
+                batch.add(notification, resource)
+                return
+            listeners = chain(resource._eternal_listener, resource.listeners,
+                              _subscribers(resource, notification),
+                              self._eternal_listener, self._listeners,
+                              _subscribers(self, notification),
+                              self._subtree_adapters())
         for listener in listeners:
             listener.notifyChanged(notification)
 
+    def _subtree_adapters(self):
+        """Gives the content adapters of this object, of its containers and
+        of the resource of its root.
+
+        The result is cached on each object met while walking up the
+        containment chain, the caches are invalidated by any containment
+        change.
+        """
+        if not _content_state.count:
+            return ()
+        epoch = _content_state.epoch
+        path = []
+        obj = self
+        inherited = ()
+        while isinstance(obj, ENotifer):
+            cache = obj._adapters_cache
+            if cache is not None and cache[0] == epoch:
+                inherited = cache[1]
+                break
+            path.append(obj)
+            obj = obj._container
+        else:
+            resource = getattr(path[-1], '_eresource', None)
+            if resource is not None:
+                inherited = resource._content_adapters
+        for obj in reversed(path):
+            inherited = obj._content_adapters + inherited
+            obj._adapters_cache = (epoch, inherited)
+        return inherited
+
 
 @unique
 class Kind(Enum):
@@ -50,15 +139,451 @@ class Notification(object):
                 f'obj={self.notifier} #{self.feature}')
 
 
+class NotificationBatch(object):
+    """Collects notifications and delivers them coalesced.
+
+    For a same notifier and feature, successive ``SET``/``UNSET`` are merged
+    in a single notification (dropped if the value is back to its previous
+    value), ``ADD`` are folded in an ``ADD_MANY`` and the ``REMOVE`` of an
+    element added during the batch cancels its ``ADD``.
+
+    .. seealso:: Resource.batch_notifications, ResourceSet.batch_notifications
+    """
+    def __init__(self):
+        self.notifications = []
+        self._last = {}
+
+    def add(self, notification, resource=None):
+        key = (id(notification.notifier), notification.feature)
+        index = self._last.get(key)
+        if index is not None:
+            previous, previous_resource = self.notifications[index]
+            merged = self._merge(previous, notification)
+            if merged is None:
+                self.notifications[index] = None
+                del self._last[key]
+                return
+            if merged is not notification:
+                self.notifications[index] = (merged, previous_resource)
+                return
+        self._last[key] = len(self.notifications)
+        self.notifications.append((notification, resource))
+
+    @staticmethod
+    def _merge(previous, notification):
+        """Returns the notification that replaces ``previous``, ``None`` if
+        both cancel each others, or ``notification`` if they cannot be
+        merged.
+        """
+        kind = notification.kind
+        previous_kind = previous.kind
+        if kind in _SETS and previous_kind in _SETS:
+            if previous.old == notification.new:
+                return None  # back to the value before the batch
+            return Notification(notifier=previous.notifier, kind=kind,
+                                old=previous.old, new=notification.new,
+                                feature=previous.feature)
+        if previous_kind not in _ADDS:
+            return notification
+        added = [previous.new] if previous_kind is Kind.ADD \
+            else list(previous.new)
+        if kind in _ADDS:
+            if kind is Kind.ADD:
+                added.append(notification.new)
+            else:
+                added.extend(notification.new)
+        elif kind is Kind.REMOVE:
+            value = notification.old
+            for i, element in enumerate(added):
+                if element is value:
+                    del added[i]
+                    break
+            else:
+                return notification
+            if not added:
+                return None
+        else:
+            return notification
+        if len(added) == 1:
+            return Notification(notifier=previous.notifier, kind=Kind.ADD,
+                                new=added[0], feature=previous.feature)
+        return Notification(notifier=previous.notifier, kind=Kind.ADD_MANY,
+                            new=added, feature=previous.feature)
+
+    def deliver(self):
+        """Sends the coalesced notifications to the listeners of their
+        notifier and of the resource the notifier was in.
+        """
+        notifications = self.notifications
+        self.notifications = []
+        self._last = {}
+        for entry in notifications:
+            if entry is None:
+                continue
+            notification, resource = entry
+            notifier = notification.notifier
+            listeners = chain(notifier._listeners,
+                              _subscribers(notifier, notification),
+                              notifier._subtree_adapters())
+            if resource is not None:
+                listeners = chain(resource.listeners,
+                                  _subscribers(resource, notification),
+                                  listeners)
+            for listener in listeners:
+                listener.notifyChanged(notification)
+
+
+_SETS = (Kind.SET, Kind.UNSET)
+_ADDS = (Kind.ADD, Kind.ADD_MANY)
+
+
+def subscribe(notifier, listener, features=None, kinds=None, weak=False):
+    """Registers a listener that only receives some of the notifications of a
+    notifier (an ``EObject`` or a ``Resource``).
+
+    The subscriptions are stored in a dispatch table on the notifier, the
+    notifications that do not match are never sent to the listener.
+
+    :param notifier: the observed element
+    :param listener: the listener, an object with a ``notifyChanged`` method
+    :param features: an ``EStructuralFeature``, a feature name or an iterable
+                     of them, ``None`` means all the features. For a
+                     ``Resource``, a name matches the features of this name
+                     of all the classes
+    :param kinds: a ``Kind`` or an iterable of ``Kind``, ``None`` means all
+                  the kinds
+    :param weak: if ``True``, the notifier only keeps a weak reference towards
+                 the listener, the subscription is dropped when the listener
+                 is garbage collected
+    """
+    if weak:
+        listener = _WeakListener(notifier, listener)
+    if features is None and kinds is None:
+        notifier.listeners.append(listener)
+        return
+    if features is None:
+        features = (None,)
+    elif isinstance(features, str) or not isinstance(features, Iterable):
+        features = (features,)
+    if kinds is None:
+        kinds = Kind
+    elif isinstance(kinds, Kind):
+        kinds = (kinds,)
+    table = notifier._subscriptions
+    if table is None:
+        table = notifier._subscriptions = {}
+    eclass = getattr(notifier, 'eClass', None)
+    for feature in features:
+        if isinstance(feature, str) and eclass is not None:
+            name = feature
+            feature = eclass.findEStructuralFeature(name)
+            if feature is None:
+                raise AttributeError(f"'{eclass.name}' has no "
+                                     f"feature '{name}'")
+        for kind in kinds:
+            subscribers = table.setdefault((feature, kind), [])
+            if listener not in subscribers:
+                subscribers.append(listener)
+
+
+def unsubscribe(notifier, listener):
+    """Removes all the subscriptions of a listener from a notifier."""
+    if listener in notifier.listeners:
+        notifier.listeners.remove(listener)
+    table = notifier._subscriptions
+    if not table:
+        return
+    for key, subscribers in list(table.items()):
+        if listener in subscribers:
+            subscribers.remove(listener)
+            if not subscribers:
+                del table[key]
+
+
+def _is_alive(listener):
+    return not isinstance(listener, _WeakListener) \
+        or listener.listener() is not None
+
+
+def _prune_listeners(notifier):
+    """Removes the weak listeners that have been garbage collected. The lists
+    are replaced, not modified, as they can be iterated over by a notify().
+    """
+    notifier._dead_listeners = False
+    notifier.listeners = [x for x in notifier.listeners if _is_alive(x)]
+    table = notifier._subscriptions
+    if table:
+        pruned = {}
+        for key, subscribers in table.items():
+            subscribers = [x for x in subscribers if _is_alive(x)]
+            if subscribers:
+                pruned[key] = subscribers
+        notifier._subscriptions = pruned
+
+
+class _WeakListener(object):
+    """Listener registered in place of a weakly referenced listener. It
+    compares equal to the referenced listener, so ``unsubscribe(notifier,
+    listener)`` also removes it.
+    """
+    def __init__(self, notifier, listener):
+        notifier_ref = weakref.ref(notifier)
+
+        def collected(ref):
+            notifier = notifier_ref()
+            if notifier is not None:
+                notifier._dead_listeners = True
+
+        self.listener = weakref.ref(listener, collected)
+
+    def notifyChanged(self, notification):
+        listener = self.listener()
+        if listener is not None:
+            listener.notifyChanged(notification)
+
+    def __eq__(self, other):
+        if isinstance(other, _WeakListener):
+            return self.listener == other.listener
+        listener = self.listener()
+        return listener is not None and listener is other
+
+    def __hash__(self):
+        return hash(self.listener)
+
+
+def _subscribers(notifier, notification):
+    table = notifier._subscriptions
+    if not table:
+        return ()
+    kind = notification.kind
+    feature = notification.feature
+    subscribers = chain(table.get((feature, kind), ()),
+                        table.get((None, kind), ()))
+    name = getattr(feature, 'name', None)
+    if name is None:
+        return subscribers
+    # the subscriptions by name of the notifiers without EClass (resources)
+    return chain(subscribers, table.get((name, kind), ()))
+
+
 class EObserver(object):
-    def __init__(self, notifier=None, notifyChanged=None):
+    def __init__(self, notifier=None, notifyChanged=None, features=None,
+                 kinds=None, weak=False):
         if notifier:
-            notifier.listeners.append(self)
+            subscribe(notifier, self, features, kinds, weak)
         if notifyChanged:
             self.notifyChanged = notifyChanged
 
-    def observe(self, notifier):
-        notifier.listeners.append(self)
+    def observe(self, notifier, features=None, kinds=None, weak=False):
+        """Observes the changes of ``notifier``, if ``features`` and/or
+        ``kinds`` are given, only the matching changes are received. If
+        ``weak`` is ``True``, the observer is not kept alive by ``notifier``.
+
+        .. seealso:: subscribe
+        """
+        subscribe(notifier, self, features, kinds, weak)
+
+    def unobserve(self, notifier):
+        unsubscribe(notifier, self)
 
     def notifyChanged(self, notification):
         pass
+
+
+class _ContentState(object):
+    """Tracks the content adapters in use, the containment changes only
+    invalidate the cached adapters if at least one is registered.
+    """
+    def __init__(self):
+        self.count = 0
+        self.epoch = 0
+
+
+_content_state = _ContentState()
+
+
+class EContentAdapter(EObserver):
+    """Observer that receives the notifications of an element, or of a
+    resource, and of all its direct and indirect content.
+
+    The adapter is only registered on the observed element, the objects that
+    enter or leave its containment subtree are adapted, or not anymore,
+    without any registration: the adapters of an object are lazily computed
+    from its containers when it sends a notification.
+    """
+    def __init__(self, notifier=None, notifyChanged=None):
+        super().__init__(notifyChanged=notifyChanged)
+        if notifier:
+            self.observe(notifier)
+
+    def observe(self, notifier):
+        if self in notifier._content_adapters:
+            return
+        notifier._content_adapters = notifier._content_adapters + (self,)
+        _content_state.count += 1
+        _content_state.epoch += 1
+
+    def unobserve(self, notifier):
+        adapters = notifier._content_adapters
+        if self not in adapters:
+            return
+        notifier._content_adapters = tuple(x for x in adapters
+                                           if x is not self)
+        _content_state.count -= 1
+        _content_state.epoch += 1
+
+
+class _DispatchedListener(object):
+    """Listener registered in place of a listener whose notifications are
+    delivered by a dispatcher. It compares equal to the wrapped listener, so
+    ``unsubscribe(notifier, listener)`` also removes it.
+    """
+    def __init__(self, dispatcher, listener):
+        self.dispatcher = dispatcher
+        self.listener = listener
+
+    def notifyChanged(self, notification):
+        self.dispatcher.dispatch(self.listener, notification)
+
+    def __eq__(self, other):
+        if isinstance(other, _DispatchedListener):
+            return self.listener is other.listener \
+                and self.dispatcher is other.dispatcher
+        return self.listener is other
+
+    def __hash__(self):
+        return hash(self.listener)
+
+
+class NotificationDispatcher(metaclass=ABCMeta):
+    """Delivers notifications to listeners outside of ``notify()``.
+
+    The notifications are queued when the model is modified and are sent to
+    the listeners, in the order they were emitted, by a single consumer. A
+    listener thus receives its notifications in order.
+    """
+    def __init__(self):
+        self.errors = []
+
+    def observe(self, listener, notifier, features=None, kinds=None):
+        """Subscribes ``listener`` to ``notifier``, its notifications will be
+        delivered by this dispatcher.
+
+        .. seealso:: subscribe
+        """
+        subscribe(notifier, _DispatchedListener(self, listener), features,
+                  kinds)
+
+    @abstractmethod
+    def dispatch(self, listener, notification):
+        """Queues the delivery of ``notification`` to ``listener``."""
+        raise NotImplementedError()
+
+    def _deliver(self, listener, notification):
+        try:
+            listener.notifyChanged(notification)
+        except Exception as e:
+            self.errors.append(e)
+
+    def _raise_errors(self):
+        if self.errors:
+            error = self.errors[0]
+            self.errors = []
+            raise error
+
+
+class ThreadDispatcher(NotificationDispatcher):
+    """Dispatcher draining the notifications queue in a worker thread.
+
+    ``flush()`` blocks until all the queued notifications are delivered and
+    raises the first exception raised by a listener meanwhile.
+    """
+    def __init__(self, name='pyecore-notifications'):
+        super().__init__()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name,
+                                        daemon=True)
+        self._thread.start()
+
+    def dispatch(self, listener, notification):
+        if self._closed:
+            raise RuntimeError('The dispatcher is closed')
+        self._queue.put((listener, notification))
+
+    def _run(self):
+        get = self._queue.get
+        task_done = self._queue.task_done
+        while True:
+            item = get()
+            if item is None:
+                task_done()
+                return
+            self._deliver(*item)
+            task_done()
+
+    def flush(self):
+        self._queue.join()
+        self._raise_errors()
+
+    def close(self):
+        """Delivers the pending notifications and stops the worker thread."""
+        self._closed = True
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_errors()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class AsyncioDispatcher(NotificationDispatcher):
+    """Dispatcher draining the notifications queue in an asyncio task.
+
+    It must be created while the event loop is running (or with an explicit
+    ``loop``), the notifications can be queued from any thread.
+    """
+    def __init__(self, loop=None):
+        super().__init__()
+        self._loop = loop if loop is not None else asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._closed = False
+        self._task = self._loop.create_task(self._run())
+
+    def dispatch(self, listener, notification):
+        if self._closed:
+            raise RuntimeError('The dispatcher is closed')
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._queue.put_nowait((listener, notification))
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait,
+                                            (listener, notification))
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            self._deliver(*item)
+            self._queue.task_done()
+
+    async def flush(self):
+        await self._queue.join()
+        self._raise_errors()
+
+    async def close(self):
+        """Delivers the pending notifications and stops the draining task."""
+        self._closed = True
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._raise_errors()
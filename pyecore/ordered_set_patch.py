@@ -98,3 +98,125 @@ ordered_set.OrderedSet.__setitem__ = __setitem__
 ordered_set.OrderedSet.__getitem__ = __getitem__
 ordered_set.OrderedSet.__delitem__ = __delitem__
 ordered_set.OrderedSet.subcopy = subcopy
+
+
+class IndexedOrderedSet(ordered_set.OrderedSet):
+    """An OrderedSet with a lazily maintained index of the positions.
+
+    The positions stored in ``map`` are not shifted on each insertion or
+    removal. The positional edits are logged instead and the stored position
+    of an element is translated through the edits that followed it when the
+    element is looked up. The index is rebuilt once the log becomes too long
+    (about the square root of the size of the set), positional insertions
+    and removals thus only cost the shifting of the ``items`` list.
+    """
+    def __init__(self, initial=None):
+        self._edits = []  # (position, +1 or -1), since the last reindex
+        self._logged = {}  # edits length when the position was stored
+        super().__init__(initial)
+
+    def _reindex(self):
+        self.map = {item: i for i, item in enumerate(self.items)}
+        self._edits = []
+        self._logged = {}
+
+    def _locate(self, key):
+        """Gives the position of ``key``, raises a KeyError if it is not in
+        the set.
+        """
+        index = self.map[key]
+        edits = self._edits
+        if not edits:
+            return index
+        if len(edits) * len(edits) > len(self.items) and len(edits) > 16:
+            self._reindex()
+            return self.map[key]
+        for position, delta in edits[self._logged.get(key, 0):]:
+            if index > position or (delta > 0 and index == position):
+                index += delta
+        return index
+
+    def _log(self, key, index, delta):
+        edits = self._edits
+        edits.append((index, delta))
+        if delta > 0:
+            self.map[key] = index
+            self._logged[key] = len(edits)
+        else:
+            del self.map[key]
+            self._logged.pop(key, None)
+
+    def add(self, key):
+        if key in self.map:
+            return self._locate(key)
+        index = len(self.items)
+        self.map[key] = index
+        if self._edits:
+            self._logged[key] = len(self._edits)
+        self.items.append(key)
+        return index
+
+    append = add
+
+    def _extend_new(self, keys):
+        """Appends the ``keys`` which are not in the set yet."""
+        map = self.map
+        new = [x for x in dict.fromkeys(keys) if x not in map]
+        start = len(self.items)
+        map.update(zip(new, range(start, start + len(new))))
+        self.items.extend(new)
+        if self._edits:
+            self._logged.update(dict.fromkeys(new, len(self._edits)))
+
+    def index(self, key):
+        if isinstance(key, Iterable) and not ordered_set._is_atomic(key):
+            return [self.index(subkey) for subkey in key]
+        return self._locate(key)
+
+    get_loc = index
+    get_indexer = index
+
+    def insert(self, index, key):
+        if key in self.map:
+            return
+        items = self.items
+        size = len(items)
+        if index < 0:
+            index = size + index if size + index > 0 else 0
+        else:
+            index = index if index < size else size
+        items.insert(index, key)
+        if index == size:
+            self.map[key] = index
+            if self._edits:
+                self._logged[key] = len(self._edits)
+        else:
+            self._log(key, index, 1)
+
+    def pop(self, index=-1):
+        items = self.items
+        if not items:
+            raise KeyError('Set is empty')
+        elem = items[index]
+        if index < 0:
+            index += len(items)
+        del items[index]
+        if index == len(items):
+            del self.map[elem]
+            self._logged.pop(elem, None)
+        else:
+            self._log(elem, index, -1)
+        return elem
+
+    def discard(self, key):
+        if key in self.map:
+            IndexedOrderedSet.pop(self, self._locate(key))
+
+    def clear(self):
+        super().clear()
+        self._edits = []
+        self._logged = {}
+
+    def _update_items(self, items):
+        self.items = items
+        self._reindex()
@@ -52,8 +52,9 @@ class JsonResource(Resource):
         self.options = options or {}
         stream = self.open_out_stream(output)
         dict_list = []
-        for root in self.contents:
-            dict_list.append(self.to_dict(root))
+        with self._path_memo():
+            for root in self.contents:
+                dict_list.append(self.to_dict(root))
         if len(dict_list) <= 1:
             dict_list = dict_list[0]
 
@@ -11,9 +11,11 @@ from itertools import chain
 from collections import ChainMap
 from .. import ecore as Ecore
 from ..innerutils import ignored
+from ..notification import NotificationBatch
 from abc import abstractmethod
 from urllib.parse import urljoin
 from functools import lru_cache
+from contextlib import contextmanager
 
 
 global_registry = {}
@@ -51,6 +53,7 @@ class ResourceSet(object):
         self.uri_mapper = ChainMap({}, global_uri_mapper)
         self.uri_converter = []
         self.resource_factory = dict(ResourceSet.resource_factory)
+        self._batch = None
 
     def create_resource(self, uri, **kwargs):
         """Creates a new Resource.
@@ -76,6 +79,24 @@ class ResourceSet(object):
         resource.decoders.insert(0, self)
         return resource
 
+    @contextmanager
+    def batch_notifications(self):
+        """Collects the notifications sent by the content of all the resources
+        of this ResourceSet and delivers them coalesced at the end of the
+        block.
+
+        .. seealso:: Resource.batch_notifications
+        """
+        if self._batch is not None:
+            yield self._batch
+            return
+        batch = self._batch = NotificationBatch()
+        try:
+            yield batch
+        finally:
+            self._batch = None
+            batch.deliver()
+
     def remove_resource(self, resource):
         if not resource:
             return
@@ -351,7 +372,12 @@ class Resource(object):
         self.contents = []
         self.listeners = []
         self._eternal_listener = []
+        self._subscriptions = None
+        self._dead_listeners = False
+        self._content_adapters = ()
         self._resolve_mem = {}
+        self._path_mem = None
+        self._batch = None
         # self._feature_cache = {}
         self.cache_enabled = False
 
@@ -469,6 +495,14 @@ class Resource(object):
     def is_fragment_uuid(fragment):
         return fragment and fragment[0] != '/'
 
+    @staticmethod
+    def _at(collection, index):
+        try:
+            at = collection._at
+        except AttributeError:
+            return collection[index]
+        return at(index)
+
     @classmethod
     def _navigate_from(cls, path, start_obj):
         if '#' in path[:1]:
@@ -485,7 +519,8 @@ class Resource(object):
             if key.startswith('@'):
                 tmp_obj = obj.__getattribute__(key[1:])
                 try:
-                    obj = tmp_obj[int(index)] if index else tmp_obj
+                    obj = Resource._at(tmp_obj, int(index)) if index \
+                        else tmp_obj
                 except IndexError:
                     raise ValueError('Index in path is not the collection,'
                                      ' broken proxy?')
@@ -518,16 +553,47 @@ class Resource(object):
 
     @staticmethod
     def get_id_attribute(eclass):
-        for attribute in eclass.eAllAttributes():
-            id_attr = attribute.__dict__.get('iD', False)
-            try:
-                res = id_attr._get()
-            except Exception:
-                res = id_attr
-            if res:
+        for attribute in eclass._reflection().attributes:
+            if attribute.__dict__.get('iD', False):
                 return attribute
 
-    # Refactor me
+    @contextmanager
+    def batch_notifications(self):
+        """Collects the notifications sent by the content of this resource
+        and delivers them coalesced at the end of the block.
+
+        For a same object and feature, the successive ``SET`` are merged, the
+        ``ADD`` are folded in an ``ADD_MANY`` and an element added then
+        removed is not notified at all. The internal listeners of PyEcore are
+        not delayed.
+        """
+        if self._notification_batch() is not None:
+            yield self._notification_batch()
+            return
+        batch = self._batch = NotificationBatch()
+        try:
+            yield batch
+        finally:
+            self._batch = None
+            batch.deliver()
+
+    def _notification_batch(self):
+        if self._batch is not None:
+            return self._batch
+        resource_set = self.resource_set
+        return resource_set._batch if resource_set is not None else None
+
+    @contextmanager
+    def _path_memo(self):
+        """Memoizes the paths computed by ``_build_path_from`` while the
+        resource is saved, the model must not be modified meanwhile.
+        """
+        self._path_mem = {}
+        try:
+            yield
+        finally:
+            self._path_mem = None
+
     def _build_path_from(self, obj):
         if isinstance(obj, type):
             obj = obj.eClass
@@ -536,6 +602,18 @@ class Resource(object):
         if not getattr(obj, 'resolved', True):
             return (obj._proxy_path, True)
 
+        memo = self._path_mem
+        if memo is None:
+            return self._compute_path_from(obj)
+        try:
+            return memo[obj]
+        except KeyError:
+            path = self._compute_path_from(obj)
+            memo[obj] = path
+            return path
+
+    # Refactor me
+    def _compute_path_from(self, obj):
         if obj.eResource != self:
             eclass = obj.eClass
             prefix = eclass.ePackage.nsPrefix
@@ -601,8 +679,6 @@ class Resource(object):
         except AttributeError:
             raise ValueError('The resource requires an EObject-like object, '
                              f'but received {type(root)} instead.')
-        self.contents.append(root)
-        root._eresource = self
         if root._container is not None:
             container = root._container
             feature = root._containment_feature
@@ -610,10 +686,14 @@ class Resource(object):
                 container.eGet(feature).remove(root)
             else:
                 container.eSet(feature, None)
+        elif root._eresource is not None and root._eresource is not self:
+            root._eresource.remove(root)
+        self.contents.append(root)
+        root._update_eresource(self)
 
     def remove(self, root):
         self.contents.remove(root)
-        root._eresource = None
+        root._update_eresource(None)
 
     def open_out_stream(self, other=None):
         if other and not isinstance(other, URI):
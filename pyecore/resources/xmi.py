@@ -148,28 +148,36 @@ class XMIResource(Resource):
             eobject.__setattr__(eattribute._name, val)
 
     def _decode_eobject(self, current_node, parent_eobj):
-        eobject_info = self._decode_node(parent_eobj, current_node)
-        feat_container, eobject, eatts, erefs, from_tag = eobject_info
-
-        # deal with eattributes and ereferences
-        for eattribute, value in eatts:
-            self._decode_eattribute_value(eobject, eattribute, value, from_tag)
-
-        if erefs:
-            self._later.append((eobject, erefs))
-
-        if not feat_container:
-            return
+        # iterative depth-first decoding, deep models do not hit the
+        # recursion limit
+        stack = [(current_node, parent_eobj)]
+        pop = stack.pop
+        extend = stack.extend
+        while stack:
+            current_node, parent_eobj = pop()
+            eobject_info = self._decode_node(parent_eobj, current_node)
+            feat_container, eobject, eatts, erefs, from_tag = eobject_info
+
+            # deal with eattributes and ereferences
+            for eattribute, value in eatts:
+                self._decode_eattribute_value(eobject, eattribute, value,
+                                              from_tag)
+
+            if erefs:
+                self._later.append((eobject, erefs))
+
+            if not feat_container:
+                continue
 
-        # attach the new eobject to the parent one
-        if feat_container.many:
-            parent_eobj.__getattribute__(feat_container._name).append(eobject)
-        else:
-            parent_eobj.__setattr__(feat_container._name, eobject)
+            # attach the new eobject to the parent one
+            if feat_container.many:
+                parent_eobj.__getattribute__(feat_container._name) \
+                           .append(eobject)
+            else:
+                parent_eobj.__setattr__(feat_container._name, eobject)
 
-        # iterate on children
-        for child in current_node:
-            self._decode_eobject(child, eobject)
+            # children are decoded next, in the document order
+            extend((child, eobject) for child in reversed(current_node))
 
     def _is_none_node(self, node):
         return f'{{{XSI_URL}}}nil' in node.attrib
@@ -355,16 +363,17 @@ class XMIResource(Resource):
                              False)
         nsmap = {XMI: XMI_URL}
 
-        if len(self.contents) == 1:
-            root = self.contents[0]
-            self.register_eobject_epackage(root)
-            tmp_xmi_root = self._go_across(root, serialize_default)
-        else:
-            tag = QName(XMI_URL, 'XMI')
-            tmp_xmi_root = Element(tag)
-            for root in self.contents:
-                root_node = self._go_across(root, serialize_default)
-                tmp_xmi_root.append(root_node)
+        with self._path_memo():
+            if len(self.contents) == 1:
+                root = self.contents[0]
+                self.register_eobject_epackage(root)
+                tmp_xmi_root = self._go_across(root, serialize_default)
+            else:
+                tag = QName(XMI_URL, 'XMI')
+                tmp_xmi_root = Element(tag)
+                for root in self.contents:
+                    root_node = self._go_across(root, serialize_default)
+                    tmp_xmi_root.append(root_node)
 
         # update nsmap with prefixes register during the nodes creation
         nsmap.update(self.prefixes)
@@ -399,6 +408,19 @@ class XMIResource(Resource):
         return sub
 
     def _go_across(self, obj, serialize_default=False):
+        # iterative serialization: the node of each contained object is
+        # created and attached at its position, then filled later
+        root_node = self._create_node(obj)
+        stack = [(obj, root_node)]
+        pop = stack.pop
+        extend = stack.extend
+        while stack:
+            obj, node = pop()
+            children = self._fill_node(obj, node, serialize_default)
+            extend(reversed(children))
+        return root_node
+
+    def _create_node(self, obj):
         eclass = obj.eClass
         if obj.eContainmentFeature():
             node = Element(obj.eContainmentFeature()._name)
@@ -410,7 +432,10 @@ class XMIResource(Resource):
             nsURI = epackage.nsURI
             tag = QName(nsURI, eclass.name) if nsURI else eclass.name
             node = Element(tag)
+        return node
 
+    def _fill_node(self, obj, node, serialize_default=False):
+        children_nodes = []
         if self.use_uuid:
             self._assign_uuid(obj)
             xmi_id = f'{{{XMI_URL}}}id'
@@ -489,5 +514,7 @@ class XMIResource(Resource):
             else:
                 children = value if feat.many else [value]
                 for child in children:
-                    node.append(self._go_across(child, serialize_default))
-        return node
+                    child_node = self._create_node(child)
+                    node.append(child_node)
+                    children_nodes.append((child, child_node))
+        return children_nodes
@@ -0,0 +1,245 @@
+"""This module provides the containment traversal engine used by PyEcore.
+
+The traversal is iterative: deep containment hierarchies do not consume the
+Python stack and each visited object only costs the computation of its direct
+contents (``EObject.eContents``), which relies on the containment references
+cached by its ``EClass``.
+
+A traversal can start from an ``EObject``, a ``Resource`` (its roots are
+visited), a ``ResourceSet`` (the roots of all its resources are visited) or an
+iterable of ``EObject``:
+
+.. code-block:: python
+
+    from pyecore.traversal import traverse, Order
+
+    for obj in traverse(resource_set, order=Order.BREADTH_FIRST,
+                        max_depth=2):
+        print(obj)
+
+    # Do not enter the content of "Hidden" instances
+    for obj in traverse(root, prune=lambda x: x.eClass.name == 'Hidden'):
+        print(obj)
+"""
+from enum import unique, Enum
+from itertools import chain
+from operator import attrgetter
+
+
+@unique
+class Order(Enum):
+    PRE_ORDER = 0
+    POST_ORDER = 1
+    BREADTH_FIRST = 2
+
+
+def _first_level(start, include_self, contents):
+    if isinstance(start, EObject):
+        if include_self:
+            return [start], 0
+        return contents(start), 1
+    resources = getattr(start, 'resources', None)
+    if resources is not None:  # ResourceSet
+        resources = dict.fromkeys(resources.values())
+        return list(chain.from_iterable(resource.contents
+                                        for resource in resources)), 1
+    contents = getattr(start, 'contents', None)
+    if contents is not None:  # Resource
+        return list(contents), 1
+    if include_self:
+        return list(start), 0
+    return list(chain.from_iterable(contents(x) for x in start)), 1
+
+
+def _pre_order(level, depth, max_depth, prune, contents):
+    stack = [iter(level)]
+    append = stack.append
+    while stack:
+        for obj in stack[-1]:
+            yield obj
+            if depth >= max_depth or (prune and prune(obj)):
+                continue
+            children = contents(obj)
+            if children:
+                append(iter(children))
+                depth += 1
+                break
+        else:
+            stack.pop()
+            depth -= 1
+
+
+def _post_order(level, depth, max_depth, prune, contents):
+    stack = [(None, iter(level))]
+    append = stack.append
+    while stack:
+        for obj in stack[-1][1]:
+            if depth < max_depth and not (prune and prune(obj)):
+                children = contents(obj)
+                if children:
+                    append((obj, iter(children)))
+                    depth += 1
+                    break
+            yield obj
+        else:
+            parent, _ = stack.pop()
+            depth -= 1
+            if stack:
+                yield parent
+
+
+def _breadth_first(level, depth, max_depth, prune, contents):
+    while level:
+        next_level = []
+        extend = next_level.extend
+        for obj in level:
+            yield obj
+            if depth >= max_depth or (prune and prune(obj)):
+                continue
+            extend(contents(obj))
+        level = next_level
+        depth += 1
+
+
+_strategies = {
+    Order.PRE_ORDER: _pre_order,
+    Order.POST_ORDER: _post_order,
+    Order.BREADTH_FIRST: _breadth_first,
+}
+
+
+def _subclasses(eclass):
+    """Gives all the known EClass which are, or inherit from, ``eclass``."""
+    result = {eclass}
+    todo = [eclass.python_class]
+    while todo:
+        for subclass in todo.pop().__subclasses__():
+            subeclass = subclass.__dict__.get('eClass')
+            if isinstance(subeclass, EClass):
+                result.add(subeclass)
+            todo.append(subclass)
+    return result
+
+
+class _TypeIndex(object):
+    """Computes, from the containment references of the metamodels, the
+    containment references that can lead to instances of a given EClass.
+
+    Each EClass met during a traversal is explored once: the classes its
+    instances can contain (directly or transitively) are computed and the
+    containment references that cannot lead to the searched EClass are
+    discarded. The index is kept by the EClass and is recomputed if a
+    metamodel changes.
+    """
+    @classmethod
+    def get(cls, eclass):
+        index = eclass.__dict__.get('_type_index')
+        if index is None or index.epoch != EClass._reflection_epoch:
+            index = eclass.__dict__['_type_index'] = cls(eclass)
+        return index
+
+    def __init__(self, eclass):
+        self.epoch = EClass._reflection_epoch
+        self.target = eclass.python_class
+        self.features = {}
+        self.productive = set()
+
+    def contents(self, obj):
+        eclass = obj.eClass
+        try:
+            features = self.features[eclass]
+        except KeyError:
+            self._explore(eclass)
+            features = self.features[eclass]
+        return obj._eContents_from(features) if features else ()
+
+    def _explore(self, start):
+        features = self.features
+        productive = self.productive
+        target = self.target
+        graph = {}
+        todo = [start]
+        while todo:
+            eclass = todo.pop()
+            if eclass in graph or eclass in features:
+                continue
+            edges = []
+            for feature in eclass._reflection().containments:
+                etype = feature.eType
+                if isinstance(etype, type):
+                    etype = etype.eClass  # static metaclass
+                elif etype is not None:
+                    etype = etype.force_resolve()
+                if not isinstance(etype, EClass):
+                    continue
+                candidates = _subclasses(etype)
+                edges.append((feature, candidates))
+                todo.extend(candidates)
+            graph[eclass] = edges
+            if issubclass(eclass.python_class, target):
+                productive.add(eclass)
+
+        # an EClass is "productive" if it is the searched type or if it can
+        # contain instances of a productive EClass
+        reverse = {}
+        for eclass, edges in graph.items():
+            for _, candidates in edges:
+                for candidate in candidates:
+                    reverse.setdefault(candidate, []).append(eclass)
+        todo = [x for x in reverse if x in productive]
+        while todo:
+            for eclass in reverse.get(todo.pop(), ()):
+                if eclass not in productive:
+                    productive.add(eclass)
+                    todo.append(eclass)
+
+        for eclass, edges in graph.items():
+            features[eclass] = tuple(feature for feature, candidates in edges
+                                     if not productive.isdisjoint(candidates))
+
+
+def traverse(start, order=Order.PRE_ORDER, include_self=False,
+             max_depth=None, prune=None, of_type=None):
+    """Iterates over the containment tree below ``start``.
+
+    :param start: an ``EObject``, a ``Resource``, a ``ResourceSet`` or an
+                  iterable of ``EObject`` the traversal starts from
+    :param order: the visiting ``Order`` (depth-first pre-order by default)
+    :param include_self: if ``True`` and ``start`` is an ``EObject`` (or an
+                         iterable), the starting objects are also yielded
+    :param max_depth: the maximum depth to visit, the direct contents of
+                      ``start`` are at depth 1 (``None`` means no limit)
+    :param prune: a callable taking an ``EObject`` and returning ``True`` if
+                  the content of this object must not be visited (the object
+                  itself is still yielded)
+    :param of_type: an ``EClass`` (or a static metaclass), only its instances
+                    are yielded and the containment references that cannot
+                    lead to such instances, according to the metamodel, are
+                    not visited
+    :return: an iterator over the visited objects
+    """
+    if of_type is None:
+        contents = _eContents
+    else:
+        if isinstance(of_type, type):
+            of_type = of_type.eClass
+        contents = _TypeIndex.get(of_type).contents
+    level, depth = _first_level(start, include_self, contents)
+    if max_depth is None:
+        max_depth = float('inf')
+    elif depth > max_depth:
+        return iter(())
+    result = _strategies[order](level, depth, max_depth, prune, contents)
+    if of_type is None:
+        return result
+    return _filter_type(result, of_type.python_class)
+
+
+def _filter_type(objects, python_class):
+    return (x for x in objects if isinstance(x, python_class))
+
+
+_eContents = attrgetter('eContents')
+
+
+from .ecore import EObject, EClass  # noqa
@@ -1,8 +1,18 @@
 from .ecore import EProxy, EObject, EDataType
-from .notification import Notification, Kind
-from .ordered_set_patch import ordered_set
+from .notification import Notification, Kind, _content_state
+from .ordered_set_patch import ordered_set, IndexedOrderedSet
+from array import array
+from bisect import bisect_left
+from collections import Counter, deque
 from collections.abc import MutableSet, MutableSequence
+from itertools import chain, repeat
 from typing import Iterable
+import warnings
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class BadValueError(TypeError):
@@ -42,10 +52,7 @@ class EcoreUtils(object):
     def get_root(obj):
         if not obj:
             return None
-        previous = obj
-        while previous.eContainer() is not None:
-            previous = previous.eContainer()
-        return previous
+        return obj.eRoot()
 
 
 class PyEcoreValue(object):
@@ -55,117 +62,158 @@ class PyEcoreValue(object):
         self.feature = efeature
         self.is_ref = efeature and efeature.is_reference
         self.is_cont = self.is_ref and efeature.containment
-        self.generic_type = None
 
-    def check(self, value, _isinstance=EcoreUtils.isinstance):
-        feature = self.feature
-        etype = self.generic_type or feature._eType
-        if not etype:
-            try:
-                etype = feature.eGenericType.eRawType
-                self.generic_type = etype
-            except Exception:
-                raise AttributeError(f'Feature {feature} has no type'
-                                     'nor generic')
-        if not _isinstance(value, etype):
-            raise BadValueError(value, etype, feature)
+    def check(self, value):
+        self.feature._check(value)
 
     def _update_container(self, value, previous_value=None):
         if not self.is_cont:
             return
-        if value:
-            resource = value.eResource
-            if resource and value in resource.contents:
-                resource.remove(value)
-            prev_container = value._container
-            prev_feature = value._containment_feature
-            if (prev_container != self.owner
-                    or prev_feature != self.feature) \
-                    and isinstance(prev_container, EObject):
-                prev_container.__dict__[prev_feature._name] \
-                              .remove_or_unset(value)
-            value._container = self.owner
-            value._containment_feature = self.feature
-        if previous_value:
-            previous_value._container = None
-            previous_value._containment_feature = None
+        _update_containment(self.owner, self.feature, value, previous_value)
 
 
 class EValue(PyEcoreValue):
+    """Deprecated, the values of the single-valued features are directly
+    stored in the instances.
+
+    This view only forwards to the feature of ``owner``, it is kept for the
+    code which still creates it.
+    """
     def __init__(self, owner, efeature):
+        warnings.warn('EValue is deprecated, the values of the single-valued '
+                      'features are directly stored in the instances',
+                      DeprecationWarning, stacklevel=2)
         super().__init__(owner, efeature)
-        self._value = efeature.get_default_value()
 
     def remove_or_unset(self, value, update_opposite=True):
         self._set(None, update_opposite)
 
     def _get(self):
-        return self._value
+        return self.feature.__get__(self.owner)
 
     def _set(self, value, update_opposite=True):
-        self.check(value)
-        previous_value = self._value
-        self._value = value
-        owner = self.owner
-        efeature = self.feature
-        notif = Notification(old=previous_value,
-                             new=value,
-                             feature=efeature,
-                             kind=Kind.UNSET if value is None else Kind.SET)
-        owner.notify(notif)
-        owner._isset[efeature] = None
-
-        if not self.is_ref:
-            return
-        self._update_container(value, previous_value)
-        if not update_opposite:
-            return
+        self.feature._set_value(self.owner, value, update_opposite)
 
-        # if there is no opposite, we set inverse relation and return
-        if not efeature.eOpposite:
-            couple = (owner, efeature)
-            if hasattr(value, '_inverse_rels'):
-                if hasattr(previous_value, '_inverse_rels'):
-                    previous_value._inverse_rels.remove(couple)
-                value._inverse_rels.add(couple)
-            elif value is None and hasattr(previous_value, '_inverse_rels'):
-                previous_value._inverse_rels.remove(couple)
-            return
 
-        eOpposite = efeature.eOpposite
-        # if we are in an 'unset' context
-        opposite_name = eOpposite._name
-        if value is None:
-            if previous_value is None:
-                return
-            if eOpposite.many:
-                object.__getattribute__(previous_value, opposite_name) \
-                      .remove(owner, update_opposite=False)
+def _diff(previous, values, ordered=True):
+    """Compares the content of a collection with the ``values`` it must get.
+
+    The n-th occurrence of an element in ``values`` is matched with its n-th
+    occurrence in ``previous``. For the ordered collections, the matched
+    elements that are not part of a longest sequence keeping their relative
+    order are moved.
+
+    :return: the removed elements, the added elements and the moved elements
+             as ``(previous position, element)``
+    """
+    positions = dict(zip(previous, range(len(previous))))
+    new_positions = dict.fromkeys(values)
+    if len(positions) == len(previous) \
+            and len(new_positions) == len(values):
+        # no duplicates, the usual case
+        matched = [positions[x] for x in values if x in positions]
+        added = [x for x in values if x not in positions]
+        removed = [x for x in previous if x not in new_positions]
+    else:
+        occurrences = {}
+        for i, element in enumerate(previous):
+            try:
+                occurrences[element].append(i)
+            except KeyError:
+                occurrences[element] = deque((i,))
+        matched = []
+        added = []
+        for element in values:
+            positions = occurrences.get(element)
+            if positions:
+                matched.append(positions.popleft())
             else:
-                object.__setattr__(previous_value, opposite_name, None)
+                added.append(element)
+        removed = [previous[i] for i in sorted(chain.from_iterable(
+            occurrences.values()))]
+    moved = []
+    if ordered and matched != sorted(matched):
+        stable = _longest_increasing(matched)
+        moved = [(position, previous[position])
+                 for i, position in enumerate(matched) if i not in stable]
+    return removed, added, moved
+
+
+def _longest_increasing(sequence):
+    """Gives the indexes of a longest increasing subsequence."""
+    tails = []
+    tails_indexes = []
+    predecessors = [None] * len(sequence)
+    for i, value in enumerate(sequence):
+        k = bisect_left(tails, value)
+        if k:
+            predecessors[i] = tails_indexes[k - 1]
+        if k == len(tails):
+            tails.append(value)
+            tails_indexes.append(i)
         else:
-            previous_value = value.__getattribute__(opposite_name)
-            if eOpposite.many:
-                previous_value.append(owner, update_opposite=False)
+            tails[k] = value
+            tails_indexes[k] = i
+    result = set()
+    i = tails_indexes[-1] if tails_indexes else None
+    while i is not None:
+        result.add(i)
+        i = predecessors[i]
+    return result
+
+
+def _update_containment(owner, feature, value, previous_value=None):
+    """Updates the container of ``value``, newly contained by ``owner``
+    through the containment ``feature``, and of ``previous_value`` which is
+    not contained anymore.
+    """
+    if _content_state.count:
+        _content_state.epoch += 1
+    if value:
+        prev_container = value._container
+        if prev_container is None and value.eResource:
+            value.eResource.remove(value)
+        prev_feature = value._containment_feature
+        # the new container is set first, the removal from the previous
+        # container then leaves it (and the owning resource) untouched
+        value._container = owner
+        value._containment_feature = feature
+        if (prev_container != owner
+                or prev_feature != feature) \
+                and isinstance(prev_container, EObject):
+            if prev_feature.many:
+                prev_feature._stored(prev_container).remove(value)
             else:
-                # We disable the eOpposite update
-                value.__dict__[opposite_name]. \
-                      _set(owner, update_opposite=False)
+                prev_feature._set_value(prev_container, None)
+        value._update_eresource(owner.eResource)
+    if previous_value and previous_value is not value \
+            and previous_value._container is owner \
+            and previous_value._containment_feature is feature:
+        previous_value._container = None
+        previous_value._containment_feature = None
+        previous_value._update_eresource(None)
 
 
 class ECollection(PyEcoreValue):
     @staticmethod
     def create(owner, feature):
+        return ECollection.collection_class(feature)(owner, feature)
+
+    @staticmethod
+    def collection_class(feature):
+        """Gives the collection class used for the values of ``feature``."""
         if feature.derived:
-            return EDerivedCollection(owner, feature)
+            return EDerivedCollection
         elif feature.ordered and feature.unique:
-            return EOrderedSet(owner, feature)
+            return EOrderedSet
         elif feature.ordered and not feature.unique:
-            return EList(owner, feature)
+            if EArrayList.typecode_of(feature):
+                return EArrayList
+            return EList
         elif feature.unique:
-            return ESet(owner, feature)
+            return ESet
         else:
-            return EBag(owner, feature)  # see for better implem
+            return EBag
 
     def __init__(self, owner, efeature):
         super().__init__(owner, efeature)
@@ -176,6 +224,240 @@ class ECollection(PyEcoreValue):
     def _get(self):
         return self
 
+    def _position(self, value):
+        return self.index(value)
+
+    def _at(self, index):
+        return self[index]
+
+    def _attach_all(self, values):
+        """Updates the containers and the opposites of the ``values`` which
+        are added to the collection. The values are removed from their
+        previous container in one go per container.
+        """
+        owner = self.owner
+        feature = self.feature
+        if self.is_cont:
+            if _content_state.count:
+                _content_state.epoch += 1
+            moved = {}
+            for value in values:
+                prev_container = value._container
+                if prev_container is None and value.eResource:
+                    value.eResource.remove(value)
+                prev_feature = value._containment_feature
+                value._container = owner
+                value._containment_feature = feature
+                if (prev_container is not owner
+                        or prev_feature is not feature) \
+                        and isinstance(prev_container, EObject):
+                    moved.setdefault((prev_container, prev_feature),
+                                     []).append(value)
+            for (container, prev_feature), group in moved.items():
+                if prev_feature.many:
+                    prev_feature._stored(container).remove_all(group)
+                else:
+                    prev_feature._set_value(container, None)
+            resource = owner.eResource
+            for value in values:
+                value._update_eresource(resource)
+        eOpposite = feature.eOpposite
+        if not eOpposite:
+            couple = (owner, feature)
+            for value in values:
+                value._inverse_rels.add(couple)
+        elif eOpposite.many:
+            eOpposite._check(owner)
+            name = eOpposite._name
+            unique = eOpposite.unique
+            stored = eOpposite._stored
+            for value in values:
+                try:
+                    collection = stored(value)
+                except KeyError:
+                    collection = value.__getattribute__(name)
+                else:
+                    if unique and owner in collection:
+                        continue
+                collection._raw_add(owner)
+                value._isset[eOpposite] = None
+                if value._observed():
+                    value.notify(Notification(new=owner, feature=eOpposite,
+                                              kind=Kind.ADD))
+        else:
+            set_value = eOpposite._set_value
+            for value in values:
+                set_value(value, owner, update_opposite=False)
+
+    def _detach_all(self, values, update_opposite=True):
+        """Updates the containers and the opposites of the ``values`` which
+        are removed from the collection.
+        """
+        owner = self.owner
+        feature = self.feature
+        if self.is_cont:
+            if _content_state.count:
+                _content_state.epoch += 1
+            for value in values:
+                if value._container is owner \
+                        and value._containment_feature is feature:
+                    value._container = None
+                    value._containment_feature = None
+                    value._update_eresource(None)
+        if not update_opposite:
+            return
+        eOpposite = feature.eOpposite
+        if not eOpposite:
+            couple = (owner, feature)
+            for value in values:
+                value._inverse_rels.discard(couple)
+        elif eOpposite.many:
+            name = eOpposite._name
+            for value in values:
+                value.__getattribute__(name).remove(owner, False)
+        else:
+            set_value = eOpposite._set_value
+            for value in values:
+                set_value(value, None, update_opposite=False)
+
+    def _bulk_values(self, values):
+        values = list(values)
+        if self.feature.unique:
+            values = list(dict.fromkeys(values))
+        check = self.feature._check
+        for value in values:
+            check(value)
+        return values
+
+    def extend_bulk(self, values):
+        """Adds all the ``values`` at the end of the collection.
+
+        The values are all checked before the collection is modified, the
+        containers and the opposites are updated in one pass and a single
+        ``ADD_MANY`` notification is sent for the owner. The values already
+        in a unique collection are ignored.
+        """
+        values = self._bulk_values(values)
+        if self.feature.unique:
+            values = [x for x in values if x not in self]
+        if not values:
+            return
+        if self.is_ref:
+            self._attach_all([x for x in values if x is not None])
+        self._add_all(values)
+        owner = self.owner
+        owner._isset[self.feature] = None
+        if owner._observed():
+            owner.notify(Notification(new=values, feature=self.feature,
+                                      kind=Kind.ADD_MANY))
+
+    def remove_all(self, values, update_opposite=True):
+        """Removes all the ``values`` from the collection, the values that
+        are not in the collection are ignored.
+
+        The containers and the opposites are updated in one pass and a single
+        ``REMOVE_MANY`` notification is sent for the owner.
+        """
+        removed = self._remove_all(list(values))
+        if not removed:
+            return
+        if self.is_ref:
+            self._detach_all([x for x in removed if x is not None],
+                             update_opposite)
+        owner = self.owner
+        if owner._observed():
+            owner.notify(Notification(old=removed, new=[],
+                                      feature=self.feature,
+                                      kind=Kind.REMOVE_MANY))
+
+    def _assign(self, values):
+        """Updates the collection so that its content becomes ``values``.
+
+        This is the assignment of a many-valued feature. Only the differences
+        with the current content are applied: the removed elements are
+        detached, the new ones are attached, the other ones are left
+        untouched. The notifications are a ``REMOVE``/``REMOVE_MANY`` for the
+        removed elements, an ``ADD``/``ADD_MANY`` for the new ones and, for
+        the ordered collections, a ``MOVE`` (with the previous position as
+        old value) for each element whose relative position changed.
+        """
+        feature = self.feature
+        values = list(values)
+        if feature.unique:
+            values = list(dict.fromkeys(values))
+        previous = list(self)
+        owner = self.owner
+        try:
+            removed, added, moved = _diff(previous, values, feature.ordered)
+        except TypeError:  # unhashable values
+            self.clear()
+            self.extend(values)
+            return
+        check = feature._check
+        for value in added:  # the other values are already checked
+            check(value)
+        owner._isset[feature] = None
+        if not (removed or added or moved):
+            return
+        if self.is_ref:
+            remaining = set(values)
+            self._detach_all([x for x in dict.fromkeys(removed)
+                              if x is not None and x not in remaining])
+            kept = set(previous)
+            self._attach_all([x for x in dict.fromkeys(added)
+                              if x is not None and x not in kept])
+        self._remove_all(previous)
+        self._add_all(values)
+        if not owner._observed():
+            return
+        notify = owner.notify
+        if len(removed) == 1:
+            notify(Notification(old=removed[0], feature=feature,
+                                kind=Kind.REMOVE))
+        elif removed:
+            notify(Notification(old=removed, new=[], feature=feature,
+                                kind=Kind.REMOVE_MANY))
+        if len(added) == 1:
+            notify(Notification(new=added[0], feature=feature,
+                                kind=Kind.ADD))
+        elif added:
+            notify(Notification(new=added, feature=feature,
+                                kind=Kind.ADD_MANY))
+        for position, value in moved:
+            notify(Notification(old=position, new=value, feature=feature,
+                                kind=Kind.MOVE))
+
+    def replace_all(self, values):
+        """Replaces the content of the collection by ``values``.
+
+        The notifications are the ones of a ``clear()`` followed by an
+        ``extend(...)``, but the values which stay in the collection are not
+        detached and re-attached to the owner.
+        """
+        values = self._bulk_values(values)
+        previous = list(self)
+        if self.is_ref:
+            kept = set(previous)
+            added = set(values)
+            self._detach_all([x for x in previous
+                              if x is not None and x not in added])
+            self._attach_all([x for x in values
+                              if x is not None and x not in kept])
+        self._remove_all(previous)
+        self._add_all(values)
+        owner = self.owner
+        if values:
+            owner._isset[self.feature] = None
+        if not owner._observed():
+            return
+        if previous:
+            owner.notify(Notification(old=previous, new=[],
+                                      feature=self.feature,
+                                      kind=Kind.REMOVE_MANY))
+        if values:
+            owner.notify(Notification(new=values, feature=self.feature,
+                                      kind=Kind.ADD_MANY))
+
     def _update_opposite(self, owner, new_value, remove=False):
         eOpposite = self.feature.eOpposite
         if not eOpposite:
@@ -193,9 +475,7 @@ class ECollection(PyEcoreValue):
             owner.__getattribute__(opposite_name).remove(new_value, False)
         else:
             new_value = None if remove else new_value
-            owner.__getattribute__(opposite_name)  # Force load
-            owner.__dict__[opposite_name] \
-                 ._set(new_value, update_opposite=False)
+            eOpposite._set_value(owner, new_value, update_opposite=False)
 
     def remove(self, value, update_opposite=True):
         if self.is_ref:
@@ -203,9 +483,10 @@ class ECollection(PyEcoreValue):
             if update_opposite:
                 self._update_opposite(value, self.owner, remove=True)
         super().remove(value)
-        self.owner.notify(Notification(old=value,
-                                       feature=self.feature,
-                                       kind=Kind.REMOVE))
+        if self.owner._observed():
+            self.owner.notify(Notification(old=value,
+                                           feature=self.feature,
+                                           kind=Kind.REMOVE))
 
     def insert(self, i, y):
         self.check(y)
@@ -213,9 +494,10 @@ class ECollection(PyEcoreValue):
             self._update_container(y)
             self._update_opposite(y, self.owner)
         super().insert(i, y)
-        self.owner.notify(Notification(new=y,
-                                       feature=self.feature,
-                                       kind=Kind.ADD))
+        if self.owner._observed():
+            self.owner.notify(Notification(new=y,
+                                           feature=self.feature,
+                                           kind=Kind.ADD))
         self.owner._isset[self.feature] = None
 
     def pop(self, index=-1):
@@ -223,9 +505,10 @@ class ECollection(PyEcoreValue):
         if self.is_ref:
             self._update_container(None, previous_value=value)
             self._update_opposite(value, self.owner, remove=True)
-        self.owner.notify(Notification(old=value,
-                                       feature=self.feature,
-                                       kind=Kind.REMOVE))
+        if self.owner._observed():
+            self.owner.notify(Notification(old=value,
+                                           feature=self.feature,
+                                           kind=Kind.REMOVE))
         return value
 
     def clear(self):
@@ -237,6 +520,9 @@ class ECollection(PyEcoreValue):
             for value in self:
                 self._update_container(None, previous_value=value)
                 self._update_opposite(value, self.owner, remove=True)
+        if not self.owner._observed():
+            super().clear()
+            return
         notif = Notification(old=list(self), new=[], feature=self.feature,
                              kind=Kind.REMOVE_MANY)
         super().clear()
@@ -259,6 +545,25 @@ class ECollection(PyEcoreValue):
 class EList(ECollection, list):
     def __init__(self, owner, efeature=None):
         super().__init__(owner, efeature)
+        self._positions = None
+
+    def _position(self, value):
+        # Positions are indexed lazily and validated on each lookup, any
+        # modification that is not an append makes the index stale.
+        positions = self._positions
+        if positions is not None:
+            i = positions.get(value)
+            if i is not None and i < len(self) and self[i] is value:
+                return i
+        positions = {}
+        setdefault = positions.setdefault
+        for i, element in enumerate(self):
+            setdefault(element, i)
+        self._positions = positions
+        try:
+            return positions[value]
+        except KeyError:
+            raise ValueError(f'{value} is not in list')
 
     def append(self, value, update_opposite=True):
         self.check(value)
@@ -267,9 +572,12 @@ class EList(ECollection, list):
             if update_opposite:
                 self._update_opposite(value, self.owner)
         super().append(value)
-        self.owner.notify(Notification(new=value,
-                                       feature=self.feature,
-                                       kind=Kind.ADD))
+        if self._positions is not None:
+            self._positions.setdefault(value, len(self) - 1)
+        if self.owner._observed():
+            self.owner.notify(Notification(new=value,
+                                           feature=self.feature,
+                                           kind=Kind.ADD))
         self.owner._isset[self.feature] = None
 
     def extend(self, sublist):
@@ -287,13 +595,44 @@ class EList(ECollection, list):
                 check(value)
 
         super().extend(sublist)
-        self.owner.notify(Notification(new=sublist,
-                                       feature=self.feature,
-                                       kind=Kind.ADD_MANY))
+        if self.owner._observed():
+            self.owner.notify(Notification(new=sublist,
+                                           feature=self.feature,
+                                           kind=Kind.ADD_MANY))
         self.owner._isset[self.feature] = None
 
     update = extend
 
+    _raw_add = list.append
+
+    def _add_all(self, values):
+        list.extend(self, values)
+        self._positions = None
+
+    def _remove_all(self, values):
+        removed = []
+        try:
+            counts = Counter(values)
+            kept = []
+            for element in self:
+                count = counts.get(element)
+                if count:
+                    counts[element] = count - 1
+                    removed.append(element)
+                else:
+                    kept.append(element)
+        except TypeError:  # unhashable values
+            for value in values:
+                if value in self:
+                    list.remove(self, value)
+                    removed.append(value)
+            kept = None
+        if removed and kept is not None:
+            list.clear(self)
+            list.extend(self, kept)
+        self._positions = None
+        return removed
+
     def __setitem__(self, i, y):
         is_collection = isinstance(y, Iterable)
         if isinstance(i, slice) and is_collection:
@@ -330,16 +669,13 @@ class EList(ECollection, list):
             kind = Kind.ADD_MANY
         elif is_collection:
             y = y[0] if y else y
-        self.owner.notify(Notification(new=y,
-                                       feature=self.feature,
-                                       kind=kind))
+        if self.owner._observed():
+            self.owner.notify(Notification(new=y,
+                                           feature=self.feature,
+                                           kind=kind))
         self.owner._isset[self.feature] = None
 
 
-class EBag(EList):
-    pass
-
-
 class EAbstractSet(ECollection):
     def __init__(self, owner, efeature=None):
         super().__init__(owner, efeature)
@@ -352,9 +688,10 @@ class EAbstractSet(ECollection):
             if update_opposite:
                 self._update_opposite(value, self.owner)
         super().add(value)
-        self.owner.notify(Notification(new=value,
-                                       feature=self.feature,
-                                       kind=Kind.ADD))
+        if self.owner._observed():
+            self.owner.notify(Notification(new=value,
+                                           feature=self.feature,
+                                           kind=Kind.ADD))
         self.owner._isset[self.feature] = None
 
     append = add
@@ -373,16 +710,30 @@ class EAbstractSet(ECollection):
                 check(value)
                 add(value)
         self.owner._isset[self.feature] = None
-        self.owner.notify(Notification(new=others,
-                                       feature=self.feature,
-                                       kind=Kind.ADD_MANY))
+        if self.owner._observed():
+            self.owner.notify(Notification(new=others,
+                                           feature=self.feature,
+                                           kind=Kind.ADD_MANY))
     extend = update
 
 
-class EOrderedSet(EAbstractSet, ordered_set.OrderedSet):
+class EOrderedSet(EAbstractSet, IndexedOrderedSet):
     def __init__(self, owner, efeature=None):
         super().__init__(owner, efeature)
-        ordered_set.OrderedSet.__init__(self)
+        IndexedOrderedSet.__init__(self)
+
+    _raw_add = IndexedOrderedSet.add
+
+    def _add_all(self, values):
+        IndexedOrderedSet._extend_new(self, values)
+
+    def _remove_all(self, values):
+        values = set(values)
+        items = self.items
+        removed = [x for x in items if x in values]
+        if removed:
+            self._update_items([x for x in items if x not in values])
+        return removed
 
     def copy(self):
         return ordered_set.OrderedSet(self)
@@ -392,10 +743,473 @@ class EOrderedSet(EAbstractSet, ordered_set.OrderedSet):
         return ordered_set.OrderedSet(sublist)
 
 
-class ESet(EOrderedSet):
+class _HashedSet(MutableSet):
+    """The storage of the unordered unique collections, a dict keeps the
+    elements in their insertion order for the serializations.
+    """
+    def __init__(self):
+        self._items = {}
+        self._order = None
+
+    def __contains__(self, value):
+        return value in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, value):
+        self._items[value] = None
+        self._order = None
+
+    _raw_add = add
+
+    def discard(self, value):
+        if value in self._items:
+            del self._items[value]
+            self._order = None
+
+    def clear(self):
+        self._items.clear()
+        self._order = None
+
+    def _add_all(self, values):
+        self._items.update(dict.fromkeys(values))
+        self._order = None
+
+    def _remove_all(self, values):
+        items = self._items
+        removed = [x for x in dict.fromkeys(values) if x in items]
+        for value in removed:
+            del items[value]
+        self._order = None
+        return removed
+
+
+class _HashedBag(object):
+    """The storage of the unordered non-unique collections, the number of
+    occurrences of each element is kept in a dict. The unhashable elements
+    (e.g. lists held by an ``EJavaObject`` attribute) are kept in a list.
+    """
+    __hash__ = None
+
+    def __init__(self):
+        self._items = {}
+        self._others = []
+        self._len = 0
+        self._order = None
+
+    def __contains__(self, value):
+        try:
+            return value in self._items
+        except TypeError:
+            return value in self._others
+
+    def __iter__(self):
+        return chain(chain.from_iterable(repeat(value, count)
+                                         for value, count
+                                         in self._items.items()),
+                     self._others)
+
+    def __len__(self):
+        return self._len
+
+    def __eq__(self, other):
+        if isinstance(other, _HashedBag):
+            if self._items != other._items:
+                return False
+            other = other._others
+        else:
+            try:
+                other = list(other)
+            except TypeError:
+                return False
+            hashable = []
+            unhashable = []
+            for value in other:
+                try:
+                    hash(value)
+                    hashable.append(value)
+                except TypeError:
+                    unhashable.append(value)
+            if Counter(self._items) != Counter(hashable):
+                return False
+            other = unhashable
+        remaining = list(other)
+        for value in self._others:
+            try:
+                remaining.remove(value)
+            except ValueError:
+                return False
+        return not remaining
+
+    def count(self, value):
+        try:
+            return self._items.get(value, 0)
+        except TypeError:
+            return self._others.count(value)
+
+    def add(self, value):
+        items = self._items
+        try:
+            items[value] = items.get(value, 0) + 1
+        except TypeError:
+            self._others.append(value)
+        self._len += 1
+        self._order = None
+
+    _raw_add = add
+
+    def remove(self, value):
+        items = self._items
+        try:
+            count = items.get(value)
+        except TypeError:
+            self._others.remove(value)
+            count = None
+        else:
+            if not count:
+                raise ValueError(f'{value} is not in bag')
+            if count == 1:
+                del items[value]
+            else:
+                items[value] = count - 1
+        self._len -= 1
+        self._order = None
+
+    def discard(self, value):
+        if value in self:
+            _HashedBag.remove(self, value)
+
+    def clear(self):
+        self._items.clear()
+        self._others.clear()
+        self._len = 0
+        self._order = None
+
+    def _add_all(self, values):
+        add = _HashedBag.add
+        for value in values:
+            add(self, value)
+
+    def _remove_all(self, values):
+        removed = []
+        contains = _HashedBag.__contains__
+        remove = _HashedBag.remove
+        for value in values:
+            if contains(self, value):
+                remove(self, value)
+                removed.append(value)
+        return removed
+
+
+class _Unordered(object):
+    """The unordered collections have no positional API. The positions of
+    their elements, following the iteration order, are only computed for
+    the URI fragments of the contained objects.
+    """
+    def _ordered(self):
+        order = self._order
+        if order is None:
+            elements = list(self)
+            positions = {}
+            setdefault = positions.setdefault
+            for i, element in enumerate(elements):
+                try:
+                    setdefault(element, i)
+                except TypeError:
+                    pass  # unhashable values are never contained objects
+            order = self._order = (elements, positions)
+        return order
+
+    def _position(self, value):
+        try:
+            return self._ordered()[1][value]
+        except KeyError:
+            raise ValueError(f'{value} is not in collection')
+
+    def _at(self, index):
+        return self._ordered()[0][index]
+
+    def insert(self, index, value):
+        raise AttributeError('Operation not permited for unordered '
+                             f'"{self.feature.name}" feature')
+
+    def pop(self):
+        """Removes and gives an arbitrary element."""
+        for value in self:
+            break
+        else:
+            raise KeyError('pop from an empty collection')
+        self.remove(value)
+        return value
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({list(self)!r})'
+
+
+class ESet(_Unordered, EAbstractSet, _HashedSet):
     pass
 
 
+class EBag(_Unordered, EAbstractSet, _HashedBag):
+    pass
+
+
+class EArrayList(ECollection, MutableSequence):
+    """The collection of the ordered non-unique numeric attributes (the
+    attributes whose type is an ``EDataType`` of ``int`` or ``float``).
+
+    The values are stored unboxed in an ``array.array`` (``'q'`` for the
+    integers, ``'d'`` for the floats) which can be accessed through the
+    buffer protocol (``memoryview(collection.array)``) or viewed as a NumPy
+    array without copy (``collection.numpy()``). The bulk operations
+    (``extend(...)``, assignment) check and convert the values at once and
+    send a single notification. The values an array cannot hold (e.g.
+    ``None`` or very large integers) make the collection fall back to a
+    ``list`` storage.
+    """
+    _TYPECODES = {int: 'q', float: 'd'}
+
+    @staticmethod
+    def typecode_of(feature):
+        """Gives the array typecode to use for the values of ``feature``,
+        ``None`` if the feature is not a numeric attribute.
+        """
+        etype = feature._eType
+        if feature.is_reference or etype.__class__ is not EDataType:
+            return None
+        return EArrayList._TYPECODES.get(etype.eType)
+
+    def __init__(self, owner, efeature=None):
+        super().__init__(owner, efeature)
+        self.typecode = self.typecode_of(efeature)
+        self._values = array(self.typecode)
+
+    @property
+    def array(self):
+        """The ``array.array`` holding the values. Modifying it directly
+        bypasses the type checks and the notifications.
+        """
+        if not self.typecode:
+            raise TypeError(f'The values of "{self.feature.name}" are not '
+                            'stored in an array')
+        return self._values
+
+    def __buffer__(self, flags):
+        return memoryview(self.array)
+
+    def numpy(self):
+        """Gives a NumPy view, without copy, of the values. The view must be
+        released before values are added.
+        """
+        if numpy is None:
+            raise ImportError('NumPy is required for the NumPy views')
+        return numpy.frombuffer(self.array, dtype=self.typecode)
+
+    def _to_list(self):
+        self._values = self._values.tolist()
+        self.typecode = None
+
+    def _convert(self, values):
+        """Checks ``values`` and converts them for the storage."""
+        typecode = self.typecode
+        if typecode:
+            if isinstance(values, array) and values.typecode == typecode:
+                return array(typecode, values)
+            if numpy is not None and isinstance(values, numpy.ndarray) \
+                    and values.dtype.kind == ('i' if typecode == 'q'
+                                              else 'f'):
+                return array(typecode, values.astype(typecode).tobytes())
+        values = list(values)
+        python_type = self.feature._eType.eType
+        if set(map(type, values)) - {python_type}:
+            check = self.feature._check
+            for value in values:
+                check(value)
+        if typecode:
+            try:
+                return array(typecode, values)
+            except (TypeError, OverflowError):
+                self._to_list()
+        return values
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __reversed__(self):
+        return reversed(self._values)
+
+    def __contains__(self, value):
+        try:
+            return value in self._values
+        except TypeError:
+            return False
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._values[index])
+        return self._values[index]
+
+    def __eq__(self, other):
+        if isinstance(other, EArrayList):
+            other = other._values
+        elif not isinstance(other, (list, tuple, array)):
+            return NotImplemented
+        return len(self._values) == len(other) \
+            and all(a == b for a, b in zip(self._values, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({list(self._values)!r})'
+
+    def __add__(self, other):
+        return list(self._values) + list(other)
+
+    def copy(self):
+        return list(self._values)
+
+    def index(self, value, *args):
+        return self._values.index(value, *args)
+
+    def count(self, value):
+        return self._values.count(value)
+
+    def reverse(self):
+        self._values.reverse()
+
+    def sort(self, key=None, reverse=False):
+        values = sorted(self._values, key=key, reverse=reverse)
+        self._values[:] = self._store_type(values)
+
+    def _store_type(self, values):
+        return array(self.typecode, values) if self.typecode else values
+
+    def _notify(self, kind, old=None, new=None):
+        owner = self.owner
+        if owner._observed():
+            owner.notify(Notification(old=old, new=new, feature=self.feature,
+                                      kind=kind))
+
+    def append(self, value, update_opposite=True):
+        self.check(value)
+        try:
+            self._values.append(value)
+        except (TypeError, OverflowError):
+            self._to_list()
+            self._values.append(value)
+        self._notify(Kind.ADD, new=value)
+        self.owner._isset[self.feature] = None
+
+    def insert(self, index, value):
+        self.check(value)
+        try:
+            self._values.insert(index, value)
+        except (TypeError, OverflowError):
+            self._to_list()
+            self._values.insert(index, value)
+        self._notify(Kind.ADD, new=value)
+        self.owner._isset[self.feature] = None
+
+    def extend(self, values):
+        values = self._convert(values)
+        if not self.typecode and isinstance(values, array):
+            values = values.tolist()
+        self._values.extend(values)
+        if self.owner._observed():
+            self._notify(Kind.ADD_MANY, new=list(values))
+        self.owner._isset[self.feature] = None
+
+    update = extend
+    extend_bulk = extend
+
+    def remove(self, value, update_opposite=True):
+        self._values.remove(value)
+        self._notify(Kind.REMOVE, old=value)
+
+    def pop(self, index=-1):
+        value = self._values.pop(index)
+        self._notify(Kind.REMOVE, old=value)
+        return value
+
+    def clear(self):
+        if not self._values:
+            return
+        old = list(self._values) if self.owner._observed() else None
+        del self._values[:]
+        self._notify(Kind.REMOVE_MANY, old=old, new=[])
+
+    def __delitem__(self, index):
+        old = self._values[index]
+        del self._values[index]
+        if isinstance(index, slice):
+            self._notify(Kind.REMOVE_MANY, old=list(old), new=[])
+        else:
+            self._notify(Kind.REMOVE, old=old)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            values = self._convert(value)
+            old = list(self._values[index])
+            if not self.typecode and isinstance(values, array):
+                values = values.tolist()
+            self._values[index] = values
+            if len(old) > 1:
+                self._notify(Kind.REMOVE_MANY, old=old)
+            elif old:
+                self._notify(Kind.REMOVE, old=old[0])
+            if len(values) > 1:
+                self._notify(Kind.ADD_MANY, new=list(values))
+            elif values:
+                self._notify(Kind.ADD, new=values[0])
+        else:
+            self.check(value)
+            try:
+                self._values[index] = value
+            except (TypeError, OverflowError):
+                self._to_list()
+                self._values[index] = value
+            self._notify(Kind.ADD, new=value)
+        self.owner._isset[self.feature] = None
+
+    def _add_all(self, values):
+        self._values.extend(self._store_type(values)
+                            if self.typecode else values)
+
+    def _remove_all(self, values):
+        kept = list(self._values)
+        removed = EList._remove_all(kept, values)
+        self._values = self._store_type(kept)
+        return removed
+
+    def _assign(self, values):
+        """The values are replaced at once, ``REMOVE_MANY`` and ``ADD_MANY``
+        are sent if the content changes.
+        """
+        values = self._convert(values)
+        previous = self._values
+        self.owner._isset[self.feature] = None
+        if len(previous) == len(values) \
+                and all(a == b for a, b in zip(previous, values)):
+            return
+        if not self.typecode and isinstance(values, array):
+            values = values.tolist()
+        self._values = values
+        if self.owner._observed():
+            if previous:
+                self._notify(Kind.REMOVE_MANY, old=list(previous), new=[])
+            if values:
+                self._notify(Kind.ADD_MANY, new=list(values))
+
+    replace_all = _assign
+
+
 class EDerivedCollection(MutableSet, MutableSequence, ECollection):
     @classmethod
     def create(cls, owner, feature=None):
@@ -404,6 +1218,10 @@ class EDerivedCollection(MutableSet, MutableSequence, ECollection):
     def __init__(self, owner, feature=None):
         super().__init__(owner, feature)
 
+    def _assign(self, values):
+        self.clear()
+        self.extend(values)
+
     def __delitem__(self, index):
         raise AttributeError('Operation not permited '
                              f'for "{self.feature.name}" feature')
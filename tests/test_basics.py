@@ -97,9 +97,9 @@ def test_eattribute_etype():
 def test_eobject_egetset_badtype():
     eattribute = EAttribute('eatt')
     with pytest.raises(TypeError):
-        eattribute.eGet(4)
+        eattribute.eGet(4.0)
     with pytest.raises(TypeError):
-        eattribute.eSet(4, 4)
+        eattribute.eSet(4.0, 4)
 
 
 def test_eobject_eget_simple():
@@ -336,6 +336,56 @@ def test_allinstances_ecore():
     assert EInt in EDataType.allInstances()
 
 
+def test_allinstances_subtypes_only():
+    A = EClass('A')
+    B = EClass('B', superclass=(A,))
+    C = EClass('C')
+    a, b, c = A(), B(), C()
+    assert set(A.allInstances()) == {a, b}
+    assert set(B.allInstances()) == {b}
+    assert set(C.allInstances()) == {c}
+
+
+def test_allinstances_registry_disabled():
+    from pyecore.ecore import extents
+    from pyecore.resources import ResourceSet
+    A = EClass('A')
+    A.eStructuralFeatures.append(EReference('children', A, upper=-1,
+                                            containment=True))
+    a1 = A()
+    with extents.disabled():
+        a2 = A()
+        a3 = A()
+        a2.children.append(a3)
+        rset = ResourceSet()
+        resource = rset.create_resource('http://test_disabled')
+        resource.append(a2)
+        assert set(A.allInstances(resources=(resource,))) == {a2, a3}
+        with pytest.raises(RuntimeError):
+            list(A.allInstances())
+    assert extents.enabled
+    assert set(A.allInstances()) == {a1}
+
+
+def test_allinstances_registry_does_not_keep_classes():
+    import gc
+    import weakref
+    from pyecore.ecore import extents
+    A = EClass('A')
+    a = A()
+    assert list(A.allInstances()) == [a]
+    python_class = A.python_class
+    del a
+    gc.collect()
+    assert list(A.allInstances()) == []
+    assert python_class not in extents._extents  # empty extent dropped
+    A()
+    collected = weakref.ref(python_class)
+    del A, python_class
+    gc.collect()
+    assert collected() is None
+
+
 def test_eobject_egetset_badtype_exception():
     A = EClass('A')
     name_attribute = EAttribute('name', EProxy(wrapped=EString))
@@ -403,3 +453,72 @@ def test_container_ereference():
     assert ref1.container is False
     assert ref2.container is True
     assert ref2.containment is False
+
+
+def test_eobject_lazy_bookkeeping():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('name', EString))
+    A.eStructuralFeatures.append(EReference('toa', A))
+    a1, a2 = A(), A()
+    for name in ('_isset', '_inverse_rels', '_listeners', '_container'):
+        assert name not in a1.__dict__
+    assert not a1.eIsSet('name')
+    assert '_isset' not in a1.__dict__
+    assert a1.eContainer() is None and a1.eResource is None
+
+    a1.name = 'a1'
+    a1.toa = a2
+    assert a1.eIsSet('name')
+    assert (a1, A.findEStructuralFeature('toa')) in a2._inverse_rels
+    assert '_listeners' not in a1.__dict__
+    assert a1.listeners == []
+    a1.listeners.append(object())
+    assert len(a1.listeners) == 1
+
+
+def test_eobject_feature_ids():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('name', EString))
+    A.eStructuralFeatures.append(EAttribute('age', EInt))
+    B = EClass('B', superclass=(A,))
+    B.eStructuralFeatures.append(EReference('toa', A))
+    name, age = A.eStructuralFeatures
+    toa = B.findEStructuralFeature('toa')
+
+    assert A.getFeatureCount() == 2
+    assert B.getFeatureCount() == 3
+    assert A.getFeatureID(name) == B.getFeatureID(name) == 0
+    assert A.getFeatureID(age) == B.getFeatureID(age) == 1
+    assert B.getFeatureID(toa) == 2
+    assert A.getFeatureID(toa) == -1
+    assert B.getEStructuralFeature(2) is toa
+    assert B.getEStructuralFeature('toa') is toa
+
+    a, b = A(), B()
+    assert not b.eIsSet(0)
+    b.eSet(0, 'b')
+    b.eSet(2, a)
+    assert b.eIsSet(0) and not b.eIsSet(1)
+    assert b.eGet(0) == 'b' and b.name == 'b'
+    assert b.eGet(2) is a
+    with pytest.raises(IndexError):
+        a.eGet(2)
+    with pytest.raises(IndexError):
+        b.eGet(-1)  # -1 is the ID of the features not in the EClass
+    with pytest.raises(IndexError):
+        b.eSet(-1, a)
+    with pytest.raises(IndexError):
+        b.eIsSet(-3)
+    with pytest.raises(IndexError):
+        B.getEStructuralFeature(-1)
+    with pytest.raises(ValueError):
+        b.eGet(True)
+    with pytest.raises(ValueError):
+        b.eSet(False, 'b')
+    with pytest.raises(ValueError):
+        b.eIsSet(False)
+    assert b.name == 'b'
+
+    B.eStructuralFeatures.insert(0, EAttribute('first', EString))
+    assert B.getFeatureID(name) == 0
+    assert B.getFeatureID(B.findEStructuralFeature('first')) == 2
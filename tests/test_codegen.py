@@ -0,0 +1,219 @@
+import sys
+import importlib
+import pytest
+from pyecore.ecore import *
+from pyecore.codegen import generate, generate_code, main
+
+
+@pytest.fixture(scope='module')
+def metamodel():
+    root = EPackage('genroot', nsURI='http://genroot/1.0', nsPrefix='genroot')
+    sub = EPackage('gensub', nsURI='http://gensub/1.0', nsPrefix='gensub')
+    root.eSubpackages.append(sub)
+
+    Kind = EEnum('Kind', literals=['small', 'big'])
+    Kind.big.value = 10
+    Named = EClass('Named', abstract=True)
+    Named.eStructuralFeatures.append(EAttribute('name', EString))
+    Container = EClass('Container', superclass=(Named,))
+    Container.eStructuralFeatures.append(EAttribute('kind', Kind))
+    Container.eStructuralFeatures.append(EAttribute('values', EInt,
+                                                    upper=-1))
+    Container.eStructuralFeatures.append(EAttribute('class', EString))
+    x = EParameter('x', EInt, required=True)
+    Container.eOperations.append(EOperation('compute', EInt, params=(x,)))
+    root.eClassifiers.extend([Kind, Named, Container])
+
+    Element = EClass('Element', superclass=(Named,))
+    Element.eStructuralFeatures.append(EAttribute('kind', Kind))
+    sub.eClassifiers.append(Element)
+
+    elements = EReference('elements', Element, upper=-1, containment=True)
+    parent = EReference('parent', Container, eOpposite=elements)
+    Container.eStructuralFeatures.append(elements)
+    Element.eStructuralFeatures.append(parent)
+    Element.eStructuralFeatures.append(EReference('next', Element))
+    return root
+
+
+@pytest.fixture(scope='module')
+def generated(metamodel, tmp_path_factory):
+    folder = tmp_path_factory.mktemp('generated')
+    generate(metamodel, folder)
+    sys.path.insert(0, str(folder))
+    try:
+        yield importlib.import_module('genroot')
+    finally:
+        sys.path.remove(str(folder))
+        for name in [x for x in sys.modules if x.startswith('genroot')]:
+            del sys.modules[name]
+
+
+def test_codegen_files(metamodel):
+    files = {str(path).replace('\\', '/') for path in generate_code(metamodel)}
+    assert files == {'genroot/__init__.py', 'genroot/genroot.py',
+                     'genroot/gensub/__init__.py', 'genroot/gensub/gensub.py'}
+
+
+def test_codegen_static_metamodel(generated):
+    Container = generated.Container
+    Element = generated.gensub.Element
+    assert Container._staticEClass
+    assert generated.getEClassifier('Container') is Container
+    assert generated.eClass.eSubpackages[0] is generated.gensub.eClass
+    assert Container.eClass.eSuperTypes[0] is generated.Named.eClass
+    assert generated.Named.eClass.abstract
+    assert Container.elements.eType is Element
+    assert Container.elements.eOpposite is Element.parent
+    assert Element.kind.eType is generated.Kind
+    assert generated.Kind.big.value == 10
+    with pytest.raises(TypeError):
+        generated.Named()
+
+
+def test_codegen_static_instances(generated):
+    Container = generated.Container
+    Element = generated.gensub.Element
+    e1, e2 = Element(name='e1'), Element(name='e2')
+    c = Container(name='c', values=[1, 2], elements=[e1, e2])
+    c.class_ = 'cls'
+    e1.next = e2
+    assert c.name == 'c'
+    assert c.values == [1, 2]
+    assert e1.parent is c and e1.eContainer() is c
+    assert c.kind is generated.Kind.small
+    assert c.eGet('class') == 'cls'
+    with pytest.raises(BadValueError):
+        c.kind = 3
+    with pytest.raises(AttributeError):
+        Element(unknown=3)
+    with pytest.raises(NotImplementedError):
+        c.compute(3)
+
+
+def test_codegen_compact_classes(metamodel, generated):
+    files = {str(path).replace('\\', '/'): code
+             for path, code in generate_code(metamodel).items()}
+    code = files['genroot/genroot.py']
+    assert 'class Named(CompactEObject, metaclass=MetaEClass):' in code
+    assert "__slots__ = ('_slot_name',)" in code
+    Element = generated.gensub.Element
+    e = Element(name='e')
+    assert not hasattr(e, '__dict__')
+    assert e.name == 'e' and e.eGet('name') == 'e'
+    assert e.eIsSet('name') and not e.eIsSet('next')
+    with pytest.raises(AttributeError):
+        e.unknown = 3
+
+
+def test_codegen_feature_tables(metamodel, generated):
+    files = {str(path).replace('\\', '/'): code
+             for path, code in generate_code(metamodel).items()}
+    assert 'Core.register_feature_table(' in files['genroot/__init__.py']
+    reflection = generated.Container.eClass.__dict__['_reflection_cache']
+    assert reflection.precomputed
+    assert reflection is generated.Container.eClass._reflection()
+    c = generated.Container(name='c')
+    feature_id = generated.Container.eClass.getFeatureID(generated.Named.name)
+    assert c.eGet(feature_id) == 'c'
+
+
+def test_codegen_multiple_inheritance_not_compact():
+    root = EPackage('multi', nsURI='http://multi/1.0', nsPrefix='multi')
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('a', EString))
+    B = EClass('B')
+    C = EClass('C', superclass=(A, B))
+    root.eClassifiers.extend([A, B, C])
+    files = {str(path).replace('\\', '/'): code
+             for path, code in generate_code(root).items()}
+    code = files['multi/multi.py']
+    assert 'class A(EObject, metaclass=MetaEClass):' in code
+    assert 'class C(A, B):' in code
+    assert '__slots__' not in code
+
+
+def test_codegen_command_line(tmp_path):
+    main(['examples/library.ecore', '-o', str(tmp_path)])
+    code = (tmp_path / 'library' / 'library.py').read_text()
+    assert 'class Book(CompactEObject, metaclass=MetaEClass):' in code
+    assert 'Writer.books.eOpposite = Book.authors' in code
+
+
+def test_codegen_generic_metamodel(tmp_path):
+    from pyecore.resources import ResourceSet
+    rset = ResourceSet()
+    resource = rset.get_resource('tests/xmi/xmi-tests/testecore.ecore')
+    generate(resource.contents[0], tmp_path)
+    sys.path.insert(0, str(tmp_path))
+    try:
+        generated = importlib.import_module('testecore')
+    finally:
+        sys.path.remove(str(tmp_path))
+        for name in [x for x in sys.modules if x.startswith('testecore')]:
+            del sys.modules[name]
+    Building, House, Test = generated.Building, generated.House, \
+        generated.Test
+    # Building is only a generic super type of Test
+    assert issubclass(Test, Building)
+    assert Test.hallo.eGenericType.eTypeParameter is Test.T
+    assert Test.eClass.eTypeParameters[0] is Test.T
+    generic = Test.eClass.eGenericSuperTypes[0]
+    assert generic.eClassifier is Building.eClass
+    assert generic.eTypeArguments[0].eTypeParameter is Test.T
+
+    t = Test()
+    house = House(rooms=3)
+    t.hallo.append(house)
+    t.test.append(House())
+    assert house.eContainer() is t
+    reflection = Test.eClass._reflection()
+    assert reflection.precomputed
+    assert [f.name for f in reflection.features] == ['hallo', 'test']
+    assert t.eGet(Test.eClass.getFeatureID(Test.hallo)) == [house]
+
+
+def test_codegen_feature_tables_outlive_other_changes(tmp_path):
+    from pyecore.resources import ResourceSet
+    rset = ResourceSet()
+    resource = rset.get_resource('tests/xmi/xmi-tests/testecore.ecore')
+    generate(resource.contents[0], tmp_path)
+    sys.path.insert(0, str(tmp_path))
+    try:
+        generated = importlib.import_module('testecore')
+    finally:
+        sys.path.remove(str(tmp_path))
+        for name in [x for x in sys.modules if x.startswith('testecore')]:
+            del sys.modules[name]
+    Building, Test = generated.Building, generated.Test
+    reflection = Test.eClass._reflection()
+    assert reflection.precomputed
+
+    # changes of other classes keep the tables
+    Other = EClass('Other', superclass=(EClass('Base'),))
+    Other.eStructuralFeatures.append(EAttribute('name', EString))
+    Other.eStructuralFeatures[0].name = 'renamed'
+    rset.get_resource('tests/xmi/xmi-tests/My.ecore')
+    assert Test.eClass._reflection() is reflection
+
+    # a change of a super type drops them
+    Building.eClass.eStructuralFeatures.append(EAttribute('extra', EString))
+    reflection = Test.eClass._reflection()
+    assert not reflection.precomputed
+    assert [f.name for f in reflection.features] == ['hallo', 'test',
+                                                     'extra']
+
+
+def test_codegen_generic_other_package():
+    root = EPackage('generic', nsURI='http://generic/1.0', nsPrefix='generic')
+    sub = EPackage('genericsub', nsURI='http://genericsub/1.0',
+                   nsPrefix='genericsub')
+    root.eSubpackages.append(sub)
+    Element = EClass('Element')
+    sub.eClassifiers.append(Element)
+    Holder = EClass('Holder')
+    T = ETypeParameter('T', eBounds=[EGenericType(eClassifier=Element)])
+    Holder.eTypeParameters.append(T)
+    root.eClassifiers.append(Holder)
+    with pytest.raises(ValueError):
+        generate_code(root)
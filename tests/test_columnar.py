@@ -0,0 +1,177 @@
+import gc
+import pytest
+from pyecore.ecore import *
+from pyecore.columnar import ColumnStore, columnar_store
+from pyecore.notification import EObserver, Kind
+from pyecore.resources import ResourceSet, URI
+
+
+@pytest.fixture
+def mm():
+    Measure = EClass('Measure')
+    Measure.eStructuralFeatures.append(EAttribute('value', EDouble))
+    Measure.eStructuralFeatures.append(EAttribute('count', ELong))
+    Measure.eStructuralFeatures.append(EAttribute('valid', EBoolean,
+                                                  default_value=True))
+    Measure.eStructuralFeatures.append(EAttribute('label', EString))
+    Measure.eStructuralFeatures.append(EAttribute('tags', EString, upper=-1))
+    Measure.eStructuralFeatures.append(EReference('next', Measure))
+    Series = EClass('Series')
+    Series.eStructuralFeatures.append(EReference('measures', Measure,
+                                                 upper=-1, containment=True))
+    pack = EPackage('columnar', nsURI='http://columnar/1.0',
+                    nsPrefix='columnar')
+    pack.eClassifiers.extend([Measure, Series])
+    return pack
+
+
+def test_columnar_instances(mm):
+    Measure = mm.getEClassifier('Measure')
+    store = ColumnStore(Measure)
+    assert columnar_store(Measure) is store
+    m = Measure(value=1.5, label='a')
+    assert len(store) == 1 and store[0] is m
+    assert 'value' not in m.__dict__
+    assert m.value == 1.5 and m.label == 'a'
+    assert m.count == 0 and m.valid is True
+    assert m.eIsSet('value') and not m.eIsSet('count')
+    m.valid = False
+    assert m.valid is False
+    m.count = 2 ** 80  # does not fit the array
+    assert m.count == 2 ** 80
+    m.value = None
+    assert m.value is None and m.eIsSet('value')
+    with pytest.raises(BadValueError):
+        m.value = 'wrong'
+
+    # the other features are not in the columns
+    m.tags.append('t')
+    m.next = Measure()
+    assert m.eIsSet('tags')
+    assert m.eIsSet(Measure.findEStructuralFeature('next'))
+    assert {f.name for f in m._isset} == {'value', 'count', 'valid', 'label',
+                                          'tags', 'next'}
+
+
+def test_columnar_notifications(mm):
+    Measure = mm.getEClassifier('Measure')
+    ColumnStore(Measure)
+    m = Measure()
+    notifications = []
+    observer = EObserver(m, notifyChanged=notifications.append)
+    m.value = 3.0
+    m.value = None
+    assert [(n.old, n.new, n.kind) for n in notifications] == \
+        [(0.0, 3.0, Kind.SET), (3.0, None, Kind.UNSET)]
+    assert observer
+
+
+def test_columnar_released_rows(mm):
+    Measure = mm.getEClassifier('Measure')
+    store = ColumnStore(Measure)
+    m1, m2 = Measure(value=1.0, label='a'), Measure(value=2.0)
+    assert m1._row == 0 and len(store) == 2
+    del m1
+    gc.collect()
+    assert len(store) == 1 and list(store) == [m2]
+    assert store.column('label')[0] is None
+    with pytest.raises(IndexError):
+        store[0]
+    m3 = Measure(count=3)
+    assert m3._row == 0 and store[0] is m3
+    assert m3.value == 0.0 and m3.label is None and m3.count == 3
+    assert not m3.eIsSet('value') and not m3.eIsSet('label')
+    store.detach()
+    assert 'value' not in m3.__dict__ and m2.__dict__['value'] == 2.0
+
+
+def test_columnar_delete(mm):
+    Measure = mm.getEClassifier('Measure')
+    ColumnStore(Measure)
+    m1, m2 = Measure(label='a'), Measure(value=1.0, label='b')
+    del m1.label
+    assert m1.label is None and not m1.eIsSet('label')
+    notifications = []
+    observer = EObserver(m2, notifyChanged=notifications.append)
+    del m2.value
+    assert m2.value == 0.0 and not m2.eIsSet('value')
+    assert m2.label == 'b'
+    assert [(n.old, n.new, n.kind) for n in notifications] == \
+        [(1.0, None, Kind.UNSET)]
+    assert observer
+
+
+def test_columnar_bulk_rows(mm):
+    Measure = mm.getEClassifier('Measure')
+    store = ColumnStore(Measure)
+    rows = store.extend(value=[1.0, 2.0, 3.0], label=['a', 'b', None])
+    assert rows == range(0, 3)
+    assert list(store.column('value')) == [1.0, 2.0, 3.0]
+    assert store._instances == [None, None, None]
+    m = store[1]
+    assert store[1] is m
+    assert isinstance(m, Measure.python_class)
+    assert m.value == 2.0 and m.label == 'b' and m.count == 0
+    assert m.eIsSet('label') and not m.eIsSet('count')
+    assert [x.value for x in store] == [1.0, 2.0, 3.0]
+    with pytest.raises(BadValueError):
+        store.extend(value=['wrong'])
+    with pytest.raises(ValueError):
+        store.extend(value=[1.0], label=[])
+    with pytest.raises(AttributeError):
+        store.extend(unknown=[1])
+    assert len(store) == 3
+
+
+def test_columnar_serialization(mm, tmp_path):
+    Measure = mm.getEClassifier('Measure')
+    Series = mm.getEClassifier('Series')
+    store = ColumnStore(Measure)
+    store.extend(value=[1.0, 2.0], count=[1, 2])
+    series = Series(measures=list(store))
+    rset = ResourceSet()
+    rset.metamodel_registry[mm.nsURI] = mm
+    resource = rset.create_resource(URI(str(tmp_path / 'series.xmi')))
+    resource.append(series)
+    resource.save()
+
+    store.detach()
+    assert columnar_store(Measure) is None
+    rset = ResourceSet()
+    rset.metamodel_registry[mm.nsURI] = mm
+    loaded = rset.get_resource(URI(str(tmp_path / 'series.xmi')))
+    measures = loaded.contents[0].measures
+    assert [(x.value, x.count) for x in measures] == [(1.0, 1), (2.0, 2)]
+    assert not measures[0].eIsSet('label')
+
+
+def test_columnar_detach(mm):
+    Measure = mm.getEClassifier('Measure')
+    before = Measure(value=1.0, label='before')
+    store = ColumnStore(Measure)
+    assert 'value' not in before.__dict__
+    assert before.value == 1.0 and before.eIsSet('label')
+    Measure.compile()
+    assert not Measure.compiled
+    with pytest.raises(ValueError):
+        ColumnStore(Measure)
+
+    store.extend(value=[2.0])
+    store.detach()
+    assert before.__dict__['value'] == 1.0
+    assert before.eIsSet('value') and not before.eIsSet('count')
+    value = Measure.findEStructuralFeature('value')
+    assert Measure.python_class.value is value
+    assert Measure(value=3.0).__dict__['value'] == 3.0
+
+
+def test_columnar_numpy(mm):
+    numpy = pytest.importorskip('numpy')
+    Measure = mm.getEClassifier('Measure')
+    store = ColumnStore(Measure)
+    store.extend(value=[1.0, 2.0])
+    view = store.numpy('value')
+    assert isinstance(view, numpy.ndarray)
+    assert view.sum() == 3.0
+    with pytest.raises(TypeError):
+        store.numpy('label')
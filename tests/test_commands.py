@@ -206,6 +206,36 @@ def test_command_remove_b(mm):
     assert a.many_tob.index(b2) == 0
 
 
+def test_command_unordered_collection():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EReference('children', A, upper=-1,
+                                            containment=True, ordered=False))
+    a, b, b2 = A(), A(), A()
+    a.children.add(b)
+
+    add = Add(owner=a, feature='children', value=b2)
+    assert add.can_execute
+    add.execute()
+    assert b2 in a.children
+    add.undo()
+    assert b2 not in a.children and b2.eContainer() is None
+    add.redo()
+    assert b2 in a.children
+
+    remove = Remove(owner=a, feature='children', value=b)
+    assert remove.can_execute
+    remove.execute()
+    assert b not in a.children
+    remove.undo()
+    assert b in a.children and b.eContainer() is a
+
+    assert not Add(owner=a, feature='children', value=A(),
+                   index=0).can_execute
+    assert not Remove(owner=a, feature='children', index=0).can_execute
+    assert not Move(owner=a, feature='children', value=b,
+                    to_index=1).can_execute
+
+
 def test_command_remove_index(mm):
     a = mm.A()
     b = mm.B()
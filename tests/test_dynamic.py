@@ -3,6 +3,7 @@ from datetime import datetime
 from pyecore.ecore import *
 import pyecore.ecore as ecore
 from pyecore.ecore import Metasubinstance
+from pyecore.notification import EObserver, Kind
 
 
 def test_eclass_meta_attribute_access():
@@ -184,6 +185,38 @@ def test_create_dynamic_many_ereference_urifragment():
     assert b1.eURIFragment() == '//@tob.0'
 
 
+def test_create_dynamic_nonunique_ereference_urifragment():
+    A = EClass('A')
+    B = EClass('B')
+    A.eStructuralFeatures.append(EReference('tob', B, upper=-1, unique=False,
+                                            containment=True))
+    a1 = A()
+    b1, b2, b3, b4 = B(), B(), B(), B()
+    a1.tob.extend([b1, b2])
+    assert b2.eURIFragment() == '//@tob.1'
+    a1.tob.append(b3)
+    assert b3.eURIFragment() == '//@tob.2'
+    a1.tob.insert(0, b4)
+    assert b4.eURIFragment() == '//@tob.0'
+    assert b1.eURIFragment() == '//@tob.1'
+    assert b3.eURIFragment() == '//@tob.3'
+    a1.tob.remove(b1)
+    assert b2.eURIFragment() == '//@tob.1'
+    assert b3.eURIFragment() == '//@tob.2'
+
+
+def test_create_dynamic_deep_urifragment():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EReference('children', A, upper=-1,
+                                            containment=True))
+    root = current = A()
+    for _ in range(500):
+        child = A()
+        current.children.append(child)
+        current = child
+    assert current.eURIFragment() == '/' + '/@children.0' * 500
+
+
 def test_create_dynamic_many_ereference_filter():
     A = EClass('A')
     B = EClass('B')
@@ -546,7 +579,7 @@ def test_create_dynamic_ereference_nonord_uni():
     b1 = B()
     a1.tob.append(b1)
     assert isinstance(a1.tob, ESet)
-    assert isinstance(a1.tob, EOrderedSet)
+    assert not isinstance(a1.tob, EOrderedSet)
     assert b1 in a1.tob
 
 
@@ -558,11 +591,48 @@ def test_create_dynamic_ereference_nonord_nonuni():
     b1 = B()
     a1.tob.append(b1)
     assert isinstance(a1.tob, EBag)
-    assert isinstance(a1.tob, EList)
+    assert not isinstance(a1.tob, EList)
     assert b1 in a1.tob
     assert a1.tob.__repr__()
 
 
+def test_dynamic_unordered_collections():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EReference('set', A, upper=-1,
+                                            ordered=False, containment=True))
+    A.eStructuralFeatures.append(EAttribute('bag', EInt, upper=-1,
+                                            ordered=False, unique=False))
+    a1, a2, a3 = A(), A(), A()
+    a1.set.extend([a2, a3])
+    a1.set.add(a2)
+    assert len(a1.set) == 2
+    assert a1.set == {a2, a3}
+    assert a2.eContainer() is a1
+    assert a3.eURIFragment() == '//@set.1'
+    assert a1.eResource is None
+    with pytest.raises(AttributeError):
+        a1.set.insert(0, A())
+    with pytest.raises(TypeError):
+        a1.set[0]
+    a1.set.remove(a2)
+    assert a2.eContainer() is None
+    assert a3.eURIFragment() == '//@set.0'
+    assert a1.set.pop() is a3
+    assert not a1.set
+
+    a1.bag.extend([1, 2, 1])
+    a1.bag.append(1)
+    assert len(a1.bag) == 4
+    assert a1.bag.count(1) == 3
+    assert a1.bag == [2, 1, 1, 1]
+    a1.bag.remove(1)
+    assert a1.bag.count(1) == 2
+    with pytest.raises(ValueError):
+        a1.bag.remove(3)
+    a1.bag = [4, 4]
+    assert sorted(a1.bag) == [4, 4]
+
+
 def test_create_dynamic_ereference_elist_extend():
     A = EClass('A')
     B = EClass('B')
@@ -618,8 +688,45 @@ def test_update_estructuralfeature_in_eclass():
         a.name
 
     A.eStructuralFeatures.append(EAttribute('name', EString))
-    a.name  # We access the name
-    assert a.__dict__['name'].owner is a
+    assert a.name is None  # We access the name
+
+
+def test_single_valued_features_raw_storage():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('name', EString))
+    A.eStructuralFeatures.append(EAttribute('num', EInt))
+    toa = EReference('toa', A)
+    A.eStructuralFeatures.append(toa)
+    toa.eOpposite = EReference('froma', A)
+    A.eStructuralFeatures.append(toa.eOpposite)
+    a1, a2 = A(), A()
+    assert a1.num == 0
+    assert 'num' not in a1.__dict__  # immutable default, nothing stored
+    a1.name = 'a1'
+    a1.toa = a2
+    assert a1.__dict__['name'] == 'a1'
+    assert a1.__dict__['toa'] is a2
+    assert a2.__dict__['froma'] is a1
+    with pytest.raises(BadValueError):
+        a1.num = 'test'
+    a2.froma = None
+    assert a1.toa is None
+
+
+def test_single_valued_features_deprecated_evalue():
+    from pyecore.ecore import EValue
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('name', EString))
+    a = A(name='a')
+    with pytest.deprecated_call():
+        value = EValue(a, A.findEStructuralFeature('name'))
+    assert value._get() == 'a'
+    value._set('b')
+    assert a.name == 'b' and a.__dict__['name'] == 'b'
+    with pytest.raises(BadValueError):
+        value._set(3)
+    value.remove_or_unset('b')
+    assert a.name is None
 
 
 def test_get_eattribute():
@@ -1169,3 +1276,311 @@ def test_mix_dynamic_static_inheritance():
     with pytest.raises(NotImplementedError):
         c.spam()
     assert c.egg() == 4
+
+
+def test_eclass_reflection_kept_on_eclass_creation():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('name', EString))
+    reflection = A._reflection()
+    EClass('B')
+    assert A._reflection() is reflection
+    EClass('C', superclass=(A,))
+    assert A._reflection() is not reflection
+
+
+def test_eclass_reflection_follows_ancestors_changes():
+    A = EClass('A')
+    B = EClass('B', superclass=(A,))
+    C = EClass('C', superclass=(B,))
+    assert C.findEStructuralFeature('name') is None
+    assert C.eAllSuperTypes() == {B, A}
+
+    name = EAttribute('name', EString)
+    A.eStructuralFeatures.append(name)
+    assert C.findEStructuralFeature('name') is name
+    assert C.eAllAttributes() == {name}
+
+    A.eStructuralFeatures.remove(name)
+    assert C.findEStructuralFeature('name') is None
+    assert C.eAllStructuralFeatures() == set()
+
+    B.eStructuralFeatures.append(name)
+    name.name = 'label'
+    assert C.findEStructuralFeature('name') is None
+    assert C.findEStructuralFeature('label') is name
+
+    D = EClass('D')
+    ref = EReference('ref', D)
+    D.eStructuralFeatures.append(ref)
+    A.eSuperTypes.append(D)
+    assert C.eAllSuperTypes() == {B, A, D}
+    assert C.eAllReferences() == {ref}
+    assert C.eAllAttributes() == {name}
+    assert C.findEStructuralFeature('ref') is ref
+
+
+def test_eclass_reflection_generic_supertypes():
+    A = EClass('A')
+    name = EAttribute('name', EString)
+    A.eStructuralFeatures.append(name)
+    B = EClass('B')
+    B.eGenericSuperTypes.append(EGenericType(eClassifier=A))
+    assert B.findEStructuralFeature('name') is name
+    assert name in B.eAllStructuralFeatures()
+
+
+def test_eclass_compile():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('name', EString))
+    A.eStructuralFeatures.append(EAttribute('age', EInt, default_value=18))
+    A.eStructuralFeatures.append(EAttribute('tags', EString, upper=-1))
+    A.eStructuralFeatures.append(EReference('child', A, containment=True))
+    B = EClass('B', superclass=(A,))
+    A.compile()
+    B.compile()
+    assert A.compiled and B.compiled
+    assert A.python_class.name is A.findEStructuralFeature('name')
+
+    b = B(name='b', tags=['x', 'y'], child=A(), other=3)
+    assert b.name == 'b'
+    assert b.age == 18
+    assert b.tags == ['x', 'y']
+    assert b.child.eContainer() is b
+    assert b.other == 3
+    assert b.eIsSet('name') and not b.eIsSet('age')
+    assert 'age' not in b.__dict__
+    with pytest.raises(BadValueError):
+        A(age='wrong')
+
+    notifications = []
+    observer = EObserver(b, notifyChanged=notifications.append)
+    b.age = 20
+    assert b.age == 20
+    assert notifications[0].old == 18 and notifications[0].new == 20
+    del b.age
+    assert b.age == 18
+    assert observer
+
+    # a change in A invalidates both compilations
+    A.eStructuralFeatures.append(EAttribute('label', EString))
+    assert not A.compiled and not B.compiled
+    assert B(label='b').label == 'b'
+    B.compile()
+    assert B(label='b', name='n').label == 'b'
+    A.findEStructuralFeature('age').name = 'years'
+    assert not B.compiled
+    assert B(years=1).years == 1
+
+
+def test_eclass_compile_static_untouched():
+    init = EPackage.__init__
+    EPackage.eClass.compile()
+    assert not EPackage.eClass.compiled
+    assert EPackage.__init__ is init
+
+
+def test_feature_type_check_follows_etype():
+    A = EClass('A')
+    B = EClass('B')
+    ref = EReference('to', A)
+    A.eStructuralFeatures.append(ref)
+    a = A()
+    a.to = A()
+    a.to = A()
+    with pytest.raises(BadValueError):
+        a.to = B()
+
+    ref.eType = B
+    a.to = B()
+    with pytest.raises(BadValueError):
+        a.to = A()
+
+    # new subclasses are accepted once their super type is set
+    C = EClass('C')
+    c = C()
+    with pytest.raises(BadValueError):
+        a.to = c
+    C.eSuperTypes.append(B)
+    a.to = c
+    assert a.to is c
+
+
+def test_feature_type_check_disabled():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('value', EInt))
+    A.eStructuralFeatures.append(EAttribute('values', EInt, upper=-1))
+    with ecore.type_checks.disabled():
+        a = A(value='unchecked')
+        a.values.append('unchecked')
+    assert a.value == 'unchecked'
+    assert a.values == ['unchecked']
+    assert ecore.type_checks.enabled
+    with pytest.raises(BadValueError):
+        a.value = 'checked'
+
+
+def test_collection_bulk_operations():
+    A = EClass('A')
+    B = EClass('B')
+    tob = EReference('tob', B, upper=-1)
+    toa = EReference('toa', A, upper=-1, eOpposite=tob)
+    A.eStructuralFeatures.append(tob)
+    B.eStructuralFeatures.append(toa)
+    A.eStructuralFeatures.append(EReference('children', B, upper=-1,
+                                            containment=True))
+    a1, a2 = A(), A()
+    bs = [B() for _ in range(5)]
+    notifications = []
+    observer = EObserver(a1)
+    observer.notifyChanged = notifications.append
+
+    a1.tob.extend_bulk(bs + bs[:2])
+    assert a1.tob == bs
+    assert all(b.toa == [a1] for b in bs)
+    assert [n.kind for n in notifications] == [Kind.ADD_MANY]
+    with pytest.raises(BadValueError):
+        a1.tob.extend_bulk([B(), A()])
+    assert len(a1.tob) == 5
+
+    notifications.clear()
+    a1.tob.remove_all(bs[1:3] + [B()])
+    assert a1.tob == [bs[0], bs[3], bs[4]]
+    assert bs[1].toa == [] and bs[3].toa == [a1]
+    assert [n.kind for n in notifications] == [Kind.REMOVE_MANY]
+    assert notifications[0].old == bs[1:3]
+
+    notifications.clear()
+    a1.tob.replace_all([bs[4], bs[1]])
+    assert a1.tob == [bs[4], bs[1]]
+    assert bs[0].toa == [] and bs[1].toa == [a1] and bs[4].toa == [a1]
+    assert [n.kind for n in notifications] == [Kind.REMOVE_MANY,
+                                                Kind.ADD_MANY]
+
+    # the contained elements are moved from their previous container
+    a2.children.extend(bs[:3])
+    a1.children.extend_bulk(bs[1:])
+    assert a2.children == [bs[0]]
+    assert all(b.eContainer() is a1 for b in bs[1:])
+    a1.children.replace_all(bs[2:4])
+    assert bs[1].eContainer() is None and bs[4].eContainer() is None
+    assert bs[2].eContainer() is a1
+    a1.children.remove_all(bs)
+    assert bs[2].eContainer() is None and bs[0].eContainer() is a2
+
+
+def test_many_feature_assignment_minimal_diff():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EReference('children', A, upper=-1,
+                                            containment=True))
+    A.eStructuralFeatures.append(EAttribute('values', EString, upper=-1,
+                                            unique=False))
+    root = A()
+    children = [A() for _ in range(6)]
+    root.children.extend(children)
+    notifications = []
+    observer = EObserver(root)
+    observer.notifyChanged = notifications.append
+
+    root.children = list(root.children)
+    assert notifications == []
+
+    new = A()
+    root.children = [children[0], children[2], children[3], children[5],
+                     children[4], new]
+    assert root.children == [children[0], children[2], children[3],
+                             children[5], children[4], new]
+    assert children[1].eContainer() is None
+    assert new.eContainer() is root
+    assert [n.kind for n in notifications] == [Kind.REMOVE, Kind.ADD,
+                                               Kind.MOVE]
+    assert notifications[0].old is children[1]
+    assert notifications[1].new is new
+    assert notifications[2].new in (children[4], children[5])
+
+    notifications.clear()
+    root.values = ['a', 'b', 'b', 'c']
+    root.values = ['b', 'a', 'b', 'd']
+    assert root.values == ['b', 'a', 'b', 'd']
+    kinds = [n.kind for n in notifications]
+    assert kinds == [Kind.ADD_MANY, Kind.REMOVE, Kind.ADD, Kind.MOVE]
+
+    with pytest.raises(BadValueError):
+        root.values = ['e', 5]
+    assert root.values == ['b', 'a', 'b', 'd']
+
+
+def test_numeric_many_attribute_array_storage():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('ints', EInt, upper=-1,
+                                            unique=False))
+    A.eStructuralFeatures.append(EAttribute('reals', EDouble, upper=-1,
+                                            unique=False))
+    a = A()
+    assert isinstance(a.ints, EArrayList)
+    assert a.ints.array.typecode == 'q'
+    assert a.reals.array.typecode == 'd'
+
+    notifications = []
+    observer = EObserver(a)
+    observer.notifyChanged = notifications.append
+    a.ints = [1, 2, 3]
+    a.ints = [1, 2, 3]
+    a.ints.extend([4, 5])
+    assert a.ints == [1, 2, 3, 4, 5]
+    assert memoryview(a.ints.array).tolist() == [1, 2, 3, 4, 5]
+    assert [n.kind for n in notifications] == [Kind.ADD_MANY, Kind.ADD_MANY]
+    assert notifications[1].new == [4, 5]
+
+    notifications.clear()
+    a.ints = [5, 4]
+    assert [n.kind for n in notifications] == [Kind.REMOVE_MANY,
+                                               Kind.ADD_MANY]
+    assert notifications[0].old == [1, 2, 3, 4, 5]
+
+    with pytest.raises(BadValueError):
+        a.ints = [1, 'a']
+    with pytest.raises(BadValueError):
+        a.ints.append(1.5)
+    assert a.ints == [5, 4]
+
+    a.ints.append(2 ** 70)
+    assert a.ints == [5, 4, 2 ** 70]
+    with pytest.raises(TypeError):
+        a.ints.array
+
+
+def test_numeric_many_attribute_numpy_view():
+    numpy = pytest.importorskip('numpy')
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('reals', EDouble, upper=-1,
+                                            unique=False))
+    a = A()
+    a.reals = numpy.arange(4, dtype=float)
+    assert a.reals == [0.0, 1.0, 2.0, 3.0]
+    view = a.reals.numpy()
+    view[0] = 10.0
+    assert a.reals[0] == 10.0
+
+
+def test_dynamic_unordered_bag_unhashable_values():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('objs', EJavaObject, upper=-1,
+                                            unique=False, ordered=False))
+    a = A()
+    assert isinstance(a.objs, EBag)
+    a.objs.append([1])
+    a.objs.extend([[1], 2, 2, {}])
+    assert len(a.objs) == 5
+    assert a.objs.count([1]) == 2 and a.objs.count(2) == 2
+    assert {} in a.objs
+    assert a.objs == [2, {}, [1], 2, [1]]
+
+    a.objs.remove([1])
+    assert a.objs.count([1]) == 1 and len(a.objs) == 4
+    with pytest.raises(ValueError):
+        a.objs.remove([3])
+
+    a.objs = [[3], 2]
+    assert a.objs == [2, [3]]
+    a.objs.clear()
+    assert len(a.objs) == 0
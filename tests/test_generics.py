@@ -30,3 +30,21 @@ def test_simple_generics():
 
     with pytest.raises(AttributeError):
         a.tonothing = 4
+
+
+def test_generics_checker_follows_bounds():
+    A = EClass('A')
+    B = EClass('B')
+    T = ETypeParameter('T', eBounds=(EGenericType(eClassifier=A),))
+    A.eTypeParameters.append(T)
+    to = EReference('to', eGenericType=EGenericType(T))
+    A.eStructuralFeatures.append(to)
+    a = A()
+    a.to = A()
+    with pytest.raises(BadValueError):
+        a.to = B()
+
+    T.eBounds[0].eClassifier = B
+    a.to = B()
+    with pytest.raises(BadValueError):
+        a.to = A()
@@ -1,6 +1,10 @@
 import pytest
 from pyecore.ecore import *
-from pyecore.notification import EObserver, Kind
+import pyecore.ecore as Ecore
+from pyecore.notification import EObserver, Kind, subscribe, unsubscribe
+from pyecore.notification import Notification
+from pyecore.notification import EContentAdapter
+from pyecore.notification import ThreadDispatcher, AsyncioDispatcher
 
 
 class ObserverCounter(EObserver):
@@ -94,3 +98,416 @@ def test_notification_add_resource():
     assert o1.calls == 2
     assert o1.kind == Kind.ADD
     assert o1.feature is EPackage.eClassifiers
+
+
+def test_notification_not_created_without_listener(monkeypatch):
+    import pyecore.valuecontainer as valuecontainer
+    created = []
+
+    class SpyNotification(valuecontainer.Notification):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(valuecontainer, 'Notification', SpyNotification)
+    monkeypatch.setattr(Ecore, 'Notification', SpyNotification)
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('name', EString))
+    A.eStructuralFeatures.append(EAttribute('values', EInt, upper=-1))
+    del created[:]  # metamodel elements are always observed
+    a = A()
+    a.name = 'test'
+    a.values.append(1)
+    a.values.extend([2, 3])
+    a.values.remove(1)
+    a.values.clear()
+    assert created == []
+
+    o1 = ObserverCounter(a)
+    a.name = 'other'
+    a.values.append(1)
+    assert len(created) == 2
+    assert o1.calls == 2
+
+
+class ObserverRecorder(EObserver):
+    def __init__(self, notifier=None):
+        super().__init__(notifier=notifier)
+        self.notifications = []
+
+    def notifyChanged(self, notification):
+        self.notifications.append(notification)
+
+
+@pytest.fixture(scope='module')
+def batchmm():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EAttribute('name', EString))
+    A.eStructuralFeatures.append(EReference('children', A, upper=-1,
+                                            containment=True))
+    return A
+
+
+def test_notification_batch_resource(batchmm):
+    from pyecore.resources import Resource
+    resource = Resource()
+    root = batchmm(name='root')
+    resource.append(root)
+    o1 = ObserverRecorder(resource)
+    o2 = ObserverRecorder(root)
+
+    a1, a2, a3 = batchmm(), batchmm(), batchmm()
+    with resource.batch_notifications():
+        root.name = 'first'
+        root.name = 'second'
+        root.children.append(a1)
+        root.children.extend([a2, a3])
+        root.children.remove(a2)
+        root.name = None
+        a1.name = 'a1'
+        assert o1.notifications == []
+        assert o2.notifications == []
+
+    assert o1.notifications[:2] == o2.notifications
+    notif, children = o2.notifications
+    assert notif.kind is Kind.UNSET
+    assert notif.old == 'root' and notif.new is None
+    assert notif.feature is batchmm.findEStructuralFeature('name')
+    assert children.kind is Kind.ADD_MANY
+    assert children.new == [a1, a3]
+
+    notif = o1.notifications[-1]
+    assert notif.notifier is a1
+    assert notif.kind is Kind.SET and notif.new == 'a1'
+
+    root.name = 'after'
+    assert len(o2.notifications) == 3
+
+
+def test_notification_batch_cancel_set(batchmm):
+    from pyecore.resources import Resource
+    resource = Resource()
+    root = batchmm(name='root')
+    resource.append(root)
+    o1 = ObserverRecorder(root)
+    with resource.batch_notifications():
+        root.name = 'first'
+        root.name = 'root'
+    assert o1.notifications == []
+
+    with resource.batch_notifications():
+        root.name = 'first'
+        root.name = 'root'
+        root.name = 'second'
+    assert [(n.old, n.new) for n in o1.notifications] == [('root', 'second')]
+
+
+def test_notification_batch_cancel_add(batchmm):
+    from pyecore.resources import Resource
+    resource = Resource()
+    root = batchmm()
+    resource.append(root)
+    o1 = ObserverRecorder(root)
+    a1 = batchmm()
+    with resource.batch_notifications():
+        root.children.append(a1)
+        root.children.remove(a1)
+    assert o1.notifications == []
+
+    with resource.batch_notifications():
+        root.children.append(a1)
+        root.children.remove(a1)
+        root.children.append(a1)
+    assert len(o1.notifications) == 1
+    assert o1.notifications[0].kind is Kind.ADD
+
+
+def test_notification_batch_resourceset(batchmm):
+    from pyecore.resources import ResourceSet
+    rset = ResourceSet()
+    resource = rset.create_resource('first.xmi')
+    root = batchmm()
+    resource.append(root)
+    o1 = ObserverRecorder(root)
+    with rset.batch_notifications():
+        other = rset.create_resource('second.xmi')
+        other_root = batchmm()
+        other.append(other_root)
+        o2 = ObserverRecorder(other_root)
+        with other.batch_notifications():  # joins the current batch
+            root.name = 'root'
+            other_root.name = 'other'
+        assert o1.notifications == o2.notifications == []
+    assert len(o1.notifications) == 1
+    assert len(o2.notifications) == 1
+
+
+def test_notification_batch_eternal_listeners():
+    from pyecore.resources import Resource
+    resource = Resource()
+    A = EClass('A')
+    package = EPackage('batchpack')
+    package.eClassifiers.append(A)
+    resource.append(package)
+    with resource.batch_notifications():
+        A.eStructuralFeatures.append(EAttribute('name', EString))
+        assert A.findEStructuralFeature('name') is not None
+
+
+def test_notification_subscription_feature_kind(batchmm):
+    name = batchmm.findEStructuralFeature('name')
+    a = batchmm()
+    o1 = ObserverRecorder()
+    o1.observe(a, features='name')
+    o2 = ObserverRecorder()
+    o2.observe(a, kinds=Kind.ADD)
+    o3 = ObserverRecorder()
+    o3.observe(a, features=[name, 'children'], kinds=[Kind.UNSET])
+
+    a.name = 'test'
+    a.children.append(batchmm())
+    a.name = None
+    assert [n.kind for n in o1.notifications] == [Kind.SET, Kind.UNSET]
+    assert [n.kind for n in o2.notifications] == [Kind.ADD]
+    assert [n.kind for n in o3.notifications] == [Kind.UNSET]
+    assert o3.notifications[0].feature is name
+
+    o1.unobserve(a)
+    unsubscribe(a, o2)
+    a.name = 'other'
+    a.children.append(batchmm())
+    assert len(o1.notifications) == 2
+    assert len(o2.notifications) == 1
+
+    with pytest.raises(AttributeError):
+        o1.observe(a, features='unknown')
+
+
+def test_notification_subscription_resource(batchmm):
+    from pyecore.resources import Resource
+    resource = Resource()
+    root = batchmm()
+    resource.append(root)
+    o1 = ObserverRecorder()
+    subscribe(resource, o1, kinds=(Kind.ADD, Kind.ADD_MANY))
+    root.name = 'root'
+    root.children.append(batchmm())
+    assert [n.kind for n in o1.notifications] == [Kind.ADD]
+    with resource.batch_notifications():
+        root.children.append(batchmm())
+        root.children.append(batchmm())
+    assert [n.kind for n in o1.notifications] == [Kind.ADD, Kind.ADD_MANY]
+
+    # the features given by name are matched by name on a resource
+    o2 = ObserverRecorder()
+    subscribe(resource, o2, features='name')
+    o3 = ObserverRecorder()
+    o3.observe(resource, features=('unknown',))
+    root.name = 'other'
+    root.children[0].name = 'child'
+    root.children.append(batchmm())
+    assert [n.new for n in o2.notifications] == ['other', 'child']
+    assert o3.notifications == []
+
+
+def test_notification_subscription_observer_init(batchmm):
+    a = batchmm()
+    calls = []
+    EObserver(a, notifyChanged=calls.append, features='children')
+    a.name = 'test'
+    a.children.append(batchmm())
+    assert len(calls) == 1
+    assert calls[0].kind is Kind.ADD
+
+
+class ContentRecorder(EContentAdapter):
+    def __init__(self, notifier=None):
+        super().__init__(notifier=notifier)
+        self.notifications = []
+
+    def notifyChanged(self, notification):
+        self.notifications.append(notification)
+
+
+def test_notification_content_adapter(batchmm):
+    root, a1, a2, a3 = batchmm(), batchmm(), batchmm(), batchmm()
+    root.children.append(a1)
+    a1.children.append(a2)
+    adapter = ContentRecorder(root)
+    try:
+        root.name = 'root'
+        a2.name = 'a2'
+        assert [n.notifier for n in adapter.notifications] == [root, a2]
+
+        # a3 enters the subtree
+        a2.children.append(a3)
+        a3.name = 'a3'
+        assert adapter.notifications[-1].notifier is a3
+
+        # a1 (and its content) leaves the subtree
+        root.children.remove(a1)
+        del adapter.notifications[:]
+        a1.name = 'a1'
+        a3.name = 'other'
+        assert adapter.notifications == []
+
+        root.children.append(a3)
+        a3.name = 'back'
+        assert [n.notifier for n in adapter.notifications] == [root, a3]
+    finally:
+        adapter.unobserve(root)
+    root.name = 'after'
+    assert adapter.notifications[-1].new == 'back'
+
+
+def test_notification_content_adapter_nested(batchmm):
+    root, a1 = batchmm(), batchmm()
+    root.children.append(a1)
+    outer = ContentRecorder(root)
+    inner = ContentRecorder(a1)
+    try:
+        a1.name = 'a1'
+        root.name = 'root'
+        assert len(outer.notifications) == 2
+        assert len(inner.notifications) == 1
+    finally:
+        outer.unobserve(root)
+        inner.unobserve(a1)
+
+
+def test_notification_content_adapter_resource(batchmm):
+    from pyecore.resources.xmi import XMIResource
+    resource = XMIResource()
+    root, a1, other = batchmm(), batchmm(), batchmm()
+    root.children.append(a1)
+    resource.append(root)
+    adapter = ContentRecorder(resource)
+    try:
+        root.name = 'root'
+        a1.name = 'a1'
+        assert [n.notifier for n in adapter.notifications] == [root, a1]
+
+        # other root enters the resource
+        other.name = 'outside'
+        resource.append(other)
+        other.name = 'other'
+        assert adapter.notifications[-1].notifier is other
+
+        # root (and its content) leaves the resource
+        resource.remove(root)
+        del adapter.notifications[:]
+        a1.name = 'removed'
+        assert adapter.notifications == []
+    finally:
+        adapter.unobserve(resource)
+    other.name = 'after'
+    assert adapter.notifications == []
+
+
+class SlowRecorder(ObserverRecorder):
+    def notifyChanged(self, notification):
+        import time
+        time.sleep(0.001)
+        super().notifyChanged(notification)
+
+
+def test_notification_thread_dispatcher(batchmm):
+    a = batchmm()
+    o1 = SlowRecorder()
+    o2 = ObserverRecorder()
+    with ThreadDispatcher() as dispatcher:
+        dispatcher.observe(o1, a)
+        dispatcher.observe(o2, a, features='name')
+        for i in range(20):
+            a.name = str(i)
+        a.children.append(batchmm())
+        dispatcher.flush()
+        assert [n.new for n in o1.notifications[:20]] == \
+            [str(i) for i in range(20)]
+        assert o1.notifications[-1].kind is Kind.ADD
+        assert len(o2.notifications) == 20
+
+        unsubscribe(a, o1)
+        a.name = 'other'
+        dispatcher.flush()
+        assert len(o1.notifications) == 21
+        assert len(o2.notifications) == 21
+
+        def failure(notification):
+            raise ValueError('listener failure')
+
+        dispatcher.observe(EObserver(notifyChanged=failure), a)
+        a.name = 'failure'
+        with pytest.raises(ValueError):
+            dispatcher.flush()
+    assert not dispatcher._thread.is_alive()
+    with pytest.raises(RuntimeError):
+        dispatcher.dispatch(o2, Notification(feature=a.eClass))
+    dispatcher.close()  # closing twice is harmless
+
+
+def test_notification_dispatcher_abstract():
+    from pyecore.notification import NotificationDispatcher
+    with pytest.raises(TypeError):
+        NotificationDispatcher()
+
+
+def test_notification_asyncio_dispatcher(batchmm):
+    import asyncio
+    a = batchmm()
+    o1 = ObserverRecorder()
+
+    async def scenario():
+        dispatcher = AsyncioDispatcher()
+        dispatcher.observe(o1, a)
+        a.name = 'first'
+        a.name = 'second'
+        assert o1.notifications == []
+        await dispatcher.flush()
+        assert [n.new for n in o1.notifications] == ['first', 'second']
+        await dispatcher.close()
+        with pytest.raises(RuntimeError):
+            dispatcher.dispatch(o1, Notification(feature=a.eClass))
+
+    asyncio.run(scenario())
+    with pytest.raises(RuntimeError):
+        AsyncioDispatcher()  # no running event loop
+
+
+def test_notification_weak_listeners(batchmm):
+    import gc
+    from pyecore.resources import Resource
+    resource = Resource()
+    a = batchmm()
+    resource.append(a)
+    o1 = ObserverRecorder()
+    o1.observe(a, weak=True)
+    o2 = ObserverRecorder()
+    o2.observe(a, features='name', weak=True)
+    o3 = ObserverRecorder()
+    subscribe(resource, o3, weak=True)
+    a.name = 'test'
+    assert len(o1.notifications) == len(o2.notifications) == 1
+    assert len(o3.notifications) == 1
+
+    o1.unobserve(a)
+    a.name = 'other'
+    assert len(o1.notifications) == 1
+
+    del o2, o3
+    gc.collect()
+    assert a._dead_listeners and resource._dead_listeners
+    a.name = 'pruned'
+    assert not a._dead_listeners and not resource._dead_listeners
+    assert a.listeners == []
+    assert a._subscriptions == {}
+    assert resource.listeners == []
+
+
+def test_notification_weak_observer_init(batchmm):
+    import gc
+    a = batchmm()
+    EObserver(a, weak=True)
+    gc.collect()
+    a.name = 'test'
+    assert a.listeners == []
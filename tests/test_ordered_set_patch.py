@@ -1,5 +1,6 @@
 import pytest
-from pyecore.ecore import OrderedSet
+from pyecore.ecore import OrderedSet, EClass, EReference
+from pyecore.ordered_set_patch import IndexedOrderedSet
 
 
 def test_orderedset_insert_empty():
@@ -100,3 +101,43 @@ def test_orderedset_built_from_generator():
     o = OrderedSet(x for x in ['a', 'b', 'c', 3])
 
     assert o == ['a', 'b', 'c', 3]
+
+
+def test_indexedorderedset_positions():
+    o = IndexedOrderedSet(range(100))
+    expected = list(range(100))
+    for i in range(100, 300):
+        position = (i * 7) % len(expected)
+        o.insert(position, i)
+        expected.insert(position, i)
+        if i % 3 == 0:
+            removed = expected.pop((i * 11) % len(expected))
+            o.discard(removed)
+        if i % 5 == 0:
+            assert o.pop(i % len(expected)) == expected.pop(i % len(expected))
+        assert o.index(expected[i % len(expected)]) == i % len(expected)
+    assert o == expected
+    assert o.index(expected) == list(range(len(expected)))
+
+    o.insert(0, expected[-1])
+    assert o == expected
+    with pytest.raises(KeyError):
+        o.index(-1)
+
+
+def test_eorderedset_indexed_moves():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EReference('children', A, upper=-1,
+                                            containment=True))
+    root = A()
+    children = [A() for _ in range(50)]
+    root.children.extend(children)
+    for i in range(50):
+        child = root.children.pop(i)
+        root.children.insert(0, child)
+        assert root.children.index(child) == 0
+        assert child.eContainer() is root
+    assert sorted(root.children.index(x) for x in children) == list(range(50))
+    root.children.remove(children[10])
+    assert children[10] not in root.children
+    assert root.children.index(root.children[-1]) == 48
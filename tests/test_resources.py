@@ -333,6 +333,54 @@ def test_resource_multiroot_container_changement():
     assert resource.contents == [a1]
 
 
+def test_resource_eresource_containment_changes(simplemm):
+    root = simplemm.Root()
+    a = simplemm.A()
+    b = simplemm.B()
+    root.a.append(a)
+
+    r1 = XMIResource(URI('resource1.xmi'))
+    r2 = XMIResource(URI('resource2.xmi'))
+    r1.append(root)
+    assert a.eResource is r1
+
+    r2.append(b)
+    root.b.append(b)
+    assert r2.contents == []
+    assert b.eResource is r1
+    assert b.eRoot() is root
+
+    root.b.remove(b)
+    assert b.eResource is None
+    assert b.eRoot() is b
+
+    r2.append(root)
+    assert r1.contents == []
+    assert a.eResource is r2
+
+    r2.remove(root)
+    assert root.eResource is None
+    assert a.eResource is None
+
+
+def test_resource_eresource_deep_model():
+    A = EClass('A')
+    A.eStructuralFeatures.append(EReference('toa', A, containment=True))
+    root = A()
+    current = root
+    for i in range(5000):
+        current.toa = A()
+        current = current.toa
+
+    resource = XMIResource(URI('deep.xmi'))
+    resource.append(root)
+    assert current.eResource is resource
+    assert current.eRoot() is root
+
+    root.toa = None
+    assert current.eResource is None
+
+
 def test_resource_extract_rootnum_and_frag():
     num, frag = Resource.extract_rootnum_and_frag('/1/a.b')
     assert num == 1
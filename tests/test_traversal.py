@@ -0,0 +1,247 @@
+import gc
+import weakref
+import pytest
+from pyecore.ecore import *
+from pyecore.ecore import extents
+from pyecore.resources import ResourceSet, URI
+from pyecore.traversal import traverse, Order
+
+
+@pytest.fixture(scope='module')
+def mm():
+    Node = EClass('Node')
+    Node.eStructuralFeatures.append(EAttribute('name', EString))
+    Node.eStructuralFeatures.append(EReference('children', Node, upper=-1,
+                                               containment=True))
+    Node.eStructuralFeatures.append(EReference('single', Node,
+                                               containment=True))
+    Node.eStructuralFeatures.append(EReference('ref', Node))
+    pack = EPackage('traversal', nsURI='http://traversal/1.0',
+                    nsPrefix='traversal')
+    pack.eClassifiers.append(Node)
+    return pack
+
+
+@pytest.fixture
+def tree(mm):
+    # root
+    # +- a
+    # |  +- a1
+    # |  +- a2
+    # |     +- a21 (single)
+    # +- b
+    Node = mm.getEClassifier('Node')
+    names = ('root', 'a', 'a1', 'a2', 'a21', 'b')
+    nodes = {name: Node(name=name) for name in names}
+    nodes['root'].children.extend([nodes['a'], nodes['b']])
+    nodes['a'].children.extend([nodes['a1'], nodes['a2']])
+    nodes['a2'].single = nodes['a21']
+    nodes['a'].ref = nodes['b']
+    return nodes
+
+
+def names(objects):
+    return [x.name for x in objects]
+
+
+def test_traversal_pre_order(tree):
+    root = tree['root']
+    assert names(root.eAllContents()) == ['a', 'a1', 'a2', 'a21', 'b']
+    assert names(root.eAllContents(include_self=True)) == \
+        ['root', 'a', 'a1', 'a2', 'a21', 'b']
+
+
+def test_traversal_post_order(tree):
+    root = tree['root']
+    result = root.eAllContents(order=Order.POST_ORDER, include_self=True)
+    assert names(result) == ['a1', 'a21', 'a2', 'a', 'b', 'root']
+
+
+def test_traversal_breadth_first(tree):
+    root = tree['root']
+    result = traverse(root, order=Order.BREADTH_FIRST)
+    assert names(result) == ['a', 'b', 'a1', 'a2', 'a21']
+
+
+@pytest.mark.parametrize('order', list(Order))
+def test_traversal_max_depth(tree, order):
+    root = tree['root']
+    result = traverse(root, order=order, max_depth=1)
+    assert sorted(names(result)) == ['a', 'b']
+    result = traverse(root, order=order, max_depth=0, include_self=True)
+    assert names(result) == ['root']
+    assert list(traverse(root, order=order, max_depth=0)) == []
+
+
+@pytest.mark.parametrize('order', list(Order))
+def test_traversal_prune(tree, order):
+    root = tree['root']
+    result = traverse(root, order=order, prune=lambda x: x.name == 'a2')
+    assert sorted(names(result)) == ['a', 'a1', 'a2', 'b']
+
+
+def test_traversal_resource_scope(mm, tree):
+    rset = ResourceSet()
+    resource = rset.create_resource(URI('traversal.xmi'))
+    resource.append(tree['a'])
+    other = rset.create_resource(URI('other.xmi'))
+    other.append(tree['b'])
+    assert names(traverse(resource)) == ['a', 'a1', 'a2', 'a21']
+    assert sorted(names(traverse(rset))) == ['a', 'a1', 'a2', 'a21', 'b']
+
+
+def test_traversal_deep_model(mm):
+    Node = mm.getEClassifier('Node')
+    root = Node(name='root')
+    current = root
+    for i in range(5000):
+        child = Node(name=str(i))
+        current.children.append(child)
+        current = child
+    assert len(list(root.eAllContents())) == 5000
+    assert len(list(root.eAllContents(order=Order.POST_ORDER))) == 5000
+    root.delete()
+    assert root.children == []
+    assert current.eContainer() is None
+
+
+def test_traversal_eobject_delete(tree):
+    root = tree['root']
+    a, b = tree['a'], tree['b']
+    a.delete()
+    assert root.children == [b]
+    assert tree['a1'].eContainer() is None
+    assert tree['a21'].eContainer() is None
+    assert a.ref is None
+
+
+def test_traversal_containment_change(mm, tree):
+    Node = mm.getEClassifier('Node')
+    a, b = tree['a'], tree['b']
+    a.ref = b
+    ref = Node.findEStructuralFeature('ref')
+    assert b not in a.eContents
+    ref.containment = True
+    try:
+        assert b in a.eContents
+    finally:
+        ref.containment = False
+    assert b not in a.eContents
+
+
+@pytest.fixture(scope='module')
+def typed_mm():
+    Root = EClass('Root')
+    Folder = EClass('Folder')
+    AbstractItem = EClass('AbstractItem', abstract=True)
+    Item = EClass('Item', superclass=(AbstractItem,))
+    Document = EClass('Document')
+    Section = EClass('Section')
+    Root.eStructuralFeatures.append(EReference('folders', Folder, upper=-1,
+                                               containment=True))
+    Root.eStructuralFeatures.append(EReference('documents', Document,
+                                               upper=-1, containment=True))
+    Folder.eStructuralFeatures.append(EReference('items', AbstractItem,
+                                                 upper=-1, containment=True))
+    Folder.eStructuralFeatures.append(EReference('subfolders', Folder,
+                                                 upper=-1, containment=True))
+    Document.eStructuralFeatures.append(EReference('sections', Section,
+                                                   upper=-1, containment=True))
+    pack = EPackage('typedtraversal')
+    pack.eClassifiers.extend([Root, Folder, AbstractItem, Item, Document,
+                              Section])
+    return pack
+
+
+def test_traversal_of_type(typed_mm):
+    Root = typed_mm.getEClassifier('Root')
+    Folder = typed_mm.getEClassifier('Folder')
+    Item = typed_mm.getEClassifier('Item')
+    AbstractItem = typed_mm.getEClassifier('AbstractItem')
+    Document = typed_mm.getEClassifier('Document')
+    Section = typed_mm.getEClassifier('Section')
+    root = Root()
+    f1, f2 = Folder(), Folder()
+    i1, i2 = Item(), Item()
+    root.folders.append(f1)
+    f1.subfolders.append(f2)
+    f1.items.append(i1)
+    f2.items.append(i2)
+    root.documents.append(Document())
+    root.documents[0].sections.append(Section())
+
+    assert list(root.eAllContents(of_type=Item)) == [i1, i2]
+    assert list(root.eAllContents(of_type=AbstractItem)) == [i1, i2]
+    assert list(root.eAllContents(of_type=Folder)) == [f1, f2]
+    assert list(f1.eAllContents(of_type=Folder, include_self=True)) == \
+        [f1, f2]
+    result = root.eAllContents(of_type=Item, order=Order.BREADTH_FIRST)
+    assert list(result) == [i1, i2]
+    assert list(root.eAllContents(of_type=Item, max_depth=2)) == [i1]
+    assert list(root.eAllContents(of_type=EObject)) == \
+        list(root.eAllContents())
+
+
+def test_traversal_of_type_prunes_metamodel(typed_mm):
+    Root = typed_mm.getEClassifier('Root')
+    Folder = typed_mm.getEClassifier('Folder')
+    Item = typed_mm.getEClassifier('Item')
+    Document = typed_mm.getEClassifier('Document')
+    visited = []
+    root = Root()
+    root.documents.append(Document())
+    root.folders.append(Folder())
+    root.folders[0].items.append(Item())
+
+    def spy(obj):
+        visited.append(obj)
+        return False
+
+    result = list(root.eAllContents(of_type=Item, prune=spy))
+    assert result == root.folders[0].items
+    assert root.documents[0] not in visited
+    assert root.folders[0] in visited
+
+
+def test_traversal_of_type_new_subclass(typed_mm):
+    Root = typed_mm.getEClassifier('Root')
+    Folder = typed_mm.getEClassifier('Folder')
+    AbstractItem = typed_mm.getEClassifier('AbstractItem')
+    Section = typed_mm.getEClassifier('Section')
+    root = Root()
+    root.folders.append(Folder())
+    assert list(root.eAllContents(of_type=Section)) == []
+
+    # a new kind of item can now contain sections
+    SectionItem = EClass('SectionItem', superclass=(AbstractItem,))
+    SectionItem.eStructuralFeatures.append(EReference('sections', Section,
+                                                      containment=True))
+    typed_mm.eClassifiers.append(SectionItem)
+    item = SectionItem()
+    item.sections = Section()
+    root.folders[0].items.append(item)
+    assert list(root.eAllContents(of_type=Section)) == [item.sections]
+
+
+def test_traversal_of_type_index_not_kept():
+    Root = EClass('Root')
+    Transient = EClass('Transient')
+    Root.eStructuralFeatures.append(EReference('elements', Transient,
+                                               upper=-1, containment=True))
+    with extents.disabled():
+        root = Root()
+        root.elements.append(Transient())
+    assert list(root.eAllContents(of_type=Transient)) == root.elements
+    collected = weakref.ref(Transient)
+    del Root, Transient, root
+    gc.collect()
+    assert collected() is None
+
+
+def test_traversal_does_not_materialize(mm, tree):
+    root = tree['root']
+    list(traverse(root))
+    assert 'single' not in root.__dict__
+    assert 'children' not in tree['b'].__dict__
+    assert tree['b'].eContents == []
+    assert 'children' not in tree['b'].__dict__